@@ -29,14 +29,16 @@ function usage {
 Create a PDF or EPUB page.
 
 Usage:
-  --format [pdf|epub]  -> Specify output format
+  --format [pdf|epub|pdf,epub] -> Specify output format(s), the content is preprocessed once for both
   --data [relative path]  -> Specify the source file
   --config [relative path]  -> Specify the config file
   --pb [0|1]           -> Paperbook (PDF only)
   --bw [0|1]           -> Black and white (PDF only)
   --s  [0|1]           -> Short version (PDF only)
-  --l  [0|1]           -> Language (PDF only)
-  --et [kindle|epub|web] -> EPUB type (EPUB only)
+  --l  [en|hu]         -> Language (PDF, optional for EPUB)
+  --profile [full|draft] -> Output profile, draft is a fast preview with image placeholders (PDF only, optional)
+  --sections [keys]    -> Comma-separated sections to render alone, e.g. chapters.ch_2,preface (PDF only, optional)
+  --et [kindle|epub|web] -> EPUB type, web is a static website of lightweight pages (EPUB only)
 
 EOF
 }
@@ -72,9 +74,17 @@ fi
 if [[ $format == "pdf" ]]; then
   [[ -z $data || -z $config || -z $pb || -z $bw || -z $s || -z $l ]] && usage && die "PDF requires --data --config --pb, --bw, --s, --l"
   command="python3 /src/consumer.py --format pdf --data \"$data\" --config \"$config\" --pb \"$pb\" --bw \"$bw\" --s \"$s\" --l \"$l\""
+  [[ -n $profile ]] && command="$command --profile \"$profile\""
+  [[ -n $sections ]] && command="$command --sections \"$sections\""
 elif [[ $format == "epub" ]]; then
   [[ -z $data || -z $config || -z $et ]] && usage && die "EPUB requires --data --config --et"
   command="python3 /src/consumer.py --format epub --data \"$data\" --config \"$config\" --et \"$et\""
+  [[ -n $l ]] && command="$command --l \"$l\""
+elif [[ $format == "pdf,epub" || $format == "epub,pdf" ]]; then
+  [[ -z $data || -z $config || -z $pb || -z $bw || -z $s || -z $l || -z $et ]] && usage && die "PDF and EPUB require --data --config --pb, --bw, --s, --l, --et"
+  command="python3 /src/consumer.py --format pdf,epub --data \"$data\" --config \"$config\" --pb \"$pb\" --bw \"$bw\" --s \"$s\" --l \"$l\" --et \"$et\""
+  [[ -n $profile ]] && command="$command --profile \"$profile\""
+  [[ -n $sections ]] && command="$command --sections \"$sections\""
 else
   usage
   die "Invalid format: $format"
@@ -26,7 +26,7 @@ class BaseBuilder(metaclass=abc.ABCMeta):
             self.valid = False
             return
 
-        self.style_manager = StyleManager()
+        self.style_manager = StyleManager(black_and_white=kwargs.get("black_and_white", False))
         if not self.style_manager.register_styles():
             logger.error("StyleManager registration failed. Builder is invalid.")
             self.valid = False
@@ -43,7 +43,7 @@ class BaseBuilder(metaclass=abc.ABCMeta):
         self.short = kwargs.get("short", False)
         self.epub_type = kwargs.get("epub_type", None)
 
-        self.language = kwargs.get("language", self.config.get("defaults.language"))
+        self.language = kwargs.get("language") or self.config.get("defaults.language")
 
         page_size_map = {
             'letter': letter,
@@ -1,6 +1,8 @@
 import os
-from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
 from src.logger import logger
+from src.services.image_metadata_service import ImageMetadataService
+from src.services.image_registry_service import ImageRegistryService
 
 try:
     from PIL import Image
@@ -8,16 +10,35 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+class RegisteredImage(Flowable):
+    """Platypus flowable that draws an image through the shared ImageRegistryService."""
+
+    def __init__(self, image_registry, image_path: str, width: float, height: float):
+        super().__init__()
+        self.image_registry = image_registry
+        self.image_path = image_path
+        self.drawWidth = width
+        self.drawHeight = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        self.image_registry.draw_image(self.canv, self.image_path, 0, 0, self.drawWidth, self.drawHeight)
+
 class ImageBuilder:
     """Handles ONLY images with sizing and captions."""
 
-    def __init__(self, canvas, page_size, style_manager, config):
+    def __init__(self, canvas, page_size, style_manager, config, image_registry=None, dry_run=False):
         self.canvas = canvas
         self.page_size = page_size
         self.style_manager = style_manager
         self.config = config
         self.padding_h = config.get("common.padding.horizontal")
         self.images_path = config.get("paths.resources") + "/images"
+        self.image_metadata = ImageMetadataService.get_instance()
+        self.image_registry = image_registry or ImageRegistryService()
+        self.dry_run = dry_run
 
     def add_image(self, src: str, current_pos: float, alignment: str = "center",
                   width=300, height="auto", caption: str = None) -> float:
@@ -36,11 +57,13 @@ class ImageBuilder:
             width_points, height_points = self._calculate_dimensions(src, width, height)
             x_pos = self._calculate_x_position(width_points, alignment)
 
-            # Draw image
+            # Draw image through the shared registry (decoded and embedded once).
+            # The dry run only needs the geometry, which comes from the file header.
             y_pos = self.page_size[1] - current_pos - height_points
-            img_reader = ImageReader(image_path)
-            self.canvas.drawImage(img_reader, x_pos, y_pos,
-                                  width=width_points, height=height_points)
+            self.image_registry.record_placement(image_path, width_points, height_points)
+            if not self.dry_run:
+                self.image_registry.draw_image(self.canvas, image_path, x_pos, y_pos,
+                                               width_points, height_points)
 
             new_pos = current_pos + height_points + 5
 
@@ -96,16 +119,9 @@ class ImageBuilder:
         return width_points, height_points
 
     def _get_aspect_ratio(self, src: str) -> float:
-        """Get real aspect ratio from image file."""
-        try:
-            image_path = os.path.join(self.images_path, src)
-            if os.path.exists(image_path):
-                with Image.open(image_path) as img:
-                    width, height = img.size
-                    return height / width
-        except Exception:
-            pass
-        return 0.75  # Default ratio
+        """Get real aspect ratio from the cached image metadata."""
+        image_path = os.path.join(self.images_path, src)
+        return self.image_metadata.get_aspect_ratio(image_path, fallback=0.75)
 
     def _calculate_x_position(self, width_points: float, alignment: str) -> float:
         """Calculate X position based on alignment."""
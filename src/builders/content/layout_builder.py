@@ -1,6 +1,9 @@
+import hashlib
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.platypus.paragraph import Paragraph
 from src.logger import logger
+from src.utils.text_utils import string_width
 
 class LayoutBuilder:
     """Handles ONLY layout: spacing, separators, headers, footers, page breaks."""
@@ -12,6 +15,8 @@ class LayoutBuilder:
         self.config = config
         self.padding_h = config.get("common.padding.horizontal")
         self.padding_v = config.get("common.padding.vertical")
+        self._header_forms = {}  # header text -> form name
+        self._footer_forms = {}  # (footer text, page number width) -> (form name, baseline)
 
     def add_spacing(self, current_pos: float, amount: float) -> float:
         """Add vertical spacing, return new position."""
@@ -24,7 +29,41 @@ class LayoutBuilder:
         return current_pos + 5
 
     def add_header(self, text: str, page_num: int) -> None:
-        """Add page header at fixed position."""
+        """Add page header at fixed position. Compiled once per text into a form XObject."""
+        form_name = self._header_forms.get(text)
+        if form_name is None:
+            form_name = self._compile_form('header', text, lambda: self._draw_header(text))
+            self._header_forms[text] = form_name
+        self.canvas.doForm(form_name)
+
+    def add_footer(self, text: str, page_num: int) -> None:
+        """
+        Add page footer at fixed position. The line and text are compiled into a form XObject
+        once per text (and page number width), only the page number is drawn on every page.
+        """
+        style = self.style_manager.get_style('paragraph_default')
+        number_width = string_width(f"{page_num} ", style.fontName, style.fontSize)
+        key = (text, round(number_width, 3))
+        footer = self._footer_forms.get(key)
+        if footer is None:
+            baseline = None
+
+            def draw_footer():
+                nonlocal baseline
+                baseline = self._draw_footer(text, style, number_width)
+
+            form_name = self._compile_form('footer', f"{text}|{key[1]}", draw_footer)
+            footer = self._footer_forms[key] = (form_name, baseline)
+
+        form_name, baseline = footer
+        self.canvas.doForm(form_name)
+        self.canvas.saveState()
+        self.canvas.setFillColor(style.textColor)
+        self.canvas.setFont(style.fontName, style.fontSize)
+        self.canvas.drawString(self.padding_h, baseline, str(page_num))
+        self.canvas.restoreState()
+
+    def _draw_header(self, text: str) -> None:
         style = self.style_manager.prepare_style('title_sub', alignment=2)
         y = self.page_size[1] - self.padding_v
 
@@ -36,19 +75,29 @@ class LayoutBuilder:
         p.wrapOn(self.canvas, self.page_size[0] - 2 * self.padding_h, 50)
         p.drawOn(self.canvas, self.padding_h, y + 5)
 
-    def add_footer(self, text: str, page_num: int) -> None:
-        """Add page footer at fixed position."""
-        style = self.style_manager.get_style('paragraph_default')
+    def _draw_footer(self, text: str, style, number_width: float) -> float:
+        """Draws the footer line and the text after the page number, returns the baseline of the text."""
         y = self.padding_v
 
         # Draw footer line
         self.canvas.line(self.padding_h, y, self.page_size[0] - self.padding_h, y)
 
-        # Draw footer text with page number
-        footer_text = f"{page_num} | {text}"
-        p = Paragraph(footer_text, style)
-        p.wrapOn(self.canvas, self.page_size[0] - 2 * self.padding_h, 50)
-        p.drawOn(self.canvas, self.padding_h, y - 18)
+        # Draw footer text, leaving room for the page number
+        p = Paragraph(f"| {text}", style)
+        p.wrapOn(self.canvas, self.page_size[0] - 2 * self.padding_h - number_width, 50)
+        p.drawOn(self.canvas, self.padding_h + number_width, y - 18)
+
+        # Same first baseline as Paragraph.drawPara
+        ascent = style.fontSize if rl_config.paraFontSizeHeightOffset else getattr(p.blPara, 'ascent', style.fontSize)
+        return y - 18 + p.height - ascent
+
+    def _compile_form(self, kind: str, key: str, draw) -> str:
+        """Records the drawing of draw() into a form XObject and returns its name."""
+        form_name = f"{kind}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+        self.canvas.beginForm(form_name)
+        draw()
+        self.canvas.endForm()
+        return form_name
 
     def add_blank_page(self) -> None:
         """Add completely blank page."""
@@ -1,76 +1,135 @@
+from bisect import bisect_right
+from itertools import accumulate
 from reportlab.platypus.paragraph import Paragraph
 from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
+from src.services.content_ir_service import ListItemNode
+from src.services.layout_cache_service import LayoutCacheService
 
 class ListBuilder:
-    """Handles the creation of nested lists with item-by-item drawing."""
-
-    def __init__(self, canvas, page_size, style_manager, config):
+    """
+    Handles the creation of nested lists. A list is flattened into its items (at any depth),
+    each measured once with the style it is drawn with. A top-level item is kept together
+    with its sub-items; page breaks between them are found by binary search over the
+    prefix sums of their heights.
+    """
+    BULLETS = ['•', '–', '▪']
+    BASE_INDENT = 20
+    MAX_INDENT_LEVEL = 8  # Deeper items keep this indentation
+    ITEM_SPACING = 4  # After every item and once more before a nested list
+
+    def __init__(self, canvas, page_size, style_manager, config, layout_cache=None):
         self.canvas = canvas
         self.page_size = page_size
         self.style_manager = style_manager
         self.config = config
         self.padding_h = config.get("common.padding.horizontal")
+        self.padding_v = config.get("common.padding.vertical")
+        self.layout_cache = layout_cache or LayoutCacheService()
+        self._item_styles = {}  # nesting level -> ParagraphStyle
 
-    def add_list_item(self, item: dict, current_pos: float, level: int = 0) -> float:
-        """
-        Draws a single list item and its potential sub-items recursively.
-        This is the core drawing method called by ChapterBuilder for each item.
+    def add_list(self, items: tuple, current_pos: float, on_page_break=None) -> float:
         """
-        y_pos = current_pos
-        base_style = self.style_manager.prepare_style('paragraph_default', fontSize=12, leading=16)
-
-        bullets = ['•', '–', '▪']
-        bullet_char = bullets[level] if level < len(bullets) else bullets[-1]
-
-        base_indent = 20
-        text_indent = base_indent * (level + 1)
-        bullet_indent = text_indent - 10
+        Draws a whole list and returns the new position.
 
-        item_text = item.get('text', '')
-        sub_items = item.get('sub_items')
-
-        item_style = ParagraphStyle(
-            name=f"list-level-{level}", parent=base_style,
-            leftIndent=text_indent, bulletIndent=bullet_indent,
-            firstLineIndent=0, bulletText=bullet_char,
-            bulletFontSize=base_style.fontSize * 0.8,
-        )
-
-        paragraph = Paragraph(item_text, item_style)
+        Args:
+            on_page_break (callable, optional): Starts a new page and returns the new position.
+                                                Without it the list is drawn without breaks.
+        """
+        entries = self.layout_list(items)
+        if not on_page_break:
+            return self._draw_entries(entries, current_pos)
+
+        # Units are the top-level items with their sub-items; bounds[u] is the first entry of unit u
+        bounds = [i for i, (_, _, _, level) in enumerate(entries) if level == 0] + [len(entries)]
+        entry_offsets = list(accumulate((advance for _, _, advance, _ in entries), initial=0))
+        # offsets[u] is the height of the first u units
+        offsets = [entry_offsets[bound] for bound in bounds]
+        unit_count = len(bounds) - 1
+        start = 0
+        fresh_page = False
+        while start < unit_count:
+            available_height = self._available_height(current_pos)
+            end = bisect_right(offsets, offsets[start] + available_height, lo=start) - 1
+
+            if end == start:
+                if not fresh_page:
+                    current_pos = on_page_break()
+                    fresh_page = True
+                    continue
+                end = start + 1  # Taller than a whole page: draw it anyway
+
+            current_pos = self._draw_entries(entries[bounds[start]:bounds[end]], current_pos)
+            start = end
+            if start < unit_count:
+                current_pos = on_page_break()
+                fresh_page = True
+
+        return current_pos
+
+    def add_list_item(self, item: ListItemNode, current_pos: float) -> float:
+        """Draws a single list item and its sub-items without page breaks."""
+        return self._draw_entries(self.layout_list([item]), current_pos)
+
+    def estimate_list_item_height(self, item: ListItemNode) -> float:
+        """Returns the total height of a single list item and its sub-items."""
+        return sum(advance for _, _, advance, _ in self.layout_list([item]))
+
+    def layout_list(self, items: tuple) -> list:
+        """
+        Returns the measured items of a list in drawing order, cached by content and width.
 
+        Returns:
+            list: (wrapped Paragraph, height, advance, nesting level) tuples, where advance
+                  includes the spacing.
+        """
         width = self.page_size[0] - 2 * self.padding_h
-        _, height = paragraph.wrap(width, 10000)
-
-        draw_y_pos = self.page_size[1] - y_pos - height
-        paragraph.drawOn(self.canvas, self.padding_h, draw_y_pos)
-        y_pos += height + 4
-
-        if sub_items:
-            y_pos += 4
-            # Call recursively for sub-items
-            for sub_item_text in sub_items:
-                # Sub-items are drawn as a new level
-                y_pos = self.add_list_item({'text': sub_item_text}, y_pos, level + 1)
-
+        return self.layout_cache.get_or_create('list', items, width, lambda: self._flatten(items, width))
+
+    def _flatten(self, items: tuple, width: float) -> list:
+        """Walks the item tree depth-first (iteratively, so nesting depth is unlimited)."""
+        entries = []
+        stack = [(iter(items), 0)]
+        while stack:
+            item_iterator, level = stack[-1]
+            item = next(item_iterator, None)
+            if item is None:
+                stack.pop()
+                continue
+
+            sub_items = item.sub_items
+            paragraph = Paragraph(item.text, self._get_item_style(level))
+            _, height = paragraph.wrap(width, 10000)
+            advance = height + self.ITEM_SPACING + (self.ITEM_SPACING if sub_items else 0)
+            entries.append((paragraph, height, advance, level))
+
+            if sub_items:
+                stack.append((iter(sub_items), level + 1))
+        return entries
+
+    def _get_item_style(self, level: int) -> ParagraphStyle:
+        """Returns the (cached) style of a nesting level, with its bullet and indentation."""
+        style = self._item_styles.get(level)
+        if style is None:
+            base_style = self.style_manager.prepare_style('paragraph_default', fontSize=12, leading=16)
+            bullet_char = self.BULLETS[min(level, len(self.BULLETS) - 1)]
+            text_indent = self.BASE_INDENT * (min(level, self.MAX_INDENT_LEVEL) + 1)
+            style = ParagraphStyle(
+                name=f"list-level-{level}", parent=base_style,
+                leftIndent=text_indent, bulletIndent=text_indent - 10,
+                firstLineIndent=0, bulletText=bullet_char,
+                bulletFontSize=base_style.fontSize * 0.8,
+            )
+            self._item_styles[level] = style
+        return style
+
+    def _draw_entries(self, entries: list, current_pos: float) -> float:
+        y_pos = current_pos
+        for paragraph, height, advance, _ in entries:
+            draw_y_pos = self.page_size[1] - y_pos - height
+            paragraph.drawOn(self.canvas, self.padding_h, draw_y_pos)
+            y_pos += advance
         return y_pos
 
-    def estimate_list_item_height(self, item: dict, level: int = 0) -> float:
-        """Recursively estimates the total height of a single list item and its children."""
-        total_height = 0
-        style = self.style_manager.prepare_style('paragraph_default', fontSize=12, leading=16)
-        width = self.page_size[0] - 2 * self.padding_h
-
-        item_text = item.get('text', '')
-        sub_items = item.get('sub_items')
-
-        p = Paragraph(item_text, style)
-        _, height = p.wrap(width, 10000)
-        total_height += height + 4
-
-        if sub_items:
-            total_height += 4 # Space before nested list
-            for sub_item_text in sub_items:
-                total_height += self.estimate_list_item_height({'text': sub_item_text}, level + 1)
-
-        return total_height
+    def _available_height(self, current_pos: float, buffer: float = 15) -> float:
+        """Available height on the current page, computed like LayoutService.calculate_available_space."""
+        return (self.page_size[1] - current_pos) - self.padding_v - buffer
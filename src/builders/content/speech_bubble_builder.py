@@ -1,7 +1,8 @@
 from .textbox_builder import TextBoxBuilder
+from .image_builder import RegisteredImage
 from src.logger import logger
-from reportlab.platypus import Table, TableStyle, Paragraph, Image
-from reportlab.lib.utils import ImageReader
+from src.services.content_ir_service import SpeechBubbleNode, TextNode
+from reportlab.platypus import Table, TableStyle, Paragraph
 from reportlab.graphics.shapes import Drawing, Rect
 import os
 
@@ -12,53 +13,66 @@ class SpeechBubbleBuilder(TextBoxBuilder):
     and correct text alignment for right-aligned bubbles.
     """
 
-    def add_speech_bubble(self, bubble_data: dict, current_pos: float) -> float:
+    def add_speech_bubble(self, bubble_data: SpeechBubbleNode, current_pos: float) -> float:
         """Add a speech bubble with avatar and text, with correct layout."""
         try:
             self.canvas.saveState()
 
-            # 1. Calculate overall box properties
-            box_width = self._calculate_box_width(bubble_data.get('width', '100%'))
-            x_pos = self._calculate_x_position(box_width, bubble_data.get('alignment', 'left'))
+            # 1. Get the measured layout (box, padding and the wrapped Image + Spacer + Text table)
+            layout = self.measure_speech_bubble(bubble_data)
+            box_width, padding, total_height = layout['box_width'], layout['padding'], layout['height']
+            x_pos = self._calculate_x_position(box_width, bubble_data.alignment)
 
-            padding = {
-                'top': bubble_data.get('padding_top', 15), 'bottom': bubble_data.get('padding_bottom', 15),
-                'left': bubble_data.get('padding_left', 15), 'right': bubble_data.get('padding_right', 15)
-            }
-            content_width = box_width - padding['left'] - padding['right']
-
-            # 2. Create the internal layout table (Image + Spacer + Text)
-            layout_table = self._create_layout_table(bubble_data, content_width)
-
-            # 3. Calculate height
-            _, table_height = layout_table.wrapOn(self.canvas, content_width, self.page_size[1])
-            total_height = table_height + padding['top'] + padding['bottom']
-            min_height = bubble_data.get('min_height')
-            if min_height and total_height < min_height: total_height = min_height
-
-            # 4. Draw the main bubble frame (background and rounded border)
+            # 2. Draw the main bubble frame (background and rounded border)
             box_y = self.page_size[1] - current_pos - total_height
             self._draw_box_frame(x_pos, box_y, box_width, total_height, bubble_data)
 
-            # 5. Draw the layout table inside the frame
+            # 3. Draw the layout table inside the frame
             table_x = x_pos + padding['left']
             table_y = box_y + padding['bottom']
-            layout_table.drawOn(self.canvas, table_x, table_y)
+            layout['table'].drawOn(self.canvas, table_x, table_y)
 
             self.canvas.restoreState()
-            return current_pos + total_height + bubble_data.get('margin_bottom', 5)
+            return current_pos + total_height + bubble_data.margin_bottom
 
         except Exception as e:
             self.canvas.restoreState()
             logger.error(f"Failed to add speech bubble: {e}", exc_info=True)
             return current_pos + 50
 
-    def _create_layout_table(self, bubble_data: dict, content_width: float) -> Table:
+    def measure_speech_bubble(self, bubble_data: SpeechBubbleNode) -> dict:
+        """
+        Returns the measured layout of a speech bubble. Layouts are cached by content
+        (text, avatar, sizes and styling) and width, so every bubble is built and
+        wrapped once per build and drawn from the cached table in both passes.
+
+        Returns:
+            dict: {'box_width', 'padding', 'table' (wrapped layout table), 'height' (without margin)}
+        """
+        box_width = self._calculate_box_width(bubble_data.width)
+        return self.layout_cache.get_or_create(
+            'speech_bubble', bubble_data, box_width, lambda: self._layout_speech_bubble(bubble_data, box_width))
+
+    def _layout_speech_bubble(self, bubble_data: SpeechBubbleNode, box_width: float) -> dict:
+        padding = {
+            'top': bubble_data.padding_top, 'bottom': bubble_data.padding_bottom,
+            'left': bubble_data.padding_left, 'right': bubble_data.padding_right
+        }
+        content_width = box_width - padding['left'] - padding['right']
+
+        layout_table = self._create_layout_table(bubble_data, content_width)
+        _, table_height = layout_table.wrapOn(self.canvas, content_width, self.page_size[1])
+        total_height = table_height + padding['top'] + padding['bottom']
+        min_height = bubble_data.min_height
+        if min_height and total_height < min_height: total_height = min_height
+
+        return {'box_width': box_width, 'padding': padding, 'table': layout_table, 'height': total_height}
+
+    def _create_layout_table(self, bubble_data: SpeechBubbleNode, content_width: float) -> Table:
         """Creates a 1x3 invisible table to manage layout with spacing."""
-        bubble_type = bubble_data.get('bubble_type', 'left')
-        avatar_src = bubble_data.get('avatar_src')
-        text = bubble_data.get('text', '')
-        avatar_size = bubble_data.get('avatar_size', 80)
+        bubble_type = bubble_data.bubble_type
+        avatar_src = bubble_data.avatar_src
+        avatar_size = bubble_data.avatar_size
         spacing = 10 # Space between avatar and text
 
         # --- Create Image Flowable ---
@@ -66,10 +80,12 @@ class SpeechBubbleBuilder(TextBoxBuilder):
         if avatar_src:
             image_path = os.path.join(self.images_path, avatar_src)
             if os.path.exists(image_path):
-                image_flowable = Image(image_path, width=avatar_size, height=avatar_size)
+                self.image_registry.record_placement(image_path, avatar_size, avatar_size)
+                # Draws nothing on the dry run canvas, so the cached table serves both passes
+                image_flowable = RegisteredImage(self.image_registry, image_path, avatar_size, avatar_size)
             else:
                 logger.warning(f"Avatar image not found: {image_path}")
-                image_flowable = self._create_placeholder(avatar_size, avatar_size, bubble_data.get('border_color', 'red'))
+                image_flowable = self._create_placeholder(avatar_size, avatar_size, bubble_data.border_color or 'red')
 
         # --- Create Text Paragraph Flowable ---
         text_width = content_width - avatar_size - spacing
@@ -78,14 +94,15 @@ class SpeechBubbleBuilder(TextBoxBuilder):
         # Align text to the right if the bubble is right-aligned
         text_align_value = 'right' if bubble_type == 'right' else 'left'
 
-        style_data = {
-            'font_size': bubble_data.get('text_size', 14),
-            'text_color': bubble_data.get('text_color', 'black'),
-            'font_weight': bubble_data.get('text_weight', 'Regular'),
-            'text_align': text_align_value,
-            'leading': bubble_data.get('text_size', 14) * 1.4
-        }
-        text_paragraph = self._create_text_element(text, text_width, style_data)['object']
+        text_node = TextNode(
+            bubble_data.text,
+            font_size=bubble_data.text_size,
+            text_color=bubble_data.text_color or 'black',
+            font_weight=bubble_data.text_weight,
+            text_align=text_align_value,
+            leading=bubble_data.text_size * 1.4
+        )
+        text_paragraph = self._create_text_element(text_node, text_width)['object']
 
         # --- Assemble Table with a spacer column ---
         # The empty string "" creates an empty spacer cell.
@@ -109,21 +126,9 @@ class SpeechBubbleBuilder(TextBoxBuilder):
         d.add(r)
         return d
 
-    def estimate_speech_bubble_height(self, bubble_data: dict) -> float:
-        # Re-implementing this to be accurate
+    def estimate_speech_bubble_height(self, bubble_data: SpeechBubbleNode) -> float:
         try:
-            box_width = self._calculate_box_width(bubble_data.get('width', '100%'))
-            padding = {
-                'top': bubble_data.get('padding_top', 15), 'bottom': bubble_data.get('padding_bottom', 15),
-                'left': bubble_data.get('padding_left', 15), 'right': bubble_data.get('padding_right', 15)
-            }
-            content_width = box_width - padding['left'] - padding['right']
-            layout_table = self._create_layout_table(bubble_data, content_width)
-            _, table_height = layout_table.wrapOn(self.canvas, content_width, self.page_size[1])
-            total_height = table_height + padding['top'] + padding['bottom']
-            min_height = bubble_data.get('min_height')
-            if min_height and total_height < min_height: total_height = min_height
-            return total_height + bubble_data.get('margin_bottom', 5)
+            return self.measure_speech_bubble(bubble_data)['height'] + bubble_data.margin_bottom
         except Exception as e:
             logger.error(f"Failed to estimate speech bubble height: {e}")
             return 150
@@ -1,116 +1,99 @@
+import hashlib
+import json
+import os
 import re
+from xml.sax.saxutils import escape
 from reportlab.platypus import Table, TableStyle, Paragraph
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from src.logger import logger
+from src.services.table_source_service import TableSourceService
+from src.utils.text_utils import measure_text_widths
 
 class TableBuilder:
     """
     Debug version: prints the string content being passed to the Paragraph
     object to diagnose the color replacement issue.
     """
+    # Cell kinds of the attribute grid, each mapped to one precomputed paragraph style
+    BODY_CELL = 0
+    EMPHASIZED_CELL = 1  # Header block and highlighted cells: bold and centered
+    NUMERIC_CELL = 2  # Body cells of numeric source columns: right aligned
+
+    # Default styles of tables streamed from an external source
+    SOURCE_HEADER_STYLE = [["GRID", [0, 0], [-1, -1], 0.5, "grey"], ["BACKGROUND", [0, 0], [-1, -1], "ltgrey"]]
+    SOURCE_BODY_STYLE = [["GRID", [0, 0], [-1, -1], 0.5, "grey"]]
+
+    CELL_PADDING = 12  # ReportLab's default left + right cell padding
+    MEASURE_ROWS = 32  # Rows measured at a time when a block is split across pages
+    _column_width_cache = {}  # table content hash -> column widths (points) per block, shared by all passes
+
     def __init__(self, canvas, page_size, style_manager, config):
         self.canvas = canvas
         self.page_size = page_size
         self.style_manager = style_manager
         self.config = config
         self.padding_h = config.get("common.padding.horizontal")
-
-    def _preprocess_html_colors(self, text: str) -> str:
-        """
-        Finds custom color names in HTML-like tags and replaces them with
-        hex codes using simple string.replace().
-        """
-        color_map = self.style_manager.get_color_map()
-        processed_text = str(text)
-
-        for name, hex_code in color_map.items():
-            # This logic replaces the color names inside the tags directly.
-            # It's case-sensitive.
-
-            # Variations for backColor with single and double quotes
-            processed_text = processed_text.replace(f"<backColor='{name}'>", f"<backColor='{hex_code}'>")
-            processed_text = processed_text.replace(f'<backColor="{name}">', f'<backColor="{hex_code}">')
-
-            # Variations for font color with single and double quotes
-            processed_text = processed_text.replace(f"<font color='{name}'>", f"<font color='{hex_code}'>")
-            processed_text = processed_text.replace(f'<font color="{name}">', f'<font color="{hex_code}">')
-
-        return processed_text
+        self.padding_v = config.get("common.padding.vertical")
+        self._cell_styles = {}  # cell kind -> ParagraphStyle
 
     def add_table(self, data: list, style: list = None, current_pos: float = 0,
                   caption: str = None, alignment: str = "center",
-                  block_column_widths: list = None, **kwargs) -> float:
+                  block_column_widths: list = None, on_page_break=None,
+                  repeat_header: bool = True, source: str = None, **kwargs) -> float:
         """
         Creates a series of tables, processing cell content as rich text Paragraphs
         with cell-specific styling to preserve formatting.
+
+        Args:
+            source (str, optional): CSV/TSV file under the resources directory to stream the
+                                    rows from instead of 'data'. Its first row is the header.
+            on_page_break (callable, optional): Starts a new page and returns the new position.
+                                                If given, blocks are split row-wise across pages.
+            repeat_header (bool): Draw the first (header) block again on every continuation page.
         """
         try:
-            available_width = self.page_size[0] - 2 * self.padding_h
             y_pos_after_last_table = current_pos
+            header_table = None
+            header_pending = False
+
+            if source:
+                return self._add_source_table(source, current_pos, caption, alignment, style,
+                                              block_column_widths, on_page_break, repeat_header)
+
+            if block_column_widths:
+                block_widths_in_points = [self._to_points(width_specs) for width_specs in block_column_widths]
+            else:
+                block_widths_in_points = self._get_auto_column_widths(data, style)
 
             for i in range(len(data)):
                 table_data_raw = data[i]
                 table_style_raw = style[i]
-                width_specs_percent = block_column_widths[i]
-                col_widths_in_points = [available_width * (float(p.strip('%')) / 100) if '%' in p else float(p) for p in width_specs_percent]
-
-                # Create Paragraphs with cell-specific styles
-                table_data_as_paragraphs = []
-                for r, row_data in enumerate(table_data_raw):
-                    paragraph_row = []
-                    for c, cell_text in enumerate(row_data):
-                        is_header = (i == 0)
-                        is_colored_cell = any(
-                            cmd[0] == 'BACKGROUND' and
-                            cmd[1][0] <= c <= cmd[2][0] and
-                            cmd[1][1] <= r <= cmd[2][1] and
-                            str(cmd[3]).lower() not in ['ltgrey', 'grey']
-                            for cmd in table_style_raw
-                        )
-
-                        style_args = {'fontSize': 9, 'leading': 11}
-                        if is_header:
-                            style_args['fontName'] = 'Helvetica-Bold'
-                            style_args['alignment'] = TA_CENTER
-                        elif is_colored_cell:
-                            style_args['fontName'] = 'Helvetica-Bold'
-                            style_args['alignment'] = TA_CENTER
-                        else:
-                            style_args['alignment'] = TA_LEFT
-
-                        cell_para_style = self.style_manager.prepare_style('paragraph_default', **style_args)
-
-                        processed_text = self._preprocess_html_colors(str(cell_text))
-
-                        paragraph = Paragraph(processed_text, cell_para_style)
-                        paragraph_row.append(paragraph)
-                    table_data_as_paragraphs.append(paragraph_row)
-
-                # Get cell-level styles from the JSON
-                final_table_style_cmds = []
-                for cmd_tuple in table_style_raw:
-                    cmd, start, end, *rest = cmd_tuple
-                    if cmd in ('GRID', 'SPAN', 'BACKGROUND', 'LINEBELOW', 'LINEABOVE', 'LINEBEFORE', 'LINEAFTER', 'VALIGN'):
-                        if cmd == 'BACKGROUND':
-                            final_table_style_cmds.append(tuple([cmd, start, end, self.style_manager._parse_color(rest[0])]))
-                        else:
-                            final_table_style_cmds.append(cmd_tuple)
-
-                # Add VALIGN MIDDLE to colored cells
-                for cmd_tuple in table_style_raw:
-                    if i > 0 and cmd_tuple[0] == 'BACKGROUND' and str(cmd_tuple[3]).lower() not in ['ltgrey', 'grey']:
-                        cmd, start, end, *rest = cmd_tuple
-                        final_table_style_cmds.append(('VALIGN', start, end, 'MIDDLE'))
-
-                if table_data_as_paragraphs and len(table_data_as_paragraphs[0]) != len(col_widths_in_points):
+                col_widths_in_points = block_widths_in_points[i]
+
+                if table_data_raw and len(table_data_raw[0]) != len(col_widths_in_points):
                     logger.error(f"Data inconsistency in table block {i}")
                     continue
 
-                table_obj = Table(table_data_as_paragraphs, colWidths=col_widths_in_points)
-                table_obj.setStyle(TableStyle(final_table_style_cmds))
-                y_pos_after_last_table = self._place_table(table_obj, y_pos_after_last_table, alignment)
+                if not on_page_break:
+                    table_obj = self._create_block_table(i, table_data_raw, table_style_raw, col_widths_in_points)
+                    y_pos_after_last_table = self._place_table(table_obj, y_pos_after_last_table, alignment)
+                elif i == 0 and repeat_header and len(data) > 1:
+                    # The header block is drawn together with the first rows of the next block
+                    header_table = self._create_block_table(i, table_data_raw, table_style_raw, col_widths_in_points)
+                    header_pending = True
+                else:
+                    table_data_as_paragraphs, final_table_style_cmds = self._create_block_rows(
+                        i, table_data_raw, table_style_raw)
+                    y_pos_after_last_table = self._place_table_with_breaks(
+                        table_data_as_paragraphs, final_table_style_cmds, col_widths_in_points,
+                        y_pos_after_last_table, alignment, on_page_break,
+                        header_table=header_table, header_first=header_pending)
+                    header_pending = False
+
+            if header_pending:
+                y_pos_after_last_table = self._place_table(header_table, y_pos_after_last_table, alignment)
 
             if caption:
                 y_pos_after_last_table = self._add_table_caption(caption, y_pos_after_last_table)
@@ -120,10 +103,372 @@ class TableBuilder:
             logger.error(f"Failed to add table with rich text: {e}", exc_info=True)
             return current_pos + 50
 
+    def _add_source_table(self, source: str, current_pos: float, caption: str, alignment: str,
+                          style: list, block_column_widths: list, on_page_break, repeat_header: bool) -> float:
+        """
+        Streams the rows of an external table source in chunks. Each chunk is laid out
+        as a body block under the header built from the source's column names.
+        """
+        table_sources = TableSourceService.get_instance()
+        source_path = table_sources.resolve_source(self.config.get("paths.resources"), source)
+        profile = table_sources.get_profile(source_path) if source_path else None
+        if not profile:
+            return current_pos + 50
+
+        numeric_columns = [c for c, column_type in enumerate(profile['types']) if column_type != 'text']
+        if block_column_widths:
+            col_widths_in_points = self._to_points(block_column_widths[0])
+        else:
+            col_widths_in_points = self._get_source_column_widths(table_sources, source_path, profile, numeric_columns)
+        if len(col_widths_in_points) != len(profile['columns']):
+            logger.error(f"Data inconsistency in table source '{source}'")
+            return current_pos + 50
+
+        header_style = style[0] if style else self.SOURCE_HEADER_STYLE
+        body_style = style[1] if style and len(style) > 1 else self.SOURCE_BODY_STYLE
+
+        header_table = self._create_block_table(
+            0, [[escape(name) for name in profile['columns']]], header_style, col_widths_in_points)
+        y_pos = current_pos
+        if not on_page_break:
+            y_pos = self._place_table(header_table, y_pos, alignment)
+
+        header_pending = True
+        for chunk in table_sources.iter_row_chunks(source_path):
+            rows = [[escape(value) for value in row] for row in chunk]
+            if not on_page_break:
+                table_obj = self._create_block_table(1, rows, body_style, col_widths_in_points, numeric_columns)
+                y_pos = self._place_table(table_obj, y_pos, alignment)
+                continue
+            table_data_as_paragraphs, final_table_style_cmds = self._create_block_rows(
+                1, rows, body_style, numeric_columns)
+            y_pos = self._place_table_with_breaks(
+                table_data_as_paragraphs, final_table_style_cmds, col_widths_in_points,
+                y_pos, alignment, on_page_break,
+                header_table=header_table, header_first=header_pending, repeat_header=repeat_header)
+            header_pending = False
+
+        if header_pending and on_page_break:
+            y_pos = self._place_table(header_table, y_pos, alignment)
+
+        if caption:
+            y_pos = self._add_table_caption(caption, y_pos)
+        return y_pos + 10
+
+    def _create_block_table(self, block_index: int, table_data_raw: list, table_style_raw: list,
+                            col_widths: list, numeric_columns: list = ()) -> Table:
+        """Creates the Table of one block with a Paragraph per cell."""
+        table_data_as_paragraphs, final_table_style_cmds = self._create_block_rows(
+            block_index, table_data_raw, table_style_raw, numeric_columns)
+        table_obj = Table(table_data_as_paragraphs, colWidths=col_widths)
+        table_obj.setStyle(TableStyle(final_table_style_cmds))
+        return table_obj
+
+    def _create_block_rows(self, block_index: int, table_data_raw: list, table_style_raw: list,
+                           numeric_columns: list = ()) -> tuple:
+        """
+        Creates the cell Paragraphs and the style commands of one block.
+
+        Returns:
+            tuple: (rows of Paragraphs, final style commands)
+        """
+        # Create Paragraphs with cell-specific styles
+        cell_grid = self._build_cell_grid(block_index, table_style_raw, table_data_raw)
+        for row_kinds in cell_grid:
+            for c in numeric_columns:
+                if row_kinds[c] == self.BODY_CELL:
+                    row_kinds[c] = self.NUMERIC_CELL
+
+        table_data_as_paragraphs = []
+        for r, row_data in enumerate(table_data_raw):
+            paragraph_row = []
+            for c, cell_text in enumerate(row_data):
+                cell_para_style = self._get_cell_style(cell_grid[r][c])
+                paragraph = Paragraph(cell_text, cell_para_style)
+                paragraph_row.append(paragraph)
+            table_data_as_paragraphs.append(paragraph_row)
+
+        # Get cell-level styles from the JSON
+        final_table_style_cmds = []
+        for cmd_tuple in table_style_raw:
+            cmd, start, end, *rest = cmd_tuple
+            if cmd in ('GRID', 'SPAN', 'BACKGROUND', 'LINEBELOW', 'LINEABOVE', 'LINEBEFORE', 'LINEAFTER', 'VALIGN'):
+                if cmd == 'BACKGROUND':
+                    final_table_style_cmds.append(tuple([cmd, start, end, self.style_manager._parse_color(rest[0])]))
+                elif cmd in ('GRID', 'LINEBELOW', 'LINEABOVE', 'LINEBEFORE', 'LINEAFTER') and len(rest) > 1:
+                    # Line colors go through the style manager too (grayscale in black and white mode)
+                    final_table_style_cmds.append(tuple([cmd, start, end, rest[0], self.style_manager._parse_color(rest[1]), *rest[2:]]))
+                else:
+                    final_table_style_cmds.append(cmd_tuple)
+
+        # Add VALIGN MIDDLE to colored cells
+        for cmd_tuple in table_style_raw:
+            if block_index > 0 and cmd_tuple[0] == 'BACKGROUND' and str(cmd_tuple[3]).lower() not in ['ltgrey', 'grey']:
+                cmd, start, end, *rest = cmd_tuple
+                final_table_style_cmds.append(('VALIGN', start, end, 'MIDDLE'))
+
+        return table_data_as_paragraphs, final_table_style_cmds
+
+    def _get_auto_column_widths(self, data: list, style: list) -> list:
+        """
+        Sizes the columns of every block from the minimum (widest word) and preferred
+        (unwrapped) text widths of its cells. Blocks with the same number of columns
+        share their widths so they line up. Results are cached by table content.
+        """
+        available_width = self.page_size[0] - 2 * self.padding_h
+        cache_key = hashlib.sha256(
+            json.dumps([data, style, available_width], default=str).encode('utf-8')).hexdigest()
+        cached = self._column_width_cache.get(cache_key)
+        if cached:
+            return cached
+
+        # Measure every cell once, grouping the column maxima by column count
+        measured = {}  # column count -> (min widths, preferred widths)
+        for i, table_data_raw in enumerate(data):
+            col_count = max((len(row) for row in table_data_raw), default=0)
+            min_widths, preferred_widths = measured.setdefault(
+                col_count, ([self.CELL_PADDING] * col_count, [self.CELL_PADDING] * col_count))
+            cell_grid = self._build_cell_grid(i, style[i], table_data_raw)
+            spanned_cells = self._get_spanned_cells(style[i], len(table_data_raw), col_count)
+
+            for r, row_data in enumerate(table_data_raw):
+                for c, cell_text in enumerate(row_data):
+                    if (r, c) not in spanned_cells:
+                        self._measure_cell(cell_text, cell_grid[r][c], c, min_widths, preferred_widths)
+
+        solved = {col_count: self._solve_column_widths(min_widths, preferred_widths, available_width)
+                  for col_count, (min_widths, preferred_widths) in measured.items()}
+        widths = [solved[max((len(row) for row in table_data_raw), default=0)] for table_data_raw in data]
+        self._column_width_cache[cache_key] = widths
+        return widths
+
+    def _get_source_column_widths(self, table_sources, source_path: str, profile: dict,
+                                  numeric_columns: list) -> list:
+        """
+        Sizes the columns of a table source with the same solver as inline tables, from the
+        header and the rows streamed once per version of the file. The widths are persisted
+        with the profile of the source, per available width and cell fonts.
+        """
+        available_width = self.page_size[0] - 2 * self.padding_h
+        col_count = len(profile['columns'])
+        body_kinds = [self.NUMERIC_CELL if c in numeric_columns else self.BODY_CELL for c in range(col_count)]
+        cell_styles = [self._get_cell_style(kind) for kind in (self.EMPHASIZED_CELL, *body_kinds)]
+        layout_key = json.dumps([available_width, [(style.fontName, style.fontSize) for style in cell_styles]])
+        cached = table_sources.get_column_widths(source_path, layout_key)
+        if cached:
+            return cached
+
+        min_widths, preferred_widths = [self.CELL_PADDING] * col_count, [self.CELL_PADDING] * col_count
+        for c, name in enumerate(profile['columns']):
+            self._measure_cell(escape(name), self.EMPHASIZED_CELL, c, min_widths, preferred_widths)
+        for chunk in table_sources.iter_row_chunks(source_path):
+            for row in chunk:
+                for c, value in enumerate(row):
+                    self._measure_cell(escape(value), body_kinds[c], c, min_widths, preferred_widths)
+
+        widths = self._solve_column_widths(min_widths, preferred_widths, available_width)
+        table_sources.set_column_widths(source_path, layout_key, widths)
+        return widths
+
+    def _measure_cell(self, cell_text, cell_kind: int, column: int, min_widths: list, preferred_widths: list):
+        """Widens the minimum and preferred width of a column to fit a cell."""
+        cell_style = self._get_cell_style(cell_kind)
+        min_width, preferred_width = measure_text_widths(str(cell_text), cell_style.fontName, cell_style.fontSize)
+        min_widths[column] = max(min_widths[column], min_width + self.CELL_PADDING)
+        preferred_widths[column] = max(preferred_widths[column], preferred_width + self.CELL_PADDING)
+
+    @staticmethod
+    def _solve_column_widths(min_widths: list, preferred_widths: list, available_width: float) -> list:
+        """
+        Distributes the available width in one pass: every column gets its minimum width
+        and the rest is shared in proportion to how much more each column would prefer.
+        Tables narrower than the text width are stretched, too wide ones are scaled down.
+        """
+        total_min, total_preferred = sum(min_widths), sum(preferred_widths)
+        if not min_widths or total_preferred <= 0:
+            return min_widths
+        if total_preferred <= available_width:
+            return [w * available_width / total_preferred for w in preferred_widths]
+        if total_min >= available_width:
+            return [w * available_width / total_min for w in min_widths]
+        extra = (available_width - total_min) / (total_preferred - total_min)
+        return [m + (p - m) * extra for m, p in zip(min_widths, preferred_widths)]
+
+    def _get_spanned_cells(self, style_cmds: list, row_count: int, col_count: int) -> set:
+        """Cells covered by a SPAN over several columns (they do not size a single column)."""
+        spanned = set()
+        for cmd in style_cmds:
+            if cmd[0] != 'SPAN':
+                continue
+            start_col, end_col = self._normalize_cell_range(cmd[1][0], cmd[2][0], col_count)
+            start_row, end_row = self._normalize_cell_range(cmd[1][1], cmd[2][1], row_count)
+            if start_col != end_col:
+                spanned.update((r, c) for r in range(start_row, end_row + 1)
+                               for c in range(start_col, end_col + 1))
+        return spanned
+
+    def _to_points(self, width_specs: list) -> list:
+        """Converts column widths given as percentages of the text width or points to points."""
+        available_width = self.page_size[0] - 2 * self.padding_h
+        return [available_width * (float(p.strip('%')) / 100) if '%' in p else float(p) for p in width_specs]
+
+    def _place_table_with_breaks(self, rows: list, style_cmds: list, col_widths: list,
+                                 current_pos: float, alignment: str, on_page_break,
+                                 header_table: Table = None, header_first: bool = False,
+                                 repeat_header: bool = True) -> float:
+        """
+        Places a table block, splitting it row-wise where the page is full. Rows are
+        measured incrementally, only as far as the current page reaches, and each chunk
+        is placed with the measured heights, so every row is measured once.
+        Rows joined by a SPAN are never separated. The header table is drawn before the
+        first rows if header_first is set and on every continuation page if repeat_header is.
+        """
+        available_width = self.page_size[0] - 2 * self.padding_h
+        row_count = len(rows)
+        row_heights = [None] * row_count
+        blocked_breaks = self._get_blocked_breaks(style_cmds, row_count)
+        header_height = header_table.wrapOn(self.canvas, available_width, 0)[1] if header_table else 0
+
+        start = 0
+        draw_header = header_first
+        fresh_page = False
+        while start < row_count:
+            available_height = self._available_height(current_pos) - (header_height if draw_header else 0)
+            self._measure_rows(rows, style_cmds, col_widths, row_heights, blocked_breaks, start, available_height)
+            end = self._fit_rows(row_heights, start, available_height, blocked_breaks)
+
+            if end == start:
+                if not fresh_page:
+                    logger.debug("Table rows don't fit, performing page break")
+                    current_pos = on_page_break()
+                    draw_header = header_table is not None and repeat_header
+                    fresh_page = True
+                    continue
+                # Taller than a whole page: draw it anyway, like paragraphs that cannot be split
+                end = start + 1
+                while end < row_count and end in blocked_breaks:
+                    end += 1
+
+            if draw_header:
+                current_pos = self._place_table(header_table, current_pos, alignment)
+            chunk = Table(rows[start:end], colWidths=col_widths, rowHeights=row_heights[start:end])
+            chunk.setStyle(TableStyle(self._slice_style_cmds(style_cmds, start, end, row_count)))
+            current_pos = self._place_table(chunk, current_pos, alignment)
+
+            start = end
+            if start < row_count:
+                logger.debug(f"Table continues on next page from row {start}")
+                current_pos = on_page_break()
+                draw_header = header_table is not None and repeat_header
+                fresh_page = True
+
+        return current_pos
+
+    def _measure_rows(self, rows: list, style_cmds: list, col_widths: list, row_heights: list,
+                      blocked_breaks: set, start: int, available_height: float):
+        """
+        Fills in row_heights from start until the rows exceed the available height or the
+        block ends, measuring MEASURE_ROWS rows at a time. Rows are measured in order and a
+        batch never ends inside a SPAN, so each row gets the height it has in the whole block.
+        """
+        available_width = self.page_size[0] - 2 * self.padding_h
+        row_count = len(rows)
+        end, height = start, 0
+        while end < row_count and height <= available_height:
+            if row_heights[end] is None:
+                batch_end = min(end + self.MEASURE_ROWS, row_count)
+                while batch_end < row_count and batch_end in blocked_breaks:
+                    batch_end += 1
+                batch = Table(rows[end:batch_end], colWidths=col_widths)
+                batch.setStyle(TableStyle(self._slice_style_cmds(style_cmds, end, batch_end, row_count)))
+                # Unbounded height: ReportLab stops measuring long tables past the available height
+                batch.wrapOn(self.canvas, available_width, float('inf'))
+                row_heights[end:batch_end] = batch._rowHeights
+            height += row_heights[end]
+            end += 1
+
+    def _available_height(self, current_pos: float, buffer: float = 15) -> float:
+        """Available height on the current page, computed like LayoutService.calculate_available_space."""
+        return (self.page_size[1] - current_pos) - self.padding_v - buffer
+
+    @staticmethod
+    def _fit_rows(row_heights: list, start: int, available_height: float, blocked_breaks: set) -> int:
+        """Returns the end (exclusive) of the longest run of rows from start that fits the height."""
+        end, height, fitted_end = start, 0, start
+        while end < len(row_heights) and height + row_heights[end] <= available_height:
+            height += row_heights[end]
+            end += 1
+            if end not in blocked_breaks:
+                fitted_end = end
+        return fitted_end
+
+    def _get_blocked_breaks(self, style_cmds: list, row_count: int) -> set:
+        """Rows a block must not start with because a SPAN joins them to the previous row."""
+        blocked = set()
+        for cmd in style_cmds:
+            if cmd[0] == 'SPAN':
+                start_row, end_row = self._normalize_cell_range(cmd[1][1], cmd[2][1], row_count)
+                blocked.update(range(start_row + 1, end_row + 1))
+        return blocked
+
+    def _slice_style_cmds(self, style_cmds: list, start: int, end: int, row_count: int) -> list:
+        """Restricts style commands to the rows start..end-1 and renumbers them from 0."""
+        sliced = []
+        for cmd, (start_col, start_row), (end_col, end_row), *rest in style_cmds:
+            start_row, end_row = self._normalize_cell_range(start_row, end_row, row_count)
+            start_row, end_row = max(start_row, start), min(end_row, end - 1)
+            if start_row <= end_row:
+                sliced.append((cmd, (start_col, start_row - start), (end_col, end_row - start), *rest))
+        return sliced
+
+    def _build_cell_grid(self, block_index: int, table_style_raw: list, table_data_raw: list) -> list:
+        """
+        Rasterises the style commands of a block into a grid of cell kinds, so every
+        cell is classified by a single lookup. Cells of the first block are headers,
+        cells under a BACKGROUND other than grey are emphasized.
+        """
+        row_count = len(table_data_raw)
+        col_count = max((len(row) for row in table_data_raw), default=0)
+        if block_index == 0:
+            return [[self.EMPHASIZED_CELL] * col_count for _ in range(row_count)]
+
+        grid = [[self.BODY_CELL] * col_count for _ in range(row_count)]
+        for cmd in table_style_raw:
+            if cmd[0] != 'BACKGROUND' or str(cmd[3]).lower() in ('ltgrey', 'grey'):
+                continue
+            start_col, end_col = self._normalize_cell_range(cmd[1][0], cmd[2][0], col_count)
+            start_row, end_row = self._normalize_cell_range(cmd[1][1], cmd[2][1], row_count)
+            for r in range(start_row, end_row + 1):
+                grid[r][start_col:end_col + 1] = [self.EMPHASIZED_CELL] * (end_col - start_col + 1)
+        return grid
+
+    @staticmethod
+    def _normalize_cell_range(start: int, end: int, size: int) -> tuple[int, int]:
+        """Resolves negative (from the end) indices like ReportLab does and clips to the table."""
+        start = start + size if start < 0 else start
+        end = end + size if end < 0 else end
+        return max(start, 0), min(end, size - 1)
+
+    def _get_cell_style(self, cell_kind: int) -> ParagraphStyle:
+        """Returns the paragraph style of a cell kind, creating it once per builder."""
+        style = self._cell_styles.get(cell_kind)
+        if style is None:
+            style_args = {'fontSize': 9, 'leading': 11}
+            if cell_kind == self.EMPHASIZED_CELL:
+                style_args['fontName'] = 'Helvetica-Bold'
+                style_args['alignment'] = TA_CENTER
+            elif cell_kind == self.NUMERIC_CELL:
+                style_args['alignment'] = TA_RIGHT
+            else:
+                style_args['alignment'] = TA_LEFT
+            style = self.style_manager.prepare_style('paragraph_default', **style_args)
+            self._cell_styles[cell_kind] = style
+        return style
+
     def _place_table(self, table: Table, current_pos: float, alignment: str) -> float:
         """Places a single table object on the canvas and updates the Y position."""
         available_width = self.page_size[0] - 2 * self.padding_h
-        table_width, table_height = table.wrapOn(self.canvas, available_width, 0)
+        table_width, table_height = table.wrapOn(self.canvas, available_width, self.page_size[1])
 
         if alignment == "center":
             x_pos = self.padding_h + (available_width - table_width) / 2
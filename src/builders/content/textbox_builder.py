@@ -3,21 +3,28 @@ from reportlab.lib import colors
 from reportlab.lib.utils import ImageReader
 from reportlab.lib.styles import ParagraphStyle
 from src.logger import logger
+from src.services.content_ir_service import ImageNode, TextBoxNode, TextNode
+from src.services.image_registry_service import ImageRegistryService
+from src.services.layout_cache_service import LayoutCacheService
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY # <-- THIS IMPORT WAS MISSING
 import os
 
 class TextBoxBuilder:
     """Handles customizable text boxes with backgrounds, borders, and mixed content."""
 
-    def __init__(self, canvas, page_size, style_manager, config):
+    def __init__(self, canvas, page_size, style_manager, config, image_registry=None, dry_run=False,
+                 layout_cache=None):
         self.canvas = canvas
         self.page_size = page_size
         self.style_manager = style_manager
         self.config = config
         self.padding_h = config.get("common.padding.horizontal")
         self.images_path = config.get("paths.resources") + "/images"
+        self.image_registry = image_registry or ImageRegistryService()
+        self.dry_run = dry_run
+        self.layout_cache = layout_cache or LayoutCacheService()
 
-    def add_textbox(self, textbox_data: dict, current_pos: float) -> float:
+    def add_textbox(self, textbox_data: TextBoxNode, current_pos: float) -> float:
         """
         Add a customizable text box with mixed content.
         Returns new position after the text box.
@@ -25,32 +32,18 @@ class TextBoxBuilder:
         try:
             self.canvas.saveState()
 
-            box_width = self._calculate_box_width(textbox_data.get('width', '100%'))
-            x_pos = self._calculate_x_position(box_width, textbox_data.get('alignment', 'left'))
-
-            padding = {
-                'top': textbox_data.get('padding_top', 8), 'bottom': textbox_data.get('padding_bottom', 8),
-                'left': textbox_data.get('padding_left', 8), 'right': textbox_data.get('padding_right', 8)
-            }
-
-            content_height, content_elements = self._process_content(
-                textbox_data.get('content', []),
-                box_width - padding['left'] - padding['right'],
-                textbox_data
-            )
-
-            total_height = content_height + padding['top'] + padding['bottom']
-            min_height = textbox_data.get('min_height')
-            if min_height and total_height < min_height: total_height = min_height
+            layout = self.measure_textbox(textbox_data)
+            box_width, padding, total_height = layout['box_width'], layout['padding'], layout['height']
+            x_pos = self._calculate_x_position(box_width, textbox_data.alignment)
 
             box_y = self.page_size[1] - current_pos - total_height
             self._draw_box_frame(x_pos, box_y, box_width, total_height, textbox_data)
 
             content_y_start = box_y + total_height - padding['top']
-            self._draw_content_elements(content_elements, x_pos + padding['left'], content_y_start)
+            self._draw_content_elements(layout['elements'], x_pos + padding['left'], content_y_start)
 
             self.canvas.restoreState()
-            return current_pos + total_height + textbox_data.get('margin_bottom', 5)
+            return current_pos + total_height + textbox_data.margin_bottom
 
         except Exception as e:
             self.canvas.restoreState()
@@ -58,31 +51,49 @@ class TextBoxBuilder:
             return current_pos + 50
 
     # --- NEW METHOD ADDED TO FIX THE ATTRIBUTEERROR ---
-    def estimate_textbox_height(self, textbox_data: dict) -> float:
+    def estimate_textbox_height(self, textbox_data: TextBoxNode) -> float:
         """Estimate textbox height without drawing for page break calculations."""
         try:
-            box_width = self._calculate_box_width(textbox_data.get('width', '100%'))
-            padding = {'top': textbox_data.get('padding_top', 8), 'bottom': textbox_data.get('padding_bottom', 8),
-                       'left': textbox_data.get('padding_left', 8), 'right': textbox_data.get('padding_right', 8)}
-
-            content_width = box_width - padding['left'] - padding['right']
-            content_height, _ = self._process_content(textbox_data.get('content', []), content_width, textbox_data)
-
-            total_height = content_height + padding['top'] + padding['bottom']
-            min_height = textbox_data.get('min_height')
-            if min_height and total_height < min_height: total_height = min_height
-
-            return total_height + textbox_data.get('margin_bottom', 5)
+            return self.measure_textbox(textbox_data)['height'] + textbox_data.margin_bottom
         except Exception as e:
             logger.error(f"Failed to estimate textbox height: {e}")
             return 100 # Return a default fallback height
 
-    def _draw_box_frame(self, x, y, width, height, textbox_data):
-        """Draw the background and border of the text box, with rounded corners support."""
-        bg_color = self._parse_color(textbox_data.get('background_color'))
-        border_color = self._parse_color(textbox_data.get('border_color', 'black'))
-        border_width = textbox_data.get('border_width', 1.0)
-        border_radius = textbox_data.get('border_radius', 0)
+    def measure_textbox(self, textbox_data: TextBoxNode) -> dict:
+        """
+        Returns the measured layout of a textbox, which add_textbox draws directly.
+        Layouts are cached by content and width, so a textbox is measured once per build.
+
+        Returns:
+            dict: {'box_width', 'padding', 'elements' (wrapped content), 'height' (without margin)}
+        """
+        box_width = self._calculate_box_width(textbox_data.width)
+        return self.layout_cache.get_or_create(
+            'textbox', textbox_data, box_width, lambda: self._layout_textbox(textbox_data, box_width))
+
+    def _layout_textbox(self, textbox_data: TextBoxNode, box_width: float) -> dict:
+        padding = {
+            'top': textbox_data.padding_top, 'bottom': textbox_data.padding_bottom,
+            'left': textbox_data.padding_left, 'right': textbox_data.padding_right
+        }
+
+        content_height, content_elements = self._process_content(
+            textbox_data.content,
+            box_width - padding['left'] - padding['right']
+        )
+
+        total_height = content_height + padding['top'] + padding['bottom']
+        min_height = textbox_data.min_height
+        if min_height and total_height < min_height: total_height = min_height
+
+        return {'box_width': box_width, 'padding': padding, 'elements': content_elements, 'height': total_height}
+
+    def _draw_box_frame(self, x, y, width, height, box_data):
+        """Draw the background and border of a text box or speech bubble, with rounded corners support."""
+        bg_color = self._parse_color(box_data.background_color)
+        border_color = self._parse_color(box_data.border_color if box_data.border_color is not None else 'black')
+        border_width = box_data.border_width
+        border_radius = box_data.border_radius
 
         self.canvas.saveState()
         if bg_color:
@@ -95,26 +106,22 @@ class TextBoxBuilder:
             self.canvas.roundRect(x, y, width, height, radius=border_radius, stroke=1, fill=0)
         self.canvas.restoreState()
 
-    def _process_content(self, content_list, content_width, textbox_data):
+    def _process_content(self, content_list, content_width):
         content_elements = []
         total_height = 0
         for item in content_list:
             element = None
-            if isinstance(item, str):
-                element = self._create_text_element(item, content_width, textbox_data)
-            elif isinstance(item, dict):
-                content_type = item.get('type')
-                if content_type == 'text':
-                    element = self._create_text_element(item.get('text', ''), content_width, {**textbox_data, **item})
-                elif content_type == 'image':
-                    element = self._create_image_element(item, content_width)
+            if isinstance(item, TextNode):
+                element = self._create_text_element(item, content_width)
+            elif isinstance(item, ImageNode):
+                element = self._create_image_element(item, content_width)
 
             if element:
                 content_elements.append(element)
                 total_height += element['height'] + 3 # Add spacing
         return total_height, content_elements
 
-    def _create_text_element(self, text: str, width: float, style_data: dict) -> dict:
+    def _create_text_element(self, text_node: TextNode, width: float) -> dict:
         """
         Creates a Paragraph. If text starts with a bullet, it applies special styling
         to make the bullet smaller and properly indented.
@@ -126,16 +133,19 @@ class TextBoxBuilder:
 
         # Override with values from JSON if they exist for the textbox
         style_kwargs = {
-            'fontSize': style_data.get('font_size', base_style.fontSize),
-            'leading': style_data.get('leading', base_style.leading),
-            'alignment': alignment_map.get(style_data.get('text_align', 'left'), base_style.alignment),
-            'textColor': self._parse_color(style_data.get('text_color', 'black')),
-            'fontName': f'{self.config.get("fonts.main")}-{style_data.get("font_weight", "Regular")}'
+            'fontSize': text_node.font_size if text_node.font_size is not None else base_style.fontSize,
+            'leading': text_node.leading if text_node.leading is not None else base_style.leading,
+            'alignment': alignment_map.get(text_node.text_align or 'left', base_style.alignment),
+            'textColor': self._parse_color(text_node.text_color or 'black'),
+            'fontName': f'{self.config.get("fonts.main")}-{text_node.font_weight or "Regular"}'
         }
 
         # This is the final style for the text inside the box
         final_style = self.style_manager.prepare_style('paragraph_default', **style_kwargs)
 
+        # Inline markup is normalised by the compiled content
+        text = text_node.text
+
         # --- NEW LOGIC FOR BULLET HANDLING ---
         if text.strip().startswith('•'):
             # It's a list item. Apply special bullet styling.
@@ -161,10 +171,10 @@ class TextBoxBuilder:
         _, height = paragraph.wrapOn(self.canvas, width, 10000)
         return {'type': 'text', 'object': paragraph, 'height': height}
 
-    def _create_image_element(self, image_data, content_width):
+    def _create_image_element(self, image_data: ImageNode, content_width):
         # This is a simplified image processing, can be expanded
-        img_width = self._calculate_box_width(image_data.get('width', 100))
-        img_height = image_data.get('height', 100)
+        img_width = self._calculate_box_width(image_data.width if image_data.width is not None else 100)
+        img_height = image_data.height if image_data.height is not None else 100
         return {'type': 'image', 'data': image_data, 'height': img_height, 'width': img_width}
 
     def _draw_content_elements(self, elements, x_start, y_start):
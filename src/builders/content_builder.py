@@ -1,5 +1,9 @@
 from src.logger import logger
+from src.services.content_ir_service import (ImageNode, ListItemNode, ParagraphNode, SpeechBubbleNode, TableNode,
+                                             TextBoxNode)
 from src.services.layout_service import LayoutService
+from src.services.image_registry_service import ImageRegistryService
+from src.services.layout_cache_service import LayoutCacheService
 from .content.list_builder import ListBuilder
 from .content.text_builder import TextBuilder
 from .content.image_builder import ImageBuilder
@@ -11,7 +15,8 @@ from .content.speech_bubble_builder import SpeechBubbleBuilder
 class ContentBuilder:
     """Refactored ContentBuilder that delegates to specialized builders."""
 
-    def __init__(self, canvas, page_size, style_manager, config):
+    def __init__(self, canvas, page_size, style_manager, config, image_registry=None, dry_run=False,
+                 layout_cache=None):
         self.canvas = canvas
         self.page_size = page_size
         self.style_manager = style_manager
@@ -20,15 +25,26 @@ class ContentBuilder:
         self.padding_v = config.get("common.padding.vertical")
         self.current_pos = 0.0
         self.page_num = 1
+        self.image_registry = image_registry or ImageRegistryService()
+        self.dry_run = dry_run  # Layout only: images are measured from headers, never decoded
+        if dry_run:
+            self.image_registry.add_layout_canvas(canvas)
+        self.layout_cache = layout_cache or LayoutCacheService()
 
         # Initialize specialized builders
         self.text_builder = TextBuilder(canvas, page_size, style_manager, config)
-        self.image_builder = ImageBuilder(canvas, page_size, style_manager, config)
+        self.image_builder = ImageBuilder(canvas, page_size, style_manager, config,
+                                          image_registry=self.image_registry, dry_run=dry_run)
         self.table_builder = TableBuilder(canvas, page_size, style_manager, config)
         self.layout_builder = LayoutBuilder(canvas, page_size, style_manager, config)
-        self.textbox_builder = TextBoxBuilder(canvas, page_size, style_manager, config)
-        self.speech_bubble_builder = SpeechBubbleBuilder(canvas, page_size, style_manager, config)
-        self.list_builder = ListBuilder(canvas, page_size, style_manager, config)
+        self.textbox_builder = TextBoxBuilder(canvas, page_size, style_manager, config,
+                                              image_registry=self.image_registry, dry_run=dry_run,
+                                              layout_cache=self.layout_cache)
+        self.speech_bubble_builder = SpeechBubbleBuilder(canvas, page_size, style_manager, config,
+                                                         image_registry=self.image_registry, dry_run=dry_run,
+                                                         layout_cache=self.layout_cache)
+        self.list_builder = ListBuilder(canvas, page_size, style_manager, config,
+                                        layout_cache=self.layout_cache)
 
         # Keep layout service for complex operations
         self.layout_service = LayoutService(self, config)
@@ -37,7 +53,12 @@ class ContentBuilder:
     # PUBLIC API - DELEGATE TO SPECIALIZED BUILDERS
     # ==========================================
 
-    def add_list_item(self, item: dict):
+    def add_list(self, items: tuple, on_page_break=None):
+        """Adds a whole (nested) list, breaking pages between items via on_page_break."""
+        self.current_pos = self.list_builder.add_list(items, self.current_pos, on_page_break=on_page_break)
+        return self
+
+    def add_list_item(self, item: ListItemNode):
         """Adds a single list item, used by ChapterBuilder's smart break logic."""
         self.current_pos = self.list_builder.add_list_item(item, self.current_pos)
         return self
@@ -84,12 +105,12 @@ class ContentBuilder:
             data, style, self.current_pos, **kwargs)
         return self
 
-    def add_textbox(self, textbox_data: dict, **kwargs):
+    def add_textbox(self, textbox_data: TextBoxNode, **kwargs):
         """Add customizable text box."""
         self.current_pos = self.textbox_builder.add_textbox(textbox_data, self.current_pos)
         return self
 
-    def add_speech_bubble(self, bubble_data: dict, **kwargs):
+    def add_speech_bubble(self, bubble_data: SpeechBubbleNode, **kwargs):
         """Add speech bubble with avatar and text."""
         self.current_pos = self.speech_bubble_builder.add_speech_bubble(bubble_data, self.current_pos)
         return self
@@ -127,19 +148,19 @@ class ContentBuilder:
     # COMPLEX OPERATIONS - PROCESS CONTENT ITEMS
     # ==========================================
 
-    def add_content_items(self, content_items: list):
-        """Process list of mixed content items."""
+    def add_content_items(self, content_items: tuple):
+        """Process the compiled content nodes of a section."""
         paragraphs = []
 
         for item in content_items:
-            if item.get('type') == 'paragraph':
-                text = item.get('text', '')
+            if isinstance(item, ParagraphNode):
+                text = item.text
                 if text.strip():
                     paragraphs.append(text)
                 else:
                     paragraphs.append("")
 
-            elif item.get('type') == 'speech_bubble':
+            elif isinstance(item, SpeechBubbleNode):
                 # Add pending paragraphs first
                 if paragraphs:
                     self.add_chapter_paragraphs_with_breaks(
@@ -160,7 +181,7 @@ class ContentBuilder:
 
                 self.add_speech_bubble(item)
 
-            elif item.get('type') == 'textbox':
+            elif isinstance(item, TextBoxNode):
                 # Add pending paragraphs first
                 if paragraphs:
                     self.add_chapter_paragraphs_with_breaks(
@@ -181,7 +202,7 @@ class ContentBuilder:
 
                 self.add_textbox(item)
 
-            elif item.get('type') == 'image':
+            elif isinstance(item, ImageNode):
                 # Add pending paragraphs first
                 if paragraphs:
                     self.add_chapter_paragraphs_with_breaks(
@@ -193,9 +214,7 @@ class ContentBuilder:
                     paragraphs = []
 
                 # Check if image fits
-                required_height = self.image_builder.estimate_image_height(
-                    item.get('src'), item.get('width', 300),
-                    item.get('height', 'auto'), item.get('caption'))
+                required_height = self._estimate_image_height_simple(item)
                 available_height = self.layout_service.calculate_available_space(self.current_pos)
 
                 if required_height > available_height:
@@ -203,14 +222,14 @@ class ContentBuilder:
                     self.current_pos = self.padding_v
 
                 self.add_image(
-                    src=item.get('src'),
-                    alignment=item.get('alignment', 'center'),
-                    width=item.get('width', 300),
-                    height=item.get('height', 'auto'),
-                    caption=item.get('caption')
+                    src=item.src,
+                    alignment=item.alignment,
+                    width=item.width if item.width is not None else 300,
+                    height=item.height if item.height is not None else 'auto',
+                    caption=item.caption
                 )
 
-            elif item.get('type') == 'table':
+            elif isinstance(item, TableNode):
                 # Add pending paragraphs first
                 if paragraphs:
                     self.add_chapter_paragraphs_with_breaks(
@@ -222,14 +241,14 @@ class ContentBuilder:
                     paragraphs = []
 
                 self.add_table(
-                    data=item.get('data', []),
-                    style=item.get('style', []),
-                    caption=item.get('caption'),
-                    alignment=item.get('alignment', 'center')
+                    data=item.data,
+                    style=item.style,
+                    caption=item.caption,
+                    alignment=item.alignment
                 )
 
             else:
-                logger.warning(f"Unknown content type: {item.get('type')} - skipping")
+                logger.warning(f"Unsupported content type: {type(item).__name__} - skipping")
 
         # Add remaining paragraphs
         if paragraphs:
@@ -334,11 +353,11 @@ class ContentBuilder:
         """Get available height from current position."""
         return self.layout_service.calculate_available_space(current_pos)
 
-    def _estimate_image_height_simple(self, image_item: dict) -> float:
+    def _estimate_image_height_simple(self, image_item: ImageNode) -> float:
         """Simple image height estimation for page break decisions."""
         return self.image_builder.estimate_image_height(
-            image_item.get('src'),
-            image_item.get('width', 300),
-            image_item.get('height', 'auto'),
-            image_item.get('caption')
+            image_item.src,
+            image_item.width if image_item.width is not None else 300,
+            image_item.height if image_item.height is not None else 'auto',
+            image_item.caption
         )
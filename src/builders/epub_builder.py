@@ -1,14 +1,191 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
 from src.builders.base_builder import BaseBuilder
+from src.logger import logger
+from src.services.content_ir_service import ContentIRService
+from src.services.epub_package_service import EpubPackageService
+from src.services.image_derivative_service import ImageDerivativeService
+from src.services.image_metadata_service import ImageMetadataService
+from src.services.search_index_service import SearchIndexService
+from src.services.table_source_service import TableSourceService
+from src.utils.anchor_utils import generate_anchor_name
+from src.utils.markup_utils import to_xhtml
+from src.utils.page_utils import get_book_name
+from src.utils.xhtml_utils import STYLESHEET, make_document, render_content
+
+def render_chapter(title: str, anchor: str, content: list, color_map: dict, resources_dir: str,
+                   language: str, image_urls: dict = None) -> tuple[str, list]:
+    """
+    Renders a chapter as a complete XHTML document.
+    Module-level so it can be executed in a worker process.
+
+    Returns:
+        (XHTML document, the image sources it references)
+    """
+    body, images = render_content(content, color_map, resources_dir, image_urls)
+    heading = f'<h1 id="{anchor}">{to_xhtml(title, color_map)}</h1>\n' if title else ''
+    return make_document(title, heading + body, language), images
 
+def render_copyright_section(title: str, subtitle: str, copyright_data: dict) -> str:
+    """Same fields as the copyright page of the PDF, with the EPUB ISBN."""
+    author = copyright_data.get('author', '')
+    lines = [
+        f'<p id="copyright"><b>{to_xhtml(title)}: {to_xhtml(subtitle)}</b> by {to_xhtml(author)}</p>',
+        f'<p>{to_xhtml(copyright_data.get("copyright", ""))}</p>',
+        f'<p>{to_xhtml(copyright_data.get("copyright_text", ""))}</p>',
+        '<p>' + '<br/>'.join(to_xhtml(f'{copyright_data.get(f"{key}_text", "")}: {copyright_data.get(key, "")}')
+                             for key in ('author', 'design', 'publish'))
+        + (f'<br/>{to_xhtml(copyright_data["ISBN_epub"])}' if copyright_data.get('ISBN_epub') else '') + '</p>',
+        f'<p>{to_xhtml(copyright_data.get("printing_text", ""))}:<br/>'
+        + '<br/>'.join(to_xhtml(item) for item in copyright_data.get('printing', [])) + '</p>',
+        f'<p>{to_xhtml(copyright_data.get("email_text", ""))}: {to_xhtml(copyright_data.get("email", ""))}</p>',
+    ]
+    return f'<section class="copyright">{"".join(lines)}</section>'
 
 class EpubBuilder(BaseBuilder):
+    """
+    Builds a reflowable EPUB 3 book. Chapters are rendered to XHTML on a process pool and
+    streamed into the container in reading order as they finish, together with the
+    images they reference, so memory use does not grow with the size of the book.
+    Images are packaged as derivatives for the EPUB type (size limit, format, grayscale
+    for e-ink), generated in parallel up front and cached between builds.
+    """
 
-    def __init__(self, json_file, epub_type):
+    def __init__(self, json_file, epub_type, language=None):
         """
         Initialize EpubBuilder with EPUB-specific attributes.
         """
-        super().__init__(json_file, format_type="epub", epub_type=epub_type)
-        # Additional EPUB-specific initialization if needed
+        super().__init__(json_file, epub_type=epub_type, language=language)
+        self.resources_dir = self.config.get("paths.resources")
+        self.images_dir = os.path.join(self.resources_dir, "images")
+        self.workers = self.config.get("images.workers", fallback=os.cpu_count() or 1)
+        self.image_derivatives = ImageDerivativeService(self.config, epub_type)
+        self.search_index = SearchIndexService(self.config, self.resources_dir)
 
     def run(self):
-        print("Running EPUB builder logic...")
+        # Preprocessing shared with the other output formats, done once per content
+        book = ContentIRService.get_instance().compile(self.data_manager, self.language, self.style_manager,
+                                                       self.images_dir)
+        if not book:
+            logger.error(f"No book data found for language '{self.language}'. Aborting.")
+            return
+        book_data = book.get_data()
+
+        title_info = book_data.get("title", {})
+        title = title_info.get("title", "Unknown Title")
+        subtitle = title_info.get("subtitle", "")
+        copyright_data = book_data.get("copyright", {})
+        epub_path = get_book_name(title, subtitle, self.config.get("paths.output_dir"), False, False)
+        epub_path += f"_{self.epub_type}.epub"
+
+        cover_src = f"cover.{self.language}.png"
+        image_urls = self._prepare_images([cover_src, *book.images])
+
+        package = EpubPackageService(epub_path)
+        try:
+            package.open()
+            package.add_stylesheet('style.css', STYLESHEET)
+
+            if self._add_image(package, cover_src, image_urls, cover=True):
+                cover_body = f'<figure><img src="{escape(image_urls[cover_src])}" alt="{escape(title)}"/></figure>'
+                package.add_document('cover', 'cover.xhtml', make_document(title, cover_body, self.language))
+
+            package.add_document('title', 'title.xhtml', self._render_title_page(title, subtitle))
+            if copyright_data:
+                package.add_document('copyright', 'copyright.xhtml',
+                                     self._render_copyright_page(title, subtitle, copyright_data))
+
+            nav_entries = []
+            chapters = [section for section in book.sections if section.key not in ('title', 'copyright')]
+            for section, (xhtml, images) in zip(chapters, self._render_chapters(chapters, image_urls)):
+                file_name = self._get_file_name(section.key)
+                package.add_document(generate_anchor_name(section.key), file_name, xhtml)
+                for src in images:
+                    self._add_image(package, src, image_urls)
+                self.search_index.add_section(section.anchor, section.title,
+                                              [(file_name, section.data.get('content') or ())])
+                if section.title:
+                    nav_entries.append((section.title, file_name))
+
+            package.close({
+                'identifier': copyright_data.get('ISBN_epub') or f"{title} {subtitle}".strip(),
+                'title': f"{title}: {subtitle}" if subtitle else title,
+                'author': copyright_data.get('author')
+            }, nav_entries, self.language)
+        except Exception:
+            package.abort()
+            raise
+        # Sidecar of the book, e.g. for a reading app or the web site serving it
+        self.search_index.write(f"{os.path.splitext(epub_path)[0]}_search")
+        ImageMetadataService.get_instance().save()
+        TableSourceService.get_instance().save()
+        logger.info(f"Successfully created EPUB ({self.epub_type}) with {len(nav_entries)} chapters")
+
+    @staticmethod
+    def _get_file_name(section_key: str) -> str:
+        """'chapters.ch_2' -> 'ch_2.xhtml'"""
+        return f"{generate_anchor_name(section_key.split('.')[-1])}.xhtml"
+
+    def _prepare_images(self, sources: list) -> dict:
+        """
+        Generates the derivatives of every image for the EPUB type on a process pool
+        and returns the image sources mapped to their URLs in the book. Images that cannot
+        be packaged (missing or unsupported) are left out, so the chapters leave them out too.
+        """
+        for src in sources:
+            self.image_derivatives.request(os.path.join(self.images_dir, src))
+        self.image_derivatives.prepare()
+
+        image_urls = {}
+        for src in sources:
+            derivative = self.image_derivatives.resolve(os.path.join(self.images_dir, src))
+            if not EpubPackageService.can_package(derivative):
+                logger.warning(f"Image not found or unsupported, left out of the book: {derivative}")
+                continue
+            # The derivative may have another format than the source; then its extension is appended,
+            # as replacing it would map 'a.png' and 'a.jpg' to the same file
+            extension = os.path.splitext(derivative)[1]
+            image_urls[src] = f"images/{src}" if os.path.splitext(src)[1] == extension else f"images/{src}{extension}"
+        return image_urls
+
+    def _add_image(self, package, src: str, image_urls: dict, cover: bool = False) -> bool:
+        if src not in image_urls:
+            return False
+        source_path = self.image_derivatives.resolve(os.path.join(self.images_dir, src))
+        return package.add_image(source_path, image_urls[src], cover=cover)
+
+    def _render_chapters(self, chapters: list, image_urls: dict):
+        """
+        Yields the rendered sections in order, rendering them on a process pool if configured.
+        At most two chapters per worker are in flight, so rendered chapters waiting for an
+        earlier, slower one do not pile up in memory.
+        """
+        color_map = self.style_manager.get_color_map()
+        jobs = [
+            (section.title, section.anchor, section.data.get('content') or (), color_map, self.resources_dir,
+             self.language, image_urls)
+            for section in chapters
+        ]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                pending = deque()
+                for job in jobs:
+                    pending.append(pool.submit(render_chapter, *job))
+                    if len(pending) >= 2 * self.workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        else:
+            for job in jobs:
+                yield render_chapter(*job)
+
+    def _render_title_page(self, title: str, subtitle: str) -> str:
+        body = (f'<section class="title-page"><h1 id="title">{to_xhtml(title)}</h1>'
+                + (f'<p>{to_xhtml(subtitle)}</p>' if subtitle else '') + '</section>')
+        return make_document(title, body, self.language)
+
+    def _render_copyright_page(self, title: str, subtitle: str, copyright_data: dict) -> str:
+        return make_document('Copyright', render_copyright_section(title, subtitle, copyright_data), self.language)
@@ -11,7 +11,7 @@ class BasePageBuilder(ABC):
 
         Args:
             content_builder (ContentBuilder): The helper object for creating PDF content.
-            data_manager (DataManager): The service for accessing book data.
+            data_manager (BookIR): The compiled content of the book.
             language (str): The language of the content to build.
             config (ConfigService): The application's configuration service.
             page_registry (PageRegistryService): Service for tracking page numbers.
@@ -1,7 +1,7 @@
 from .base_page_builder import BasePageBuilder
 from src.logger import logger
-from src.utils.anchor_utils import generate_anchor_name
-import os
+from src.services.content_ir_service import (ImageNode, ListNode, ParagraphNode, SpeechBubbleNode, TableNode,
+                                             TextBoxNode)
 
 class ChapterBuilder(BasePageBuilder):
     """
@@ -35,26 +35,14 @@ class ChapterBuilder(BasePageBuilder):
         end_page = self.content.page_num - 1  # -1 because we already called new_page()
         chapter_title = chapter_data.get('title', 'Unknown Chapter')
 
-        # Create anchor name
-        anchor = self._get_anchor_name(chapter_data)
-
-        self.register_section(source_path, chapter_title, start_page, end_page, anchor)
-
-    def _get_anchor_name(self, chapter_data: dict) -> str:
-        """
-        Generate anchor name for this chapter.
-        """
-        # Use the title to create a clean anchor
-        title = chapter_data.get('title', 'chapter')
-        # Clean up title for anchor (remove spaces, special chars)
-        return generate_anchor_name(title)
+        self.register_section(source_path, chapter_title, start_page, end_page, chapter_data['anchor'])
 
     def _build_as_simple_chapter(self, chapter_data: dict):
         """Builds a simple chapter with proper anchor and support for images, tables and textboxes."""
         starting_pos = self.config.get("common.padding.vertical")
 
         chapter_title = chapter_data.get("title", "")
-        anchor = self._get_anchor_name(chapter_data)
+        anchor = chapter_data['anchor']
 
         logger.info(f"Building simple chapter: '{chapter_title}' with anchor '{anchor}'")
 
@@ -86,7 +74,7 @@ class ChapterBuilder(BasePageBuilder):
         """Builds a main chapter with title page and support for images, tables and textboxes."""
         starting_pos = self.config.get("defaults.starting_pos")
         chapter_title = chapter_data.get('title', '')
-        anchor = self._get_anchor_name(chapter_data)
+        anchor = chapter_data['anchor']
 
         logger.info(f"Building main chapter: '{chapter_title}' with anchor '{anchor}'")
 
@@ -148,10 +136,10 @@ class ChapterBuilder(BasePageBuilder):
         logger.info(f"Processing {len(content_items)} content items with smart breaks for: {chapter_title}")
 
         for i, item in enumerate(content_items):
-            logger.debug(f"Processing item {i+1}/{len(content_items)}: {item.get('type')}")
+            logger.debug(f"Processing item {i+1}/{len(content_items)}: {type(item).__name__}")
 
-            if item.get('type') == 'paragraph':
-                text = item.get('text', '')
+            if isinstance(item, ParagraphNode):
+                text = item.text
                 logger.debug(f"Paragraph {i+1}: {text[:50]}..." if len(text) > 50 else f"Paragraph {i+1}: {text}")
 
                 if text.strip():
@@ -162,8 +150,8 @@ class ChapterBuilder(BasePageBuilder):
                 else:
                     self.content.add_spacing(10)
 
-            elif item.get('type') == 'speech_bubble':
-                logger.debug(f"Speech Bubble {i+1}: {item.get('text', '')[:30]}...")
+            elif isinstance(item, SpeechBubbleNode):
+                logger.debug(f"Speech Bubble {i+1}: {item.text[:30]}...")
 
                 # Check if speech bubble fits on current page
                 required_height = self.content.speech_bubble_builder.estimate_speech_bubble_height(item)
@@ -177,8 +165,8 @@ class ChapterBuilder(BasePageBuilder):
                 # Add the speech bubble
                 self.content.add_speech_bubble(item)
 
-            elif item.get('type') == 'textbox':
-                logger.debug(f"TextBox {i+1}: {len(item.get('content', []))} content items")
+            elif isinstance(item, TextBoxNode):
+                logger.debug(f"TextBox {i+1}: {len(item.content)} content items")
 
                 # Check if textbox fits on current page
                 required_height = self.content.textbox_builder.estimate_textbox_height(item)
@@ -192,8 +180,8 @@ class ChapterBuilder(BasePageBuilder):
                 # Add the textbox
                 self.content.add_textbox(item)
 
-            elif item.get('type') == 'image':
-                logger.debug(f"Image {i+1}: {item.get('src')}")
+            elif isinstance(item, ImageNode):
+                logger.debug(f"Image {i+1}: {item.src}")
 
                 # Check if image fits on current page
                 required_height = self._estimate_image_height(item)
@@ -206,43 +194,40 @@ class ChapterBuilder(BasePageBuilder):
 
                 # Add the image
                 self.content.add_image(
-                    src=item.get('src'),
-                    alignment=item.get('alignment', 'center'),
-                    width=item.get('width', 300),
-                    height=item.get('height', 'auto'),
-                    caption=item.get('caption')
+                    src=item.src,
+                    alignment=item.alignment,
+                    width=self._image_width(item),
+                    height=self._image_height(item),
+                    caption=item.caption
                 )
-                logger.debug(f"--------> WE ADDED A NEW IMAGE!!!! src: {item.get('src')}, w: {item.get('width', 300)}, h: {item.get('height', 'auto')}")
-            elif item.get('type') == 'table':
-                logger.debug(f"Table {i+1}: data matrix with {len(item.get('data', []))} rows")
+                logger.debug(f"--------> WE ADDED A NEW IMAGE!!!! src: {item.src}, w: {self._image_width(item)}, h: {self._image_height(item)}")
+            elif isinstance(item, TableNode):
+                if item.source:
+                    logger.debug(f"Table {i+1}: streamed from {item.source}")
+                else:
+                    logger.debug(f"Table {i+1}: data matrix with {len(item.data)} rows")
 
                 self.content.add_table(
-                    data=item.get('data', []),
-                    style=item.get('style', []),
-                    caption=item.get('caption'),
-                    alignment=item.get('alignment', 'center'),
-                    block_column_widths=item.get('block_column_widths', None)
+                    data=item.data,
+                    style=item.style,
+                    caption=item.caption,
+                    alignment=item.alignment,
+                    block_column_widths=item.block_column_widths,
+                    repeat_header=item.repeat_header,
+                    source=item.source,
+                    on_page_break=lambda: self._handle_page_break(chapter_title, has_headers_footers)
+                )
+            elif isinstance(item, ListNode):
+                logger.debug(f"List {i+1}: {len(item.items)} top-level items")
+                self.content.add_list(
+                    item.items,
+                    on_page_break=lambda: self._handle_page_break(chapter_title, has_headers_footers)
                 )
-            elif item.get('type') == 'list':
-                logger.debug(f"List {i+1}: Unpacking {len(item.get('items', []))} items for page breaking.")
-                list_items = item.get('items', [])
-                for list_item_data in list_items:
-                    # For each item in the list, perform the estimate -> check -> draw cycle
-                    li_req_height = self.content.list_builder.estimate_list_item_height(list_item_data)
-                    available_height = self.content.layout_service.calculate_available_space(self.content.current_pos)
-                    logger.debug(f"  List item height needed: {li_req_height:.1f}, available: {available_height:.1f}")
-
-                    if li_req_height > available_height:
-                        self._handle_page_break(chapter_title, has_headers_footers)
-
-                    # Draw this single list item
-                    self.content.add_list_item(list_item_data)
-            else:
-                logger.warning(f"Unknown content type: {item.get('type')} - skipping")
 
         logger.info(f"Finished processing all {len(content_items)} content items with smart breaks")
 
-    def _handle_page_break(self, chapter_title: str, has_headers_footers: bool):
+    def _handle_page_break(self, chapter_title: str, has_headers_footers: bool) -> float:
+        """Starts a new page (with footer and header in main chapters) and returns the new position."""
         logger.debug("Item doesn't fit, performing page break")
         if has_headers_footers:
             self.content.add_footer(chapter_title)
@@ -252,6 +237,7 @@ class ChapterBuilder(BasePageBuilder):
         else:
             self.content.new_page()
             self.content.start_from(self.config.get("common.padding.vertical"))
+        return self.content.current_pos
 
     def _add_paragraph_with_simple_breaks(self, text: str, chapter_title: str):
         """
@@ -362,16 +348,24 @@ class ChapterBuilder(BasePageBuilder):
                 par_obj = None
                 logger.debug("Paragraph completed")
 
-    def _estimate_image_height(self, image_item: dict) -> float:
+    @staticmethod
+    def _image_width(image_item: ImageNode):
+        return image_item.width if image_item.width is not None else 300
+
+    @staticmethod
+    def _image_height(image_item: ImageNode):
+        return image_item.height if image_item.height is not None else 'auto'
+
+    def _estimate_image_height(self, image_item: ImageNode) -> float:
         """
         Estimate the height an image will take (including caption).
         This version uses the user's original logic and applies the agreed-upon fix
         for percentage-based height calculation.
         """
-        width = image_item.get('width', 300)
-        height = image_item.get('height', 'auto')
-        caption = image_item.get('caption')
-        src = image_item.get('src')
+        width = self._image_width(image_item)
+        height = self._image_height(image_item)
+        caption = image_item.caption
+        src = image_item.src
 
         # This is from the user's provided 'good' code.
         available_width = self.content.page_size[0] - 2 * self.content.padding_h
@@ -381,19 +375,13 @@ class ChapterBuilder(BasePageBuilder):
         total_page_content_height = self.content.page_size[1] - (2 * self.config.get("common.padding.vertical"))
 
         real_aspect_ratio = 0.75  # Default fallback
-        try:
-            from PIL import Image
-            image_path = os.path.join(self.config.get("paths.resources") + "/images", src)
-            if os.path.exists(image_path):
-                with Image.open(image_path) as img:
-                    original_width, original_height = img.size
-                    if original_width > 0:
-                        real_aspect_ratio = original_height / original_width
-                    logger.debug(f"Image {src}: {original_width}x{original_height}, ratio: {real_aspect_ratio:.3f}")
-            else:
-                logger.warning(f"Image file not found: {image_path}")
-        except Exception as e:
-            logger.warning(f"Could not load image {src}: {e}")
+        if image_item.pixel_size:
+            original_width, original_height = image_item.pixel_size
+            if original_width > 0:
+                real_aspect_ratio = original_height / original_width
+            logger.debug(f"Image {src}: {original_width}x{original_height}, ratio: {real_aspect_ratio:.3f}")
+        else:
+            logger.warning(f"Could not read image metadata: {src}")
 
         # Handle different width/height formats using the user's original logic
         if isinstance(width, str) and width.endswith('%'):
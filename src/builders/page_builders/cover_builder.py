@@ -1,6 +1,5 @@
 from .base_page_builder import BasePageBuilder
 from src.logger import logger
-from reportlab.lib.utils import ImageReader
 import os
 
 class CoverBuilder(BasePageBuilder):
@@ -27,16 +26,21 @@ class CoverBuilder(BasePageBuilder):
                 # Get page dimensions
                 page_width, page_height = self.content.page_size
 
-                # Draw the image to fill the entire page
-                self.content.canvas.drawImage(
-                    ImageReader(image_full_path),
-                    x=0,
-                    y=0,
-                    width=page_width,
-                    height=page_height,
-                    preserveAspectRatio=True,
-                    anchor='c'
-                )
+                # Draw the image to fill the entire page (the dry run only needs the page,
+                # draft builds omit the cover art)
+                image_registry = self.content.image_registry
+                image_registry.record_placement(image_full_path, page_width, page_height)
+                if not self.content.dry_run and not image_registry.placeholders:
+                    image_registry.draw_image(
+                        self.content.canvas,
+                        image_full_path,
+                        x=0,
+                        y=0,
+                        width=page_width,
+                        height=page_height,
+                        preserve_aspect_ratio=True,
+                        anchor='c'
+                    )
 
                 self.content.new_page()
 
@@ -1,19 +1,26 @@
 from src.builders.page_builders.base_page_builder import BasePageBuilder
 from src.logger import logger
-from reportlab.platypus import Table, TableStyle
-from reportlab.platypus.paragraph import Paragraph
+from html import unescape
+from reportlab.lib.fonts import ps2tt, tt2ps
+from src.utils.text_utils import strip_html_tags, string_width
 
 class TOCBuilder(BasePageBuilder):
     """
     Builds Table of Contents with FIXED POSITION approach.
     Uses pre-registered page numbers from PageRegistryService.
     """
+    PAGE_NUMBER_WIDTH = 40
+    ENTRY_SPACING = 3
+    TITLE_SPACING = 30
 
     def __init__(self, content_builder, data_manager, language, config, page_registry):
         super().__init__(content_builder, data_manager, language, config)
         self.page_registry = page_registry
         # Get style_manager from content_builder
         self.style_manager = content_builder.style_manager
+        self._layout_key = None
+        self._layout = []
+        self.linked_anchors = None  # Anchors that can be linked to, None if every section is rendered
 
     def build(self, source_path: str = None, toc_data: dict = None, **options):
         """
@@ -49,9 +56,24 @@ class TOCBuilder(BasePageBuilder):
         # Register TOC itself (it won't appear in its own listing)
         self.register_section('toc', toc_data.get("title", "Table of Contents"), start_page, end_page, 'toc')
 
+    def count_pages(self, toc_entries: list, toc_title: str = "Table of Contents") -> int:
+        """
+        Returns the number of pages the TOC needs for the given entries, without drawing.
+        Used by the page registry to size the TOC reservation.
+        """
+        if not toc_entries:
+            return 1
+        starting_pos = self.config.get("common.padding.vertical")
+        title_height = self.content.text_builder.get_paragraph_height(
+            self._title_markup(toc_title), style_name='title_sub', alignment=1)
+        placements = self._paginate(self._get_layout(toc_entries), starting_pos + title_height + self.TITLE_SPACING)
+        return placements[-1][0] + 1
+
     def _build_fixed_toc(self, toc_data: dict, toc_entries: list):
         """
         Builds TOC with pre-calculated page numbers.
+        All entries are measured in one batch, then drawn directly on the canvas
+        (titles, dot leaders, page numbers and links), continuing on new pages as needed.
         """
         # Start TOC
         starting_pos = self.config.get("common.padding.vertical")
@@ -59,80 +81,24 @@ class TOCBuilder(BasePageBuilder):
 
         # Add TOC title
         toc_title = toc_data.get("title", "Table of Contents")
-        self.content.add_paragraph(f'<a name="toc"/><b>{toc_title}</b>', style_name='title_sub', alignment=1)
-        self.content.add_spacing(30)
+        self.content.add_paragraph(self._title_markup(toc_title), style_name='title_sub', alignment=1)
+        self.content.add_spacing(self.TITLE_SPACING)
 
         logger.info(f"Adding {len(toc_entries)} TOC entries with pre-calculated page numbers")
 
-        # Add each TOC entry
-        for entry in toc_entries:
-            title = entry['title']
-            page = entry['page']
-            anchor = entry['anchor']
-
-            # Create dots for spacing (adjust length based on title)
-            title_length = len(title)
-            dots_count = max(10, 50 - title_length)  # Adaptive dot count
-            dots = ' . ' * (dots_count // 3)
-
-            # TEMPORARY: Skip problematic anchors
-            if anchor in ['tul_a_szabalyokon_az_angol_igeid_k_valos_kihivasai', 'modellezzuk_le_a_valosagot_az_igeid_k_uj_megkozelitese']:
-                # Format without links for problematic anchors
-                if entry.get('is_main_chapter', False):
-                    toc_line = f'&nbsp;&nbsp;&nbsp;&nbsp;<b>{title}</b>{dots}<b>{page}</b>'
-                else:
-                    toc_line = f'{title}{dots}{page}'
-            else:
-                # Format entry based on type - AS HTML STRINGS (like old code)
-                if entry.get('is_main_chapter', False):
-                    # Main chapter - indent and bold
-                    toc_line = f'&nbsp;&nbsp;&nbsp;&nbsp;<b><a href="#{anchor}">{title}</a></b>{dots}<b>{page}</b>'
-                else:
-                    # Regular section
-                    toc_line = f'<a href="#{anchor}">{title}</a>{dots}{page}'
-
-            # Create a table for proper alignment (title left, page number right)
-            from reportlab.platypus import Table, TableStyle
-            from reportlab.platypus.paragraph import Paragraph
-
-            # Left part (title) - ALL ANCHORS ENABLED!
-            if entry.get('is_main_chapter', False):
-                left_part = f'<b><a href="#{anchor}">{title}</a></b>'  # NO INDENT, WITH LINK!
-            else:
-                left_part = f'<a href="#{anchor}">{title}</a>'  # WITH LINK!
+        padding_h = self.config.get("common.padding.horizontal")
+        page_width, page_height = self.content.page_size
+        layout = self._get_layout(toc_entries)
+        placements = self._paginate(layout, self.content.current_pos)
+        canvas = self.content.canvas
 
-            # Right part (page number)
-            if entry.get('is_main_chapter', False):
-                right_part = f'<b>{page}</b>'
-            else:
-                right_part = str(page)
-
-            # Create table row for proper alignment
-            toc_row_data = [
-                [Paragraph(left_part, self.style_manager.get_style('paragraph_default')),
-                 Paragraph(right_part, self.style_manager.prepare_style('paragraph_default', alignment=2))]
-            ]
-
-            # Create table with proper column widths
-            available_width = self.content.page_size[0] - 2 * self.config.get("common.padding.horizontal")
-            toc_table = Table(toc_row_data, colWidths=[available_width - 40, 40])
-
-            # Table style for clean TOC
-            toc_table.setStyle(TableStyle([
-                ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                ('TOPPADDING', (0, 0), (-1, -1), 0),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP')
-            ]))
-
-            # Draw the table
-            width = self.content.page_size[0] - 2 * self.config.get("common.padding.horizontal")
-            w, h = toc_table.wrapOn(self.content.canvas, width, 20)
-            y_pos = self.content.page_size[1] - self.content.current_pos - h
-            toc_table.drawOn(self.content.canvas, self.config.get("common.padding.horizontal"), y_pos)
-
-            self.content.current_pos += h + 3  # Add small spacing between entries
+        current_page = 0
+        for (entry, entry_lines, height), (page, pos) in zip(layout, placements):
+            if page != current_page:
+                self.content.new_page()
+                current_page = page
+            self._draw_entry(canvas, entry, entry_lines, padding_h, page_width - padding_h, page_height - pos)
+            self.content.start_from(pos + height + self.ENTRY_SPACING)
 
         # Add some bottom spacing
         self.content.add_spacing(20)
@@ -142,6 +108,107 @@ class TOCBuilder(BasePageBuilder):
 
         logger.info("TOC content built successfully")
 
+    def _paginate(self, layout: list, first_pos: float) -> list:
+        """Returns the (page index, position) of every measured entry, starting at first_pos."""
+        starting_pos = self.config.get("common.padding.vertical")
+        bottom_limit = self.content.page_size[1] - starting_pos
+        placements = []
+        page, pos = 0, first_pos
+        for _, _, height in layout:
+            if pos + height > bottom_limit:
+                page += 1
+                pos = starting_pos
+            placements.append((page, pos))
+            pos += height + self.ENTRY_SPACING
+        return placements
+
+    def _get_layout(self, toc_entries: list) -> list:
+        """Returns the measured entries, reusing the last layout if the entries have not changed."""
+        key = tuple((entry['title'], entry['page'], entry.get('is_main_chapter', False)) for entry in toc_entries)
+        if key != self._layout_key:
+            padding_h = self.config.get("common.padding.horizontal")
+            self._layout = self._layout_entries(toc_entries, self.content.page_size[0] - 2 * padding_h)
+            self._layout_key = key
+        return self._layout
+
+    @staticmethod
+    def _title_markup(toc_title: str) -> str:
+        return f'<a name="toc"/><b>{toc_title}</b>'
+
+    def _layout_entries(self, toc_entries: list, width: float) -> list:
+        """
+        Measures every entry: wraps its title into the space left of the page number column.
+
+        Returns:
+            list: (entry, [title line, ...], height) tuples.
+        """
+        style = self.style_manager.get_style('paragraph_default')
+        font_size, leading = style.fontSize, style.leading
+        fonts = {False: style.fontName, True: self._get_bold_font(style.fontName)}
+
+        layout = []
+        for entry in toc_entries:
+            is_main_chapter = entry.get('is_main_chapter', False)
+            font_name = fonts[is_main_chapter]
+            title = unescape(strip_html_tags(str(entry['title'])))
+            title_lines = self._wrap_title(title, font_name, font_size, width - self.PAGE_NUMBER_WIDTH)
+            layout.append((entry, title_lines, len(title_lines) * leading))
+        return layout
+
+    def _draw_entry(self, canvas, entry: dict, entry_lines: list, left: float, right: float, top: float):
+        """Draws one measured entry with its dot leader, page number and link to the section."""
+        style = self.style_manager.get_style('paragraph_default')
+        font_size, leading = style.fontSize, style.leading
+        font_name = self._get_bold_font(style.fontName) if entry.get('is_main_chapter', False) else style.fontName
+        page_label = str(entry['page'])
+
+        canvas.setFillColor(style.textColor)
+        canvas.setFont(font_name, font_size)
+        baseline = top - font_size
+        for line in entry_lines:
+            canvas.drawString(left, baseline, line)
+            baseline -= leading
+        baseline += leading
+
+        canvas.drawRightString(right, baseline, page_label)
+
+        # Leader dots (always regular) sit on a grid anchored at the page number column,
+        # so they line up across entries
+        dot_step = string_width('. ', style.fontName, font_size)
+        leader_start = left + string_width(entry_lines[-1], font_name, font_size) + dot_step
+        leader_end = right - self.PAGE_NUMBER_WIDTH
+        dot_count = int((leader_end - leader_start) // dot_step)
+        if dot_count > 0:
+            canvas.setFont(style.fontName, font_size)
+            canvas.drawString(leader_end - dot_count * dot_step, baseline, '. ' * dot_count)
+
+        if entry.get('anchor') and (self.linked_anchors is None or entry['anchor'] in self.linked_anchors):
+            bottom = top - len(entry_lines) * leading
+            canvas.linkRect("", entry['anchor'], (left, bottom, right, top), relative=1)
+
+    @staticmethod
+    def _wrap_title(title: str, font_name: str, font_size: float, width: float) -> list:
+        """Greedy word wrap with cached string widths. Always returns at least one line."""
+        lines = []
+        current = ''
+        for word in title.split():
+            candidate = f"{current} {word}" if current else word
+            if current and string_width(candidate, font_name, font_size) > width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+        return lines
+
+    @staticmethod
+    def _get_bold_font(font_name: str) -> str:
+        """Returns the bold face of a registered font family, or the font itself."""
+        try:
+            return tt2ps(ps2tt(font_name)[0], 1, 0)
+        except (KeyError, ValueError):
+            return font_name
+
     def _build_empty_toc(self, toc_data: dict):
         """
         Builds a minimal TOC when no entries are available.
@@ -150,8 +217,8 @@ class TOCBuilder(BasePageBuilder):
         self.content.start_from(starting_pos)
 
         toc_title = toc_data.get("title", "Table of Contents")
-        self.content.add_paragraph(f'<a name="toc"/><b>{toc_title}</b>', style_name='title_sub', alignment=1)
-        self.content.add_spacing(30)
+        self.content.add_paragraph(self._title_markup(toc_title), style_name='title_sub', alignment=1)
+        self.content.add_spacing(self.TITLE_SPACING)
 
         self.content.add_paragraph("(Content will be available in final version)", style_name='paragraph_default', alignment=1)
 
@@ -162,8 +229,6 @@ class TOCBuilder(BasePageBuilder):
 
     def calculate_actual_pages_used(self) -> int:
         """
-        Calculate how many pages the TOC actually used.
-        This can be called after building to get accurate count.
+        Calculate how many pages the TOC needs for the currently registered entries.
         """
-        # In the fixed approach, we'll always use the reserved space
-        return 2  # Fixed reservation
\ No newline at end of file
+        return self.count_pages(self.page_registry.get_toc_entries())
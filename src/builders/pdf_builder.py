@@ -1,12 +1,19 @@
+import os
 from natsort import natsorted
 from reportlab.lib import colors
 
 from src.builders.base_builder import BaseBuilder
 from src.builders.content_builder import ContentBuilder
-from src.utils.page_utils import make_page
+from src.utils.page_utils import get_book_name, make_page
 from src.logger import logger
 from src.services.page_registry_service import PageRegistryService
-from src.utils.anchor_utils import generate_anchor_name
+from src.services.image_metadata_service import ImageMetadataService
+from src.services.image_derivative_service import ImageDerivativeService
+from src.services.image_registry_service import ImageRegistryService
+from src.services.table_source_service import TableSourceService
+from src.services.layout_cache_service import LayoutCacheService
+from src.services.page_map_service import PageMapService
+from src.services.content_ir_service import ContentIRService
 
 from .page_builders.cover_builder import CoverBuilder
 from .page_builders.title_page_builder import TitlePageBuilder
@@ -20,13 +27,31 @@ class PdfBuilder(BaseBuilder):
     It reads the book's structure implicitly from the data's keys and dispatches
     the building task for each section to a specialized PageBuilder class.
     """
-    def __init__(self, json_file, paper_book, black_and_white, short, language):
+    def __init__(self, json_file, paper_book, black_and_white, short, language, draft=False, sections=None):
         super().__init__(json_file, paper_book=paper_book, black_and_white=black_and_white,
                          short=short, language=language)
+        # Draft previews: image placeholders, no cover art, uncompressed pages, same pagination
+        self.draft = draft
+        # Section keys (e.g. 'chapters.ch_2') to render alone, with their page numbers in the full book
+        self.sections = sections or []
 
         # Initialize page registry for dynamic TOC
         self.page_registry = PageRegistryService()
 
+        # Images are downsampled to the DPI of the output profile (and grayed for black and white).
+        # Draft builds never decode images, so they need no derivatives.
+        # From the arguments, as BaseBuilder does not set its attributes for an invalid builder
+        self.output_profile = 'print' if paper_book else 'screen'
+        self.image_derivatives = None if draft else ImageDerivativeService(
+            self.config, self.output_profile, grayscale=black_and_white)
+
+        # Shared by the dry run and the final pass so every image is decoded only once
+        self.image_registry = ImageRegistryService(self.image_derivatives, placeholders=draft)
+        # ... and every textbox and speech bubble is measured only once
+        self.layout_cache = LayoutCacheService()
+        # The compiled content (BookIR) the page builders read, set when the build runs
+        self.book = None
+
         self._dispatcher = {
             'title': TitlePageBuilder,
             'copyright': CopyrightPageBuilder,
@@ -40,42 +65,121 @@ class PdfBuilder(BaseBuilder):
         Main process with DRY RUN approach for accurate TOC generation.
         
         PHASE 1: DRY RUN - Build everything without TOC to collect page numbers
-        PHASE 2: Generate TOC with accurate page numbers  
+                 (skipped if the page map of the previous build is still valid)
+        PHASE 2: Generate TOC with accurate page numbers and prepare image derivatives
         PHASE 3: REAL RUN - Build final document with correct TOC
         """
-        book_data = self.data_manager.get_data(language=self.language)
-        if not book_data:
+        # Preprocessing shared with the other output formats, done once per content
+        self.book = ContentIRService.get_instance().compile(
+            self.data_manager, self.language, self.style_manager, os.path.join(self.config.get("paths.resources"), "images"))
+        if not self.book:
             logger.error(f"No book data found for language '{self.language}'. Aborting.")
             return
+        book_data = self.book.get_data()
+
+        unknown_sections = set(self.sections) - set(self._get_build_order(book_data))
+        if unknown_sections:
+            logger.error(f"Unknown sections requested: {', '.join(sorted(unknown_sections))}. Aborting.")
+            return
 
         title_info = book_data.get("title", {})
+        book_name_args = (
+            title_info.get("title", "Unknown Title"),
+            title_info.get("subtitle", ""),
+            self.config.get("paths.output_dir"),
+            self.paper_book, self.black_and_white
+        )
+        canvas, pagesize = make_page(*book_name_args, colors.black, self.short, self.draft, self.sections)
+        if self.draft:
+            canvas.setPageCompression(0)
+
+        # The pagination of the previous build is kept in a sidecar next to the PDF of the full book
+        page_map = PageMapService(get_book_name(*book_name_args, self.short, self.draft) + ".pagemap.json",
+                                  self.config.get("paths.resources"), self._get_build_settings())
+        section_hashes = {key: page_map.hash_section(data) for key, data in self._get_sections(book_data)}
+        cached_pagination = page_map.load_page_counts(section_hashes)
 
         # PHASE 1: DRY RUN to collect page numbers
-        logger.info("=== PHASE 1: DRY RUN - Collecting accurate page numbers ===")
-        page_counts = self._dry_run_collect_page_numbers(book_data)
+        if cached_pagination:
+            logger.info("=== PHASE 1: SKIPPED - Content unchanged, reusing the page map ===")
+            page_counts, placements = cached_pagination
+            for image_path, (width_points, height_points) in placements.items():
+                self.image_registry.record_placement(image_path, width_points, height_points)
+        else:
+            logger.info("=== PHASE 1: DRY RUN - Collecting accurate page numbers ===")
+            page_counts = self._dry_run_collect_page_numbers(book_data)
+
+        content_builder = ContentBuilder(canvas, pagesize, self.style_manager, self.config,
+                                         image_registry=self.image_registry, layout_cache=self.layout_cache)
 
         # PHASE 2: Generate TOC with accurate page numbers
         logger.info("=== PHASE 2: Registering sections with REAL page numbers ===")
         self._register_sections_with_real_page_numbers(book_data, page_counts)
 
+        # The TOC size depends on its entries, whose page numbers depend on the TOC size
+        toc_data = book_data.get('toc', {'title': 'Table of Contents'})
+        toc_builder = TOCBuilder(content_builder, self.book, self.language, self.config, self.page_registry)
+        self.page_registry.resolve_toc_pages(
+            lambda entries: toc_builder.count_pages(entries, toc_data.get('title', 'Table of Contents')))
+
+        # A selected section must start on its page of the full book, not on a guessed one
+        try:
+            start_pages = {section_key: self._get_start_page(section_key) for section_key in self.sections}
+        except ValueError as e:
+            logger.error(f"{e}. Aborting.")
+            return
+
+        # Placed image sizes are known after the dry run; only the rendered sections need derivatives
+        if self.image_derivatives:
+            self.image_derivatives.prepare(self._get_image_paths(self.sections) if self.sections else None)
+
         # PHASE 3: REAL RUN with correct TOC
         logger.info("=== PHASE 3: REAL RUN - Building final document ===")
-        canvas, pagesize = make_page(
-            title_info.get("title", "Unknown Title"),
-            title_info.get("subtitle", ""),
-            self.config.get("paths.output_dir"),
-            self.paper_book, self.black_and_white, colors.black, self.short
-        )
-
-        content_builder = ContentBuilder(canvas, pagesize, self.style_manager, self.config)
 
         # Build final document with accurate TOC
-        self._build_final_document(content_builder, book_data)
+        self._build_final_document(content_builder, book_data, toc_builder, start_pages)
 
         canvas.save()
+        placements = self.image_derivatives.placements if self.image_derivatives else {}
+        page_map.save(self.page_registry, page_counts, section_hashes, placements)
+        ImageMetadataService.get_instance().save()
+        TableSourceService.get_instance().save()
+        self.layout_cache.log_stats()
         logger.info("Successfully created PDF with ACCURATE TOC!")
         logger.info(self.page_registry.get_sections_summary())
 
+    def _get_build_order(self, book_data) -> list:
+        """Returns the keys of every section (and the TOC) in the order they appear in the book."""
+        section_keys = [section_key for section_key, _ in self._get_sections(book_data)]
+        # The TOC follows the front matter
+        toc_index = len([key for key in section_keys if key in ('cover', 'title', 'copyright', 'dedicate')])
+        section_keys.insert(toc_index, 'toc')
+        return section_keys
+
+    def _get_sections(self, book_data):
+        """Yields (section key, data) of every section in build order, as keyed in the page counts."""
+        yield 'cover', None
+        for section_key in ['title', 'copyright', 'dedicate', 'preface']:
+            if section_key in book_data:
+                yield section_key, book_data[section_key]
+        if 'chapters' in book_data and book_data['chapters']:
+            chapters_data = book_data['chapters']
+            for chapter_key in natsorted(chapters_data.keys()):
+                yield f'chapters.{chapter_key}', chapters_data[chapter_key]
+
+    def _get_build_settings(self) -> dict:
+        """Everything besides the content that affects pagination."""
+        return {
+            'language': self.language,
+            'paper_book': self.paper_book,
+            'black_and_white': self.black_and_white,
+            'short': self.short,
+            'draft': self.draft,
+            'common': self.config.get("common"),
+            'styles': self.config.get("styles"),
+            'fonts': self.config.get("fonts")
+        }
+
     def _dry_run_collect_page_numbers(self, book_data):
         """
         DRY RUN: Build all content to a temporary canvas to collect accurate page numbers.
@@ -90,14 +194,16 @@ class PdfBuilder(BaseBuilder):
         dry_canvas = temp_canvas.Canvas(temp_buffer, pagesize=letter)
         dry_canvas.setPageSize(portrait(letter))
 
-        dry_content = ContentBuilder(dry_canvas, portrait(letter), self.style_manager, self.config)
+        dry_content = ContentBuilder(dry_canvas, portrait(letter), self.style_manager, self.config,
+                                     image_registry=self.image_registry, dry_run=True,
+                                     layout_cache=self.layout_cache)
 
         page_counts = {}
 
         logger.info("DRY RUN: Building front matter...")
         # Cover (page 1)
         start_page = dry_content.page_num
-        CoverBuilder(dry_content, self.data_manager, self.language, self.config, None).build()
+        CoverBuilder(dry_content, self.book, self.language, self.config, None).build()
         page_counts['cover'] = dry_content.page_num - start_page
 
         # Title and Copyright (pages 2-3)
@@ -115,10 +221,7 @@ class PdfBuilder(BaseBuilder):
             self._build_section_dry_run(ChapterBuilder, dry_content, source_path='dedicate')
             page_counts['dedicate'] = dry_content.page_num - start_page
 
-        # Reserve space for TOC (will be inserted later)
-        toc_pages = 2  # Fixed 2 pages for TOC
-        page_counts['toc'] = toc_pages
-        dry_content.page_num += toc_pages  # Simulate TOC pages
+        # The TOC is sized (and the following sections shifted) once its entries are known
 
         logger.info("DRY RUN: Building main content...")
         # Preface
@@ -138,7 +241,8 @@ class PdfBuilder(BaseBuilder):
         # Close dry run canvas
         dry_canvas.save()
 
-        logger.info(f"DRY RUN completed. Total pages: {dry_content.page_num}")
+        logger.info(f"DRY RUN completed. Total pages: {dry_content.page_num}, "
+                    f"image decodes: {self.image_registry.decode_count}")
         for section, pages in page_counts.items():
             logger.info(f"  {section}: {pages} pages")
 
@@ -150,7 +254,7 @@ class PdfBuilder(BaseBuilder):
         """
         try:
             page_builder = builder_class(
-                content_builder, self.data_manager, self.language, self.config, None  # No page registry
+                content_builder, self.book, self.language, self.config, None  # No page registry
             )
             page_builder.build(source_path=source_path, **options)
             logger.debug(f"DRY RUN: Built section '{source_path or 'N/A'}'")
@@ -163,17 +267,22 @@ class PdfBuilder(BaseBuilder):
         """
         current_page = 1
 
-        # Skip cover, title, copyright (don't appear in TOC)
-        current_page += page_counts.get('cover', 0)
-        current_page += page_counts.get('title', 0)
-        current_page += page_counts.get('copyright', 0)
+        # Cover, title, copyright (don't appear in TOC)
+        front_matter_titles = {'cover': 'Cover', 'title': book_data.get('title', {}).get('title', 'Unknown Title'),
+                               'copyright': 'Copyright'}
+        for section_key, title in front_matter_titles.items():
+            pages = page_counts.get(section_key, 0)
+            if pages:
+                self.page_registry.register_section(section_key, title, current_page, current_page + pages - 1,
+                                                    section_key)
+            current_page += pages
 
         # Dedication
         if 'dedicate' in book_data:
-            dedicate_data = self.data_manager.get_data(self.language, 'dedicate')
+            dedicate_data = self.book.get_data(self.language, 'dedicate')
             if dedicate_data:
                 dedication_pages = page_counts.get('dedicate', 1)
-                anchor = generate_anchor_name(dedicate_data.get('title', 'Dedication'))
+                anchor = self.book.get_section('dedicate').anchor
 
                 start_page = current_page
                 end_page = current_page + dedication_pages - 1
@@ -188,15 +297,16 @@ class PdfBuilder(BaseBuilder):
                 logger.info(f"Registered dedication: pages {start_page} to {end_page} ({dedication_pages} pages)")
                 current_page += dedication_pages
 
-        # TOC takes next 2 pages
-        current_page += page_counts.get('toc', 2)
+        # TOC takes the next pages, the reservation is resolved once all sections are registered
+        self.page_registry.toc_position = current_page
+        current_page += self.page_registry.toc_pages
 
         # Preface - FIXED PAGE CALCULATION
         if 'preface' in book_data:
-            preface_data = self.data_manager.get_data(self.language, 'preface')
+            preface_data = self.book.get_data(self.language, 'preface')
             if preface_data:
                 preface_pages = page_counts.get('preface', 1)
-                anchor = generate_anchor_name(preface_data.get('title', 'Preface'))
+                anchor = self.book.get_section('preface').anchor
 
                 start_page = current_page
                 end_page = current_page + preface_pages - 1
@@ -215,10 +325,10 @@ class PdfBuilder(BaseBuilder):
         if 'chapters' in book_data:
             chapters_data = book_data['chapters']
             for chapter_key in natsorted(chapters_data.keys()):
-                chapter_data = self.data_manager.get_data(self.language, f'chapters.{chapter_key}')
+                chapter_data = self.book.get_data(self.language, f'chapters.{chapter_key}')
                 if chapter_data:
                     chapter_pages = page_counts.get(f'chapters.{chapter_key}', 1)
-                    anchor = generate_anchor_name(chapter_data.get('title', f'Chapter {chapter_key}'))
+                    anchor = self.book.get_section(f'chapters.{chapter_key}').anchor
 
                     start_page = current_page
                     end_page = current_page + chapter_pages - 1
@@ -233,42 +343,72 @@ class PdfBuilder(BaseBuilder):
                     logger.info(f"Registered chapter '{chapter_key}': pages {start_page} to {end_page} ({chapter_pages} pages)")
                     current_page += chapter_pages
 
-    def _build_final_document(self, content_builder, book_data):
+    def _build_final_document(self, content_builder, book_data, toc_builder, start_pages=None):
         """
         Build the final document with accurate TOC.
+        If only some sections are selected, each of them starts on its page of the full book
+        (start_pages, by section key), so footers and TOC references match the full book.
         """
-        # Cover
-        CoverBuilder(content_builder, self.data_manager, self.language, self.config, self.page_registry).build()
-
-        # Title and Copyright
-        for section_key in ['title', 'copyright']:
-            if section_key in book_data:
+        if self.sections:
+            # Only the rendered sections can be link targets
+            toc_builder.linked_anchors = {
+                self.page_registry.get_section(section_key)['anchor']
+                for section_key in self.sections if self.page_registry.get_section(section_key)
+            }
+
+        for section_key in self._get_build_order(book_data):
+            if self.sections:
+                if section_key not in self.sections:
+                    continue
+                content_builder.page_num = start_pages[section_key]
+                logger.info(f"Building selected section '{section_key}' from page {content_builder.page_num}")
+
+            if section_key == 'cover':
+                CoverBuilder(content_builder, self.book, self.language, self.config, self.page_registry).build()
+            elif section_key == 'toc':
+                self._build_toc(content_builder, book_data, toc_builder)
+            elif section_key.startswith('chapters.'):
+                self._build_section(ChapterBuilder, content_builder, source_path=section_key, is_main_chapter=True)
+            else:
                 builder_class = self._dispatcher.get(section_key)
                 if builder_class:
                     self._build_section(builder_class, content_builder, source_path=section_key)
 
-        # Dedication
-        if 'dedicate' in book_data:
-            self._build_section(ChapterBuilder, content_builder, source_path='dedicate')
-
-        # TOC with accurate page numbers
+    def _build_toc(self, content_builder, book_data, toc_builder):
+        """Builds the TOC with accurate page numbers, filling its reservation if it came out shorter."""
         toc_data = book_data.get('toc', {'title': 'Table of Contents'})
-        toc_builder = TOCBuilder(content_builder, self.data_manager, self.language, self.config, self.page_registry)
         toc_builder.build(toc_data=toc_data)
 
-        # Ensure TOC takes exactly 2 pages
-        while (content_builder.page_num - 5) < 2:  # TOC should be on pages 5-6
+        toc_end = self.page_registry.toc_position + self.page_registry.toc_pages
+        if content_builder.page_num > toc_end:
+            logger.warning(f"TOC overflowed its reservation of {self.page_registry.toc_pages} pages")
+        while content_builder.page_num < toc_end:
             content_builder.add_blank_page()
 
-        # Main content
-        if 'preface' in book_data:
-            self._build_section(ChapterBuilder, content_builder, source_path='preface')
+    def _get_start_page(self, section_key: str) -> int:
+        """
+        Returns the page a section starts on in the full book.
 
-        # Main chapters
-        if 'chapters' in book_data and book_data['chapters']:
-            chapters_data = book_data['chapters']
-            for chapter_key in natsorted(chapters_data.keys()):
-                self._build_section(ChapterBuilder, content_builder, source_path=f"chapters.{chapter_key}", is_main_chapter=True)
+        Raises:
+            ValueError: If the section has no pages in the full book
+        """
+        if section_key == 'toc':
+            return self.page_registry.toc_position
+        section = self.page_registry.get_section(section_key)
+        if not section:
+            raise ValueError(f"Section '{section_key}' has no pages in the full book")
+        return section['start_page']
+
+    def _get_image_paths(self, section_keys: list) -> set:
+        """Returns the paths of the images drawn by the given sections."""
+        images_dir = os.path.join(self.config.get("paths.resources"), "images")
+        sources = []
+        for section_key in section_keys:
+            if section_key == 'cover':
+                sources.append(f"cover.{self.language}.png")
+            elif self.book.get_section(section_key):
+                sources.extend(self.book.get_section(section_key).images)
+        return {os.path.join(images_dir, src) for src in sources}
 
     def _build_section(self, builder_class, content_builder, source_path=None, **options):
         """
@@ -277,7 +417,7 @@ class PdfBuilder(BaseBuilder):
         """
         try:
             page_builder = builder_class(
-                content_builder, self.data_manager, self.language, self.config, self.page_registry
+                content_builder, self.book, self.language, self.config, self.page_registry
             )
             page_builder.build(source_path=source_path, **options)
             logger.info(f"Successfully built section from source: '{source_path or 'N/A'}'")
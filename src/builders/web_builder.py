@@ -0,0 +1,252 @@
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
+from src.builders.base_builder import BaseBuilder
+from src.builders.epub_builder import render_copyright_section
+from src.logger import logger
+from src.services.content_ir_service import ContentIRService
+from src.services.image_derivative_service import ImageDerivativeService
+from src.services.image_metadata_service import ImageMetadataService
+from src.services.page_registry_service import PageRegistryService
+from src.services.search_index_service import SearchIndexService
+from src.services.table_source_service import TableSourceService
+from src.utils.anchor_utils import generate_anchor_name
+from src.utils.markup_utils import to_xhtml
+from src.utils.page_utils import get_book_name
+from src.utils.xhtml_utils import WEB_STYLESHEET, make_html_document, render_content
+
+def render_web_chapter(title: str, anchor: str, content: list, color_map: dict, resources_dir: str,
+                       image_urls: dict, max_page_bytes: int) -> list[tuple[str, int]]:
+    """
+    Renders a chapter into page bodies of at most max_page_bytes of HTML each; an item
+    larger than that gets a page of its own. The heading starts the first page.
+    Module-level so it can be executed in a worker process.
+
+    Returns:
+        (page body, the number of content items on the page) for every page
+    """
+    heading = f'<h1 id="{anchor}">{to_xhtml(title, color_map)}</h1>' if title else ''
+    pages = []
+    parts = [heading] if heading else []
+    size = sum(len(part.encode('utf-8')) + 1 for part in parts)  # Each part with the line break after it
+    items_on_page = 0
+    for item in content:
+        html, _ = render_content([item], color_map, resources_dir, image_urls)
+        item_size = len(html.encode('utf-8'))
+        if items_on_page and size + item_size > max_page_bytes:
+            pages.append(('\n'.join(parts), items_on_page))
+            parts, size, items_on_page = [], 0, 0
+        parts.append(html)
+        size += item_size + 1
+        items_on_page += 1
+    pages.append(('\n'.join(parts), items_on_page))
+    return pages
+
+class WebBuilder(BaseBuilder):
+    """
+    Builds a static website: the chapters are split into lightweight HTML pages under
+    a size budget, sharing one stylesheet, with responsive image derivatives that are
+    loaded lazily and an index page generated from the page registry and the anchors.
+    """
+    SIZES = '(max-width: 42em) 100vw, 40em'  # Matches the column width of the stylesheet
+
+    def __init__(self, json_file, epub_type='web', language=None):
+        """
+        Initialize WebBuilder with web-specific attributes.
+        """
+        super().__init__(json_file, epub_type=epub_type, language=language)
+        self.resources_dir = self.config.get("paths.resources")
+        self.images_dir = os.path.join(self.resources_dir, "images")
+        self.workers = self.config.get("images.workers", fallback=os.cpu_count() or 1)
+        self.max_page_bytes = self.config.get("web.max_page_kb", fallback=24) * 1024
+        # One derivative per profile, smallest first, for the srcset of every image
+        self.image_derivatives = [
+            ImageDerivativeService(self.config, profile)
+            for profile in self.config.get("web.image_profiles", fallback=['web'])
+        ]
+        self.page_registry = PageRegistryService()
+        self.search_index = SearchIndexService(self.config, self.resources_dir)
+
+    def run(self):
+        # Preprocessing shared with the other output formats, done once per content
+        book = ContentIRService.get_instance().compile(self.data_manager, self.language, self.style_manager,
+                                                       self.images_dir)
+        if not book:
+            logger.error(f"No book data found for language '{self.language}'. Aborting.")
+            return
+        book_data = book.get_data()
+
+        title_info = book_data.get("title", {})
+        title = title_info.get("title", "Unknown Title")
+        subtitle = title_info.get("subtitle", "")
+        site_dir = get_book_name(title, subtitle, self.config.get("paths.output_dir"), False, False) + "_web"
+        os.makedirs(os.path.join(site_dir, "images"), exist_ok=True)
+
+        cover_src = f"cover.{self.language}.png"
+        image_urls = self._prepare_images([cover_src, *book.images], site_dir)
+
+        with open(os.path.join(site_dir, "style.css"), 'w', encoding='utf-8') as f:
+            f.write(WEB_STYLESHEET)
+
+        # Pages are written once the next one is known, for the links between them
+        file_names = []
+        pending = None
+        chapters = [section for section in book.sections if section.key not in ('title', 'copyright')]
+        for section, pages in zip(chapters, self._render_chapters(chapters, image_urls)):
+            stem = generate_anchor_name(section.key.split('.')[-1])
+            self.page_registry.register_section(section.key, section.title, len(file_names),
+                                                len(file_names) + len(pages) - 1, section.anchor)
+            content = section.data.get('content') or ()
+            indexed_pages = []
+            first_item = 0
+            for index, (body, item_count) in enumerate(pages):
+                file_name = f"{stem}.html" if index == 0 else f"{stem}-{index + 1}.html"
+                if pending:
+                    self._write_page(site_dir, *pending, next_file=file_name)
+                pending = (section.title or title, body, file_names[-1] if file_names else None, file_name)
+                file_names.append(file_name)
+                indexed_pages.append((file_name, content[first_item:first_item + item_count]))
+                first_item += item_count
+            self.search_index.add_section(section.anchor, section.title, indexed_pages)
+        if pending:
+            self._write_page(site_dir, *pending, next_file=None)
+        self.search_index.write(os.path.join(site_dir, "search"))
+
+        index_body = self._render_index(title, subtitle, book_data.get("copyright", {}), image_urls.get(cover_src),
+                                        file_names)
+        with open(os.path.join(site_dir, "index.html"), 'w', encoding='utf-8') as f:
+            f.write(make_html_document(title, index_body, self.language))
+        self._remove_stale_files(site_dir, {*file_names, "index.html"}, suffix='.html')
+
+        ImageMetadataService.get_instance().save()
+        TableSourceService.get_instance().save()
+        logger.info(f"Successfully created website with {len(file_names)} pages in {site_dir}")
+
+    def _prepare_images(self, sources: list, site_dir: str) -> dict:
+        """
+        Generates the derivatives of every image for each web profile, copies them into the
+        site, removing the images of earlier builds, and returns the image sources mapped to
+        their img attributes.
+        """
+        paths = [os.path.join(self.images_dir, src) for src in sources]
+        for image_derivatives in self.image_derivatives:
+            for path in paths:
+                image_derivatives.request(path)
+            image_derivatives.prepare()
+
+        image_metadata = ImageMetadataService.get_instance()
+        image_urls = {}
+        published = set()
+        for src, path in zip(sources, paths):
+            candidates = {}  # width -> (URL, height); profiles that leave an image as it is share one file
+            for image_derivatives in self.image_derivatives:
+                derivative = image_derivatives.resolve(path)
+                size = image_metadata.get_size(derivative)
+                if not size or size[0] in candidates:
+                    continue
+                # As in the EPUB, a derivative of another format keeps the extension of its source,
+                # so 'a.png' and 'a.jpg' do not share files
+                stem, extension = os.path.splitext(src)
+                if extension != os.path.splitext(derivative)[1]:
+                    stem, extension = src, os.path.splitext(derivative)[1]
+                url = f"images/{stem}-{size[0]}w{extension}"
+                self._copy_file(derivative, os.path.join(site_dir, url))
+                published.add(os.path.basename(url))
+                candidates[size[0]] = (url, size[1])
+            if not candidates:
+                logger.warning(f"Image not found or unsupported, not published: {path}")
+                continue
+
+            width = max(candidates)
+            url, height = candidates[width]
+            image_urls[src] = {
+                'src': url,
+                'srcset': ', '.join(f"{candidate_url} {candidate_width}w"
+                                    for candidate_width, (candidate_url, _) in sorted(candidates.items())),
+                'sizes': self.SIZES,
+                'width': width,
+                'height': height,
+                'loading': 'lazy',
+                'decoding': 'async',
+            }
+        self._remove_stale_files(os.path.join(site_dir, "images"), published)
+        return image_urls
+
+    @staticmethod
+    def _remove_stale_files(directory: str, current: set, suffix: str = ''):
+        """
+        Removes the files of earlier builds that this one did not write, e.g. the last pages
+        of a chapter that has become shorter. Only files ending with suffix are considered.
+        """
+        for file_name in os.listdir(directory):
+            path = os.path.join(directory, file_name)
+            if file_name.endswith(suffix) and file_name not in current and os.path.isfile(path):
+                os.remove(path)
+
+    @staticmethod
+    def _copy_file(source_path: str, target_path: str):
+        """Copies a file unless the target is already up to date."""
+        if os.path.exists(target_path):
+            source, target = os.stat(source_path), os.stat(target_path)
+            if source.st_size == target.st_size and source.st_mtime_ns <= target.st_mtime_ns:
+                return
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        shutil.copy2(source_path, target_path)
+
+    def _render_chapters(self, chapters: list, image_urls: dict):
+        """
+        Yields the page bodies of the sections in order, rendering them on a process pool if
+        configured, with at most two chapters per worker in flight (see EpubBuilder).
+        """
+        color_map = self.style_manager.get_color_map()
+        jobs = [
+            (section.title, section.anchor, section.data.get('content') or (), color_map, self.resources_dir,
+             image_urls, self.max_page_bytes)
+            for section in chapters
+        ]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                pending = deque()
+                for job in jobs:
+                    pending.append(pool.submit(render_web_chapter, *job))
+                    if len(pending) >= 2 * self.workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        else:
+            for job in jobs:
+                yield render_web_chapter(*job)
+
+    def _write_page(self, site_dir: str, title: str, body: str, previous_file: str | None, file_name: str,
+                    next_file: str | None):
+        links = [
+            f'<a href="{previous_file}" rel="prev">&#8249;</a>' if previous_file else '<span></span>',
+            '<a href="index.html">&#9776;</a>',
+            f'<a href="{next_file}" rel="next">&#8250;</a>' if next_file else '<span></span>',
+        ]
+        nav = f'<nav class="pages">{"".join(links)}</nav>'
+        with open(os.path.join(site_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write(make_html_document(title, f'{body}\n{nav}', self.language))
+
+    def _render_index(self, title: str, subtitle: str, copyright_data: dict, cover: dict | None,
+                      file_names: list) -> str:
+        """The title page with the cover, the table of contents and the copyright."""
+        parts = []
+        if cover:
+            attributes = ''.join(f' {name}="{escape(str(value))}"' for name, value in cover.items()
+                                 if name not in ('loading', 'decoding'))  # Shown at once
+            parts.append(f'<figure><img{attributes} alt="{escape(title)}"/></figure>')
+        parts.append(f'<section class="title-page"><h1 id="title">{to_xhtml(title)}</h1>'
+                     + (f'<p>{to_xhtml(subtitle)}</p>' if subtitle else '') + '</section>')
+
+        items = ''.join(
+            f'<li><a href="{file_names[entry["page"]]}#{escape(entry["anchor"])}">{to_xhtml(entry["title"])}</a></li>'
+            for entry in self.page_registry.get_toc_entries() if entry['title']
+        )
+        parts.append(f'<nav class="toc"><ol>{items}</ol></nav>')
+        if copyright_data:
+            parts.append(render_copyright_section(title, subtitle, copyright_data))
+        return '\n'.join(parts)
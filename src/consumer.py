@@ -3,9 +3,20 @@ import logging
 
 from src.builders.epub_builder import EpubBuilder
 from src.builders.pdf_builder import PdfBuilder
+from src.builders.web_builder import WebBuilder
 from src.services.config_service import ConfigService
 from src.services.logger_service import LoggerService
 
+FORMATS = ['pdf', 'epub']
+
+def parse_formats(value: str) -> list:
+    """Parses a comma-separated list of output formats, e.g. 'pdf,epub'."""
+    formats = [output_format.strip() for output_format in value.split(',') if output_format.strip()]
+    invalid = [output_format for output_format in formats if output_format not in FORMATS]
+    if not formats or invalid:
+        raise argparse.ArgumentTypeError(
+            f"invalid format(s) {', '.join(invalid) or repr(value)}, choose from {', '.join(FORMATS)}")
+    return list(dict.fromkeys(formats))
 
 def main():
     """
@@ -16,10 +27,10 @@ def main():
     parser = argparse.ArgumentParser(description='Process EPUB or PDF pages.')
 
     parser.add_argument('--format',
-                        type=str,
+                        type=parse_formats,
                         required=True,
-                        choices=['pdf', 'epub'],
-                        help='Specify output format: pdf or epub'
+                        help='Specify output formats: pdf, epub or both (pdf,epub); '
+                             'the content is preprocessed once for all of them'
                         )
     parser.add_argument('--data',
                         type=str,
@@ -51,14 +62,25 @@ def main():
     parser.add_argument('--l',
                         type=str,
                         choices=['en', 'hu'],
-                        help='Language (PDF only)'
+                        help='Language (defaults to the configured language for EPUB)'
+                        )
+    parser.add_argument('--profile',
+                        type=str,
+                        choices=['full', 'draft'],
+                        default='full',
+                        help='Output profile: full fidelity or a fast draft preview with image placeholders (PDF only)'
+                        )
+    parser.add_argument('--sections',
+                        type=str,
+                        help='Comma-separated sections to render alone with their page numbers in the full book, '
+                             'e.g. chapters.ch_2,preface (PDF only)'
                         )
 
     # EPUB-specific arguments
     parser.add_argument('--et',
                         type=str,
                         choices=['kindle', 'epub', 'web'],
-                        help='EPUB type (EPUB only)'
+                        help='EPUB type: kindle, epub or web (a static website) (EPUB only)'
                         )
 
     args = parser.parse_args()
@@ -75,9 +97,9 @@ def main():
         return
 
     json_file = args.data
-    builder = None
+    builders = []
 
-    if args.format == 'pdf':
+    if 'pdf' in args.format:
         if not all([args.pb, args.bw, args.s, args.l]):
             parser.error("PDF format requires --pb, --bw, --s, and --l arguments.")
 
@@ -86,24 +108,30 @@ def main():
         paper_book = args.pb == '1' and not short
         black_and_white = args.bw == '1' and not short
 
-        builder = PdfBuilder(
+        builders.append(PdfBuilder(
             json_file=json_file,
             paper_book=paper_book,
             black_and_white=black_and_white,
             short=short,
-            language=language
-        )
-    elif args.format == 'epub':
+            language=language,
+            draft=args.profile == 'draft',
+            sections=[section.strip() for section in args.sections.split(',') if section.strip()] if args.sections else None
+        ))
+    if 'epub' in args.format:
         if not args.et:
             parser.error("EPUB format requires --et argument.")
 
-        builder = EpubBuilder(
+        # The web type is a static website of lightweight pages rather than an EPUB container
+        epub_builder = WebBuilder if args.et == 'web' else EpubBuilder
+        builders.append(epub_builder(
             json_file=json_file,
-            epub_type=args.et
-        )
+            epub_type=args.et,
+            language=args.l
+        ))
 
-    if builder and builder.valid:
-        builder.run()
+    for builder in builders:
+        if builder.valid:
+            builder.run()
 
 
 if __name__ == "__main__": # pragma: no cover
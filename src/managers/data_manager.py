@@ -1,3 +1,4 @@
+import os
 from src.logger import logger
 from src.services.config_service import ConfigService
 from src.utils.json_utils import get_json_to_data
@@ -6,6 +7,8 @@ from src.schemas import BookData
 
 
 class DataManager:
+    _validated = {}  # (absolute path, mtime, size) -> BookData, shared by the builders of one run
+
     def __init__(self):
         # Get config instance
         self.config = ConfigService.get_instance()
@@ -22,12 +25,20 @@ class DataManager:
             bool: True if data loading and validation was successful
         """
         try:
+            file_key = self._get_file_key(json_file)
+            if file_key in self._validated:
+                self.data = self._validated[file_key]
+                logger.info("Book data reused from an earlier validation of the same file")
+                return True
+
             raw_data = get_json_to_data(json_file)
             if not raw_data:
                 logger.error("JSON loading failed!")
                 return False
 
             self.data = BookData(**raw_data)
+            if file_key:
+                self._validated[file_key] = self.data
             logger.info("Book data loaded and validated successfully")
             return True
 
@@ -38,6 +49,14 @@ class DataManager:
             logger.error(f"Failed to load book data: {e}")
             return False
 
+    @staticmethod
+    def _get_file_key(json_file) -> tuple | None:
+        try:
+            stat = os.stat(json_file)
+        except (OSError, TypeError):
+            return None
+        return os.path.abspath(json_file), stat.st_mtime_ns, stat.st_size
+
     def get_data(self, language=None, node=None):
         lang = language or self.default_language
         book_key = f'book_{lang}'
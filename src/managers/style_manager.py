@@ -1,3 +1,4 @@
+import re
 from copy import deepcopy
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib import colors
@@ -16,13 +17,32 @@ def modify_paragraph_style(style, **kwargs):
             logger.warning(f"'{key}' is not a valid attribute for ParagraphStyle.")
     return new_style
 
+def to_grayscale(color):
+    """
+    Converts a ReportLab color to its gray equivalent using the ITU-R 601 luma
+    weights (the same transform PIL uses for mode 'L'). Transparency is preserved.
+    """
+    luma = 0.299 * color.red + 0.587 * color.green + 0.114 * color.blue
+    return colors.Color(luma, luma, luma, alpha=color.alpha)
+
+def to_grayscale_hex(hex_code: str) -> str:
+    """Converts a '#RRGGBB' color code to its gray equivalent."""
+    gray = to_grayscale(colors.HexColor(hex_code))
+    return '#{0:02X}{0:02X}{0:02X}'.format(round(gray.red * 255))
+
 class StyleManager:
-    def __init__(self):
-        """Initializes the StyleManager."""
+    def __init__(self, black_and_white: bool = False):
+        """
+        Initializes the StyleManager.
+
+        Args:
+            black_and_white (bool): If True, every color is mapped to gray when styles are compiled.
+        """
         self.config = ConfigService.get_instance()
         self.styles = {}
         self.table_styles = {}
         self.font = self.config.get("fonts.main")
+        self.black_and_white = black_and_white
 
         # Centralized color map for consistency
         self.color_map = {
@@ -39,6 +59,14 @@ class StyleManager:
             'white': '#FFFFFF',
             'black': '#000000'
         }
+        if black_and_white:
+            self.color_map = {name: to_grayscale_hex(hex_code) for name, hex_code in self.color_map.items()}
+
+        # One matcher for every color/backColor attribute naming a color of the map
+        color_names = '|'.join(sorted(map(re.escape, self.color_map), key=len, reverse=True))
+        self._color_attribute_pattern = re.compile(
+            rf"\b((?:color|backColor)\s*=\s*)(['\"])({color_names})\2", re.IGNORECASE)
+        self._markup_cache = {}  # raw markup -> normalized markup
 
     def register_styles(self):
         """
@@ -58,6 +86,8 @@ class StyleManager:
                     )
                     if "alignment" in style_props:
                         style.alignment = style_props["alignment"]
+                    if self.black_and_white:
+                        style.textColor = to_grayscale(style.textColor)
                     self.styles[style_name] = style
                 except Exception as e:
                     logger.error(f"Failed to create style '{style_name}': {e}")
@@ -94,8 +124,34 @@ class StyleManager:
         """Returns the central color map."""
         return self.color_map
 
+    def normalize_markup(self, text: str) -> str:
+        """
+        Replaces the color names of color/backColor attributes in inline markup with
+        the hex codes of the central color map in a single pass. Results are cached by text.
+        """
+        text = str(text)
+        normalized = self._markup_cache.get(text)
+        if normalized is None:
+            normalized = self._color_attribute_pattern.sub(self._replace_color_attribute, text)
+            self._markup_cache[text] = normalized
+        return normalized
+
+    def _replace_color_attribute(self, match) -> str:
+        attribute, quote, name = match.groups()
+        return f"{attribute}{quote}{self.color_map[name.lower()]}{quote}"
+
     def _parse_color(self, color_spec: str):
-        """Converts color names or hex codes into ReportLab color objects using the central map."""
+        """
+        Converts color names or hex codes into ReportLab color objects using the central map.
+        In black and white mode the result is always gray.
+        """
+        color = self._resolve_color(color_spec)
+        if self.black_and_white and isinstance(color, colors.Color):
+            return to_grayscale(color)
+        return color
+
+    def _resolve_color(self, color_spec: str):
+        """Looks up a color spec without any black and white transform."""
         if isinstance(color_spec, str):
             if color_spec.startswith('#'):
                 return colors.HexColor(color_spec)
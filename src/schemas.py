@@ -49,13 +49,18 @@ class TableContent(BaseModel):
 
     # These types are updated to expect a list of tables.
     # e.g., data is a list of tables, where each table is a list of rows.
-    data: List[List[List[str]]]
-    style: List[List[List[Any]]] # Using 'Any' for flexibility with style command structure
-    block_column_widths: List[List[str]]
+    data: Optional[List[List[List[str]]]] = None
+    style: Optional[List[List[List[Any]]]] = None # Using 'Any' for flexibility with style command structure
+    block_column_widths: Optional[List[List[str]]] = None # Sized from the cell texts if omitted
+
+    # Alternatively the rows are streamed from a CSV/TSV file under resources/ (first row is the header).
+    # style and block_column_widths are then optional: [header block, body block].
+    source: Optional[str] = None
 
     caption: Optional[str] = None
     alignment: Literal["left", "center", "right"] = "center"
     width: Union[int, str] = "100%"
+    repeat_header: bool = True # Repeat the first block on pages the table continues on
 
     # This is the new validator you requested.
     @model_validator(mode='after')
@@ -64,9 +69,20 @@ class TableContent(BaseModel):
         Ensures that the number of table blocks is consistent across
         data, style, and block_column_widths lists.
         """
+        if self.source is not None:
+            if self.data is not None:
+                raise ValueError("A table takes its rows either from 'data' or from 'source', not both.")
+            if not self.source.lower().endswith(('.csv', '.tsv')):
+                raise ValueError('Only CSV and TSV table sources are supported')
+            return self
+
+        if self.data is None or self.style is None:
+            raise ValueError("A table without 'source' needs 'data' and 'style'.")
+
         len_data = len(self.data)
         len_style = len(self.style)
-        len_widths = len(self.block_column_widths)
+        # Without block_column_widths the columns are sized automatically
+        len_widths = len(self.block_column_widths) if self.block_column_widths is not None else len_data
 
         if not (len_data == len_style == len_widths):
             raise ValueError(
@@ -78,9 +94,8 @@ class TableContent(BaseModel):
 
 class ListItem(BaseModel):
     text: str
-    # A sub_items list can contain simple strings (for 2nd level)
-    # or it could be expanded to contain ListItem objects again for deeper nesting.
-    sub_items: Optional[List[str]] = None
+    # A sub_items list can contain simple strings or ListItem objects again for deeper nesting.
+    sub_items: Optional[List[Union[str, "ListItem"]]] = None
 
 class ListContent(BaseModel):
     type: Literal["list"]
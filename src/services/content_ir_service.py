@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+from typing import NamedTuple
+from natsort import natsorted
+from src.logger import logger
+from src.services.image_metadata_service import ImageMetadataService
+from src.utils.anchor_utils import generate_anchor_name
+
+class Section(NamedTuple):
+    """A compiled section of the book."""
+    key: str  # Dot path in the book data, e.g. 'chapters.ch_2'
+    title: str
+    anchor: str
+    data: dict
+    images: list  # The image sources referenced by the section, once, in order of appearance
+
+# Content nodes. Markup is normalised, optional fields the book data leaves out are None
+# (or the default every output format shares), so each builder applies its own defaults.
+
+class ParagraphNode(NamedTuple):
+    text: str
+
+class ImageNode(NamedTuple):
+    src: str
+    caption: str | None = None
+    alignment: str = 'center'
+    width: int | float | str | None = None  # Pixels or a percentage
+    height: int | float | str | None = None  # Pixels, a percentage or 'auto'
+    pixel_size: tuple | None = None  # Of the image file, None if it is missing
+
+class ListItemNode(NamedTuple):
+    text: str
+    sub_items: tuple = ()
+
+class ListNode(NamedTuple):
+    items: tuple  # ListItemNodes
+
+class TableNode(NamedTuple):
+    data: tuple = ()  # Blocks of rows of cell markup
+    style: tuple = ()  # The style commands of every block
+    caption: str | None = None
+    alignment: str = 'center'
+    block_column_widths: tuple | None = None
+    repeat_header: bool = True
+    source: str | None = None  # CSV/TSV file under the resources directory, instead of data
+
+class TextNode(NamedTuple):
+    """A paragraph of a text box, with the text styles of the box resolved into it."""
+    text: str
+    font_size: float | None = None
+    leading: float | None = None
+    text_align: str | None = None
+    text_color: str | None = None
+    font_weight: str | None = None
+
+class TextBoxNode(NamedTuple):
+    content: tuple  # TextNodes and ImageNodes
+    alignment: str = 'left'
+    width: int | float | str = '100%'
+    background_color: str | None = None
+    border_color: str | None = 'black'
+    border_width: float = 1.0
+    border_radius: float = 0
+    padding_top: float = 8
+    padding_bottom: float = 8
+    padding_left: float = 8
+    padding_right: float = 8
+    min_height: float | None = None
+    margin_bottom: float = 5
+
+class SpeechBubbleNode(NamedTuple):
+    text: str
+    avatar_src: str | None = None
+    avatar_size: float = 80
+    bubble_type: str = 'left'
+    alignment: str = 'left'
+    width: int | float | str = '100%'
+    background_color: str | None = None
+    border_color: str | None = None
+    border_width: float = 1.0
+    border_radius: float = 0
+    padding_top: float = 15
+    padding_bottom: float = 15
+    padding_left: float = 15
+    padding_right: float = 15
+    min_height: float | None = None
+    margin_bottom: float = 5
+    text_size: float = 14
+    text_color: str | None = None
+    text_weight: str = 'Regular'
+
+def _given_fields(node_type, item: dict) -> dict:
+    """The fields of a node type that a content item of the book data sets."""
+    return {name: item[name] for name in node_type._fields if name in item}
+
+def _freeze(value):
+    """Nested lists of the book data (e.g. table style commands) as tuples."""
+    return tuple(_freeze(element) for element in value) if isinstance(value, (list, tuple)) else value
+
+class BookIR:
+    """
+    The compiled content of one language of a book: sections in build order with their
+    anchors, and the content of every section as typed nodes with inline markup resolved
+    and the pixel sizes of images. The page builders read it through get_data.
+    """
+    __slots__ = ('language', 'content_hash', 'data', 'sections', 'images', '_by_key')
+
+    def __init__(self, language: str, content_hash: str, data: dict, sections: list, images: list):
+        self.language = language
+        self.content_hash = content_hash
+        self.data = data
+        self.sections = sections
+        self.images = images  # Every image source referenced by the content, once, in order of appearance
+        self._by_key = {section.key: section for section in sections}
+
+    def get_data(self, language=None, node=None):
+        """Returns the node at a dot path (the whole book if None), like DataManager.get_data."""
+        if node is None:
+            return self.data
+        section = self._by_key.get(node)
+        if section:
+            return section.data
+
+        data = self.data
+        try:
+            for key in node.split('.'):
+                data = data[key]
+            return data
+        except (KeyError, TypeError):
+            logger.warning(f"Node path '{node}' not found in book_{self.language}")
+            return {}
+
+    def get_section(self, key: str) -> Section | None:
+        return self._by_key.get(key)
+
+class ContentIRService:
+    """
+    Singleton service that compiles the book data of a language into a BookIR.
+    The preprocessing shared by every output format is done once per content hash,
+    so a run producing several formats from the same data compiles it only once.
+    """
+    _instance = None
+    SECTION_KEYS = ['title', 'copyright', 'dedicate', 'preface']
+
+    def __init__(self):
+        self._books = {}  # content hash -> BookIR
+
+    @classmethod
+    def get_instance(cls):
+        """Returns the singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def compile(self, data_manager, language: str, style_manager, images_dir: str) -> BookIR | None:
+        """
+        Returns the compiled book of a language, compiling it only if this content,
+        colour map and image directory have not been compiled before.
+        """
+        book_data = data_manager.get_data(language=language)
+        if not book_data:
+            return None
+
+        color_map = style_manager.get_color_map()
+        content_hash = self._hash([language, book_data, color_map, images_dir])
+        book = self._books.get(content_hash)
+        if book is None:
+            book = self._compile(language, content_hash, book_data, style_manager, images_dir)
+            self._books[content_hash] = book
+            logger.info(f"Compiled content of language '{language}': {len(book.sections)} sections")
+        else:
+            logger.info(f"Reusing compiled content of language '{language}'")
+        return book
+
+    def clear(self):
+        """Drops all compiled books (for testing)."""
+        self._books = {}
+
+    def _compile(self, language: str, content_hash: str, book_data: dict, style_manager, images_dir: str) -> BookIR:
+        normalize = style_manager.normalize_markup
+        image_metadata = ImageMetadataService.get_instance()
+        data = dict(book_data)
+        sections = []
+        images = []
+
+        section_keys = [key for key in self.SECTION_KEYS if book_data.get(key)]
+        section_keys += [f'chapters.{key}' for key in natsorted((book_data.get('chapters') or {}).keys())]
+        chapters = dict(book_data.get('chapters') or {})
+        data['chapters'] = chapters
+
+        for key in section_keys:
+            raw_section = chapters[key.split('.', 1)[1]] if key.startswith('chapters.') else book_data[key]
+            section_data = dict(raw_section)
+            section_images = []
+            if key not in ('title', 'copyright'):
+                # Anchors are derived from the raw title, exactly as the links to them
+                section_data['anchor'] = generate_anchor_name(raw_section.get('title', ''))
+            if 'content' in raw_section:
+                content = (self._compile_item(item, normalize, image_metadata, images_dir, section_images)
+                           for item in raw_section.get('content') or [])
+                section_data['content'] = tuple(node for node in content if node is not None)
+            if key.startswith('chapters.'):
+                chapters[key.split('.', 1)[1]] = section_data
+            else:
+                data[key] = section_data
+            section_images = list(dict.fromkeys(src for src in section_images if src))
+            images.extend(section_images)
+            sections.append(Section(key, section_data.get('title', ''), section_data.get('anchor', key), section_data,
+                                    section_images))
+
+        return BookIR(language, content_hash, data, sections, list(dict.fromkeys(src for src in images if src)))
+
+    def _compile_item(self, item: dict, normalize, image_metadata, images_dir: str, images: list):
+        """
+        Returns the node of a content item (None for an unknown type), with the colour names of
+        every markup string resolved, and collects the image sources it references.
+        """
+        item_type = item.get('type')
+        if item_type == 'paragraph':
+            return ParagraphNode(normalize(item.get('text', '')))
+        if item_type == 'image':
+            return self._compile_image(item, normalize, image_metadata, images_dir, images)
+        if item_type == 'list':
+            return ListNode(tuple(self._compile_list_item(list_item, normalize) for list_item in item.get('items', [])))
+        if item_type == 'table':
+            return TableNode(**{
+                **_given_fields(TableNode, item),
+                'data': tuple(tuple(tuple(normalize(cell) for cell in row) for row in block)
+                              for block in item.get('data') or []),
+                'style': _freeze(item.get('style') or ()),
+                'caption': normalize(item['caption']) if item.get('caption') else None,
+                'block_column_widths': _freeze(item.get('block_column_widths')),
+            })
+        if item_type == 'textbox':
+            return self._compile_textbox(item, normalize, image_metadata, images_dir, images)
+        if item_type == 'speech_bubble':
+            if item.get('avatar_src'):
+                images.append(item['avatar_src'])
+            return SpeechBubbleNode(**{**_given_fields(SpeechBubbleNode, item), 'text': normalize(item.get('text', ''))})
+        logger.warning(f"Unknown content type: {item_type} - skipping")
+        return None
+
+    @staticmethod
+    def _compile_image(item: dict, normalize, image_metadata, images_dir: str, images: list) -> ImageNode:
+        src = item.get('src') or ''
+        images.append(src)
+        size = image_metadata.get_size(os.path.join(images_dir, src))
+        return ImageNode(**{
+            **_given_fields(ImageNode, item),
+            'src': src,
+            'caption': normalize(item['caption']) if item.get('caption') else None,
+            'pixel_size': tuple(size) if size else None,
+        })
+
+    def _compile_textbox(self, item: dict, normalize, image_metadata, images_dir: str, images: list) -> TextBoxNode:
+        """Plain strings and text elements become TextNodes that inherit the text styles of the box."""
+        content = item.get('content', [])
+        if isinstance(content, (str, dict)):
+            content = [content]
+        nodes = []
+        for element in content:
+            if isinstance(element, str):
+                element = {'type': 'text', 'text': element}
+            element_type = element.get('type', 'text')
+            if element_type == 'image':
+                nodes.append(self._compile_image(element, normalize, image_metadata, images_dir, images))
+            elif element_type == 'text':
+                styles = {name: element[name] if name in element else item.get(name) for name in TextNode._fields[1:]}
+                nodes.append(TextNode(normalize(element.get('text', '')), **styles))
+        return TextBoxNode(**{**_given_fields(TextBoxNode, item), 'content': tuple(nodes)})
+
+    @staticmethod
+    def _compile_list_item(list_item, normalize) -> ListItemNode:
+        """
+        Builds the node of a list item bottom-up, iteratively, so nesting depth is unlimited.
+        Items can be plain strings or dicts with 'text' and 'sub_items'.
+        """
+        def sub_items_of(raw):
+            return iter(() if isinstance(raw, str) else raw.get('sub_items') or ())
+
+        stack = [(list_item, sub_items_of(list_item), [])]  # (raw item, its raw sub-items, its compiled sub-items)
+        while True:
+            raw, sub_items, compiled = stack[-1]
+            sub_item = next(sub_items, None)
+            if sub_item is not None:
+                stack.append((sub_item, sub_items_of(sub_item), []))
+                continue
+            stack.pop()
+            node = ListItemNode(normalize(raw if isinstance(raw, str) else raw.get('text', '')), tuple(compiled))
+            if not stack:
+                return node
+            stack[-1][2].append(node)
+
+    @staticmethod
+    def _hash(payload) -> str:
+        data = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
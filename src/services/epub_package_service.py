@@ -0,0 +1,143 @@
+import os
+import zipfile
+from datetime import datetime, timezone
+from html import escape
+from src.logger import logger
+
+class EpubPackageService:
+    """
+    Service that streams an EPUB 3 container to disk. Documents are written to the zip
+    as soon as they are rendered and images are copied from disk in chunks, so the book
+    is never held in memory. Already compressed images are stored as they are; the
+    package document and the navigation are written last, from the collected manifest.
+    """
+    MEDIA_TYPES = {
+        '.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg',
+        '.gif': 'image/gif', '.webp': 'image/webp', '.svg': 'image/svg+xml',
+    }
+    # Formats whose data is already compressed; deflating them again only costs time
+    STORED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+    CONTAINER_XML = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+        '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+        '</rootfiles></container>\n'
+    )
+
+    def __init__(self, epub_path: str):
+        """
+        Args:
+            epub_path (str): The path of the EPUB file. It is written to a temporary file
+                             and only replaces an existing book when closed successfully.
+        """
+        self.epub_path = epub_path
+        self.tmp_path = f"{epub_path}.{os.getpid()}.tmp"
+        self._zip = None
+        self._manifest = []  # (id, href, media type, properties)
+        self._spine = []  # (id, linear)
+        self._images = {}  # source path -> href
+
+    def open(self):
+        """Creates the container; the uncompressed 'mimetype' entry must come first."""
+        os.makedirs(os.path.dirname(self.epub_path) or '.', exist_ok=True)
+        self._zip = zipfile.ZipFile(self.tmp_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr('META-INF/container.xml', self.CONTAINER_XML)
+
+    def add_document(self, item_id: str, file_name: str, xhtml: str, linear: bool = True):
+        """Writes an XHTML document and appends it to the reading order."""
+        self._zip.writestr(f'OEBPS/{file_name}', xhtml)
+        self._manifest.append((item_id, file_name, 'application/xhtml+xml', None))
+        self._spine.append((item_id, linear))
+
+    def add_stylesheet(self, file_name: str, css: str):
+        self._zip.writestr(f'OEBPS/{file_name}', css)
+        self._manifest.append((self._make_id(file_name), file_name, 'text/css', None))
+
+    @classmethod
+    def can_package(cls, source_path: str) -> bool:
+        """Whether an image file exists and has a format EPUB reading systems support."""
+        return os.path.splitext(source_path)[1].lower() in cls.MEDIA_TYPES and os.path.isfile(source_path)
+
+    def add_image(self, source_path: str, href: str, cover: bool = False) -> bool:
+        """
+        Copies an image into the container once, however often it is referenced.
+        Returns False if the file is missing or not a supported image format.
+        """
+        if source_path in self._images:
+            return True
+        if not self.can_package(source_path):
+            logger.warning(f"Image not found or unsupported, not packaged: {source_path}")
+            return False
+
+        extension = os.path.splitext(source_path)[1].lower()
+        media_type = self.MEDIA_TYPES[extension]
+        compress_type = zipfile.ZIP_STORED if extension in self.STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+        self._zip.write(source_path, f'OEBPS/{href}', compress_type=compress_type)
+        self._manifest.append((self._make_id(href), href, media_type, 'cover-image' if cover else None))
+        self._images[source_path] = href
+        return True
+
+    def close(self, metadata: dict, nav_entries: list, language: str):
+        """
+        Writes the navigation document and the package document and moves the finished book in place.
+
+        Args:
+            metadata (dict): 'identifier', 'title' and optionally 'author'
+            nav_entries (list): (title, href) tuples of the table of contents
+            language (str): The language code of the book
+        """
+        self._zip.writestr('OEBPS/nav.xhtml', self._make_nav(nav_entries, language))
+        self._manifest.append(('nav', 'nav.xhtml', 'application/xhtml+xml', 'nav'))
+        self._zip.writestr('OEBPS/content.opf', self._make_package(metadata, language))
+        self._zip.close()
+        self._zip = None
+        os.replace(self.tmp_path, self.epub_path)
+        logger.info(f"Packaged {len(self._spine)} documents and {len(self._images)} images into {self.epub_path}")
+
+    def abort(self):
+        """Discards a partially written container."""
+        if self._zip:
+            self._zip.close()
+            self._zip = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def _make_nav(self, nav_entries: list, language: str) -> str:
+        items = ''.join(f'<li><a href="{escape(href)}">{escape(title)}</a></li>' for title, href in nav_entries)
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            f'lang="{language}" xml:lang="{language}">\n'
+            '<head><meta charset="utf-8"/><title>Contents</title></head>\n'
+            f'<body><nav epub:type="toc" id="toc"><ol>{items}</ol></nav></body>\n</html>\n'
+        )
+
+    def _make_package(self, metadata: dict, language: str) -> str:
+        modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        author = f'<dc:creator>{escape(metadata["author"])}</dc:creator>' if metadata.get('author') else ''
+        manifest = ''.join(
+            f'<item id="{item_id}" href="{escape(href)}" media-type="{media_type}"'
+            + (f' properties="{properties}"' if properties else '') + '/>'
+            for item_id, href, media_type, properties in self._manifest
+        )
+        spine = ''.join(
+            f'<itemref idref="{item_id}"' + ('' if linear else ' linear="no"') + '/>'
+            for item_id, linear in self._spine
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:identifier id="book-id">{escape(metadata["identifier"])}</dc:identifier>'
+            f'<dc:title>{escape(metadata["title"])}</dc:title>'
+            f'<dc:language>{language}</dc:language>{author}'
+            f'<meta property="dcterms:modified">{modified}</meta>'
+            f'</metadata><manifest>{manifest}</manifest><spine>{spine}</spine></package>\n'
+        )
+
+    @staticmethod
+    def _make_id(href: str) -> str:
+        """Manifest ids must be XML names: letters, digits, '-', '_' and '.', not starting with a digit."""
+        return 'item-' + ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in href)
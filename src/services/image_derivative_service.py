@@ -0,0 +1,209 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.logger import logger
+from src.services.image_metadata_service import ImageMetadataService
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+def resample_image(source_path: str, target_path: str, target_size: tuple[int, int],
+                   grayscale: bool = False, image_format: str = None, quality: int = None) -> str:
+    """
+    Resamples an image to the target pixel size (and optionally to a single gray channel
+    or another format) and writes it atomically to target_path.
+    Module-level so it can be executed in a worker process.
+
+    Args:
+        image_format (str, optional): 'JPEG' or 'PNG' to convert to; the source format if None.
+        quality (int, optional): The JPEG quality.
+    """
+    with Image.open(source_path) as img:
+        save_options = {}
+        if image_format:
+            save_options = {'optimize': True}
+            if image_format == 'JPEG':
+                save_options['quality'] = quality or 85
+        image_format = image_format or img.format or 'PNG'
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+        if image_format == 'JPEG' and has_alpha:
+            # JPEG has no alpha channel: flatten onto a white page
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, 'white')
+            img.paste(rgba, mask=rgba.getchannel('A'))
+            has_alpha = False
+        if grayscale:
+            img = img.convert('LA' if has_alpha and image_format == 'PNG' else 'L')
+        elif img.mode == 'P':
+            img = img.convert('RGBA')
+        elif image_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if img.size != tuple(target_size):
+            img = img.resize(target_size, Image.LANCZOS)
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        img.save(tmp_path, format=image_format, **save_options)
+    os.replace(tmp_path, target_path)
+    return target_path
+
+class ImageDerivativeService:
+    """
+    Service that downsamples images to the resolution they are actually printed at.
+    Placed sizes are recorded during the dry run, derivatives for the output profile's
+    DPI (and single-channel gray versions for black and white books) are generated on
+    a process pool and cached by source hash, target size, color mode and format.
+    Profiles of reflowable outputs (EPUB targets) limit the pixel size instead of the
+    DPI and may convert to JPEG or PNG.
+    """
+    FORMATS = {'jpeg': 'JPEG', 'png': 'PNG'}
+    EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png'}
+    ALPHA_MODES = ('RGBA', 'LA', 'PA', 'P')
+
+    def __init__(self, config, profile: str, grayscale: bool = False):
+        """
+        Args:
+            config (ConfigService): The application's configuration service.
+            profile (str): The output profile name (e.g. 'screen' or 'print').
+            grayscale (bool): If True, every derivative is converted to grayscale.
+        """
+        self.profile = profile
+        self.grayscale = grayscale or bool(config.get(f"images.profiles.{profile}.grayscale", fallback=False))
+        self.dpi = config.get(f"images.profiles.{profile}.dpi")
+        max_width = config.get(f"images.profiles.{profile}.max_width")
+        max_height = config.get(f"images.profiles.{profile}.max_height")
+        self.max_size = (max_width or max_height, max_height or max_width) if max_width or max_height else None
+        # 'auto' picks PNG for images with transparency and JPEG for the rest
+        self.image_format = config.get(f"images.profiles.{profile}.format")
+        self.quality = config.get(f"images.profiles.{profile}.quality")
+        self.workers = config.get("images.workers", fallback=os.cpu_count() or 1)
+        cache_dir = config.get("paths.cache_dir")
+        self.derivatives_dir = os.path.join(cache_dir, "derivatives") if cache_dir else None
+        self.image_metadata = ImageMetadataService.get_instance()
+        self.placements = {}  # source path -> (max width, max height) in points
+        self.derivatives = {}  # source path -> derivative path
+        self._conversions = set()  # source paths whose derivative only changes the format
+
+    @property
+    def enabled(self) -> bool:
+        """True if derivatives are needed (target DPI, size limit, format or grayscale) and can be cached."""
+        return bool((self.dpi or self.max_size or self.image_format or self.grayscale)
+                    and self.derivatives_dir and PIL_AVAILABLE)
+
+    def record_placement(self, image_path: str, width_points: float, height_points: float):
+        """Records the size an image is drawn at, keeping the largest one per source."""
+        width, height = self.placements.get(image_path, (0, 0))
+        self.placements[image_path] = (max(width, width_points), max(height, height_points))
+
+    def request(self, image_path: str):
+        """Requests a derivative of an image without a placed size (for size-limited profiles)."""
+        self.placements.setdefault(image_path, (0, 0))
+
+    def resolve(self, image_path: str) -> str:
+        """Returns the path of the downsampled derivative, or the source if there is none."""
+        return self.derivatives.get(image_path, image_path)
+
+    def prepare(self, image_paths: set | None = None):
+        """
+        Generates the missing derivatives for every recorded placement.
+        Sources already at or below the target resolution are used as they are.
+
+        Args:
+            image_paths (set | None): Only prepare these images (all placed images if None)
+        """
+        if not self.enabled:
+            logger.info("Image downsampling disabled for this profile")
+            return
+
+        os.makedirs(self.derivatives_dir, exist_ok=True)
+        jobs = []
+        for image_path, (width_points, height_points) in self.placements.items():
+            if image_paths is not None and image_path not in image_paths:
+                continue
+            target = self._plan_derivative(image_path, width_points, height_points)
+            if not target:
+                continue
+            target_path, target_size, image_format = target
+            if os.path.exists(target_path):
+                self._accept(image_path, target_path)
+            else:
+                jobs.append((image_path, target_path, target_size, self.grayscale, image_format, self.quality))
+
+        color_mode = "grayscale" if self.grayscale else "color"
+        resolution = f"{self.dpi} DPI" if self.dpi else "full size"
+        if self.max_size:
+            resolution = f"max {self.max_size[0]}x{self.max_size[1]}"
+        logger.info(f"Image derivatives ({self.profile}, {resolution}, {color_mode}): "
+                    f"{len(self.derivatives)} cached, {len(jobs)} to generate")
+        self._run_jobs(jobs)
+
+    def _plan_derivative(self, image_path: str, width_points: float, height_points: float):
+        """Returns (derivative path, pixel size, format) or None if the source can be used as it is."""
+        metadata = self.image_metadata.get_metadata(image_path)
+        if not metadata:
+            return None
+
+        target_width, target_height = metadata['width'], metadata['height']
+        if self.dpi:
+            scaled_width = math.ceil(width_points * self.dpi / 72)
+            scaled_height = math.ceil(height_points * self.dpi / 72)
+            if scaled_width < target_width and scaled_height < target_height:
+                target_width, target_height = scaled_width, scaled_height
+        if self.max_size:
+            scale = min(self.max_size[0] / target_width, self.max_size[1] / target_height)
+            if scale < 1:
+                target_width = max(1, round(target_width * scale))
+                target_height = max(1, round(target_height * scale))
+
+        extension = os.path.splitext(image_path)[1].lower()
+        image_format = self._get_format(metadata['mode'])
+        converted = image_format and self.EXTENSIONS[image_format] != extension.replace('.jpeg', '.jpg')
+        downsampled = (target_width, target_height) != (metadata['width'], metadata['height'])
+        if not downsampled and not self.grayscale and not converted:
+            return None
+        if converted and not downsampled and not self.grayscale:
+            self._conversions.add(image_path)
+
+        mode_suffix = "_gray" if self.grayscale else ""
+        quality_suffix = f"_q{self.quality or 85}" if image_format == 'JPEG' else ""
+        if image_format:
+            extension = self.EXTENSIONS[image_format]
+        file_name = f"{metadata['hash'][:24]}_{target_width}x{target_height}{mode_suffix}{quality_suffix}{extension}"
+        return os.path.join(self.derivatives_dir, file_name), (target_width, target_height), image_format
+
+    def _get_format(self, mode: str) -> str | None:
+        """Returns the format to convert to, or None to keep the source format."""
+        if self.image_format == 'auto':
+            return 'PNG' if mode in self.ALPHA_MODES else 'JPEG'
+        return self.FORMATS.get(str(self.image_format).lower())
+
+    def _accept(self, source_path: str, target_path: str):
+        """Uses a derivative, unless it only converts the format and came out larger than the source."""
+        if source_path in self._conversions and os.path.getsize(target_path) >= os.path.getsize(source_path):
+            logger.debug(f"Keeping {source_path}, its conversion is not smaller")
+            return
+        self.derivatives[source_path] = target_path
+
+    def _run_jobs(self, jobs: list):
+        """Resamples images on a process pool, falling back to the source on failure."""
+        if not jobs:
+            return
+
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                futures = {pool.submit(resample_image, *job): job for job in jobs}
+                for future, job in futures.items():
+                    self._collect(job, future.result)
+        else:
+            for job in jobs:
+                self._collect(job, lambda: resample_image(*job))
+
+    def _collect(self, job: tuple, get_result):
+        """Stores the result of a resampling job, logging failures."""
+        source_path, target_path, target_size, *_ = job
+        try:
+            self._accept(source_path, get_result())
+            logger.debug(f"Downsampled {source_path} to {target_size[0]}x{target_size[1]}")
+        except Exception as e:
+            logger.warning(f"Could not downsample {source_path}, using the original: {e}")
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from src.logger import logger
+from src.services.config_service import ConfigService
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+class ImageMetadataService:
+    """
+    Singleton service that caches image metadata (pixel size, mode, DPI and content hash).
+    Entries are keyed by absolute path and validated against the file's mtime and size,
+    kept in memory and persisted to a JSON file in the cache directory between builds.
+    """
+    _instance = None
+    CACHE_FILE = "image_metadata.json"
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Args:
+            cache_dir (str, optional): Directory of the persistent cache file.
+                                       If None, metadata is only kept in memory.
+        """
+        self.cache_dir = cache_dir
+        self._entries = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the singleton instance, creating it from the configured cache directory.
+        """
+        if cls._instance is None:
+            cls._instance = cls(ConfigService.get_instance().get("paths.cache_dir"))
+        return cls._instance
+
+    def get_metadata(self, image_path: str) -> dict | None:
+        """
+        Returns the metadata of an image, probing the file only if it is new or has changed.
+
+        Returns:
+            dict: {'width', 'height', 'mode', 'dpi', 'hash', 'mtime', 'size'} or None
+                  if the file is missing or cannot be read.
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+
+        key = os.path.abspath(image_path)
+        entry = self._entries.get(key)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+
+        entry = self._probe(image_path, stat)
+        if entry:
+            self._entries[key] = entry
+            self._dirty = True
+        return entry
+
+    def get_size(self, image_path: str) -> tuple[int, int] | None:
+        """Returns the pixel size (width, height) of an image."""
+        metadata = self.get_metadata(image_path)
+        return (metadata['width'], metadata['height']) if metadata else None
+
+    def get_aspect_ratio(self, image_path: str, fallback: float = 0.75) -> float:
+        """Returns the height / width ratio of an image, or the fallback if unknown."""
+        metadata = self.get_metadata(image_path)
+        if not metadata or metadata['width'] <= 0:
+            return fallback
+        return metadata['height'] / metadata['width']
+
+    def get_hash(self, image_path: str) -> str | None:
+        """Returns the SHA-256 content hash of an image."""
+        metadata = self.get_metadata(image_path)
+        return metadata['hash'] if metadata else None
+
+    def save(self):
+        """Persists the in-memory entries to the cache file if anything changed."""
+        if not self.cache_dir or not self._dirty:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, self.CACHE_FILE), 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            self._dirty = False
+            logger.debug(f"Saved metadata of {len(self._entries)} images to cache")
+        except OSError as e:
+            logger.warning(f"Could not save image metadata cache: {e}")
+
+    def clear(self):
+        """Clear all cached entries (for testing)."""
+        self._entries = {}
+        self._dirty = False
+
+    def _load(self):
+        """Loads previously persisted entries, ignoring a missing or corrupt cache file."""
+        if not self.cache_dir:
+            return
+        cache_file = os.path.join(self.cache_dir, self.CACHE_FILE)
+        if not os.path.exists(cache_file):
+            return
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+            logger.debug(f"Loaded metadata of {len(self._entries)} images from cache")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable image metadata cache: {e}")
+            self._entries = {}
+
+    def _probe(self, image_path: str, stat: os.stat_result) -> dict | None:
+        """
+        Reads size, mode and DPI from the image header (PIL does not decode pixel data
+        on open) and hashes the file contents.
+        """
+        if not PIL_AVAILABLE:
+            logger.warning(f"PIL not available, cannot read metadata of: {image_path}")
+            return None
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                mode = img.mode
+                dpi = img.info.get('dpi')
+        except Exception as e:
+            logger.warning(f"Could not read image metadata of {image_path}: {e}")
+            return None
+
+        return {
+            'width': width,
+            'height': height,
+            'mode': mode,
+            'dpi': [float(d) for d in dpi] if dpi else None,
+            'hash': self._hash_file(image_path),
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+
+    @staticmethod
+    def _hash_file(image_path: str) -> str:
+        """Computes the SHA-256 hash of a file in fixed-size chunks."""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
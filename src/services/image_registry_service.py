@@ -0,0 +1,119 @@
+import hashlib
+import weakref
+from reportlab.lib import colors
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.lib.utils import ImageReader
+from src.logger import logger
+from src.services.image_metadata_service import ImageMetadataService
+
+class ImageRegistryService:
+    """
+    Per-document registry that decodes every image file once and embeds it once per
+    canvas as a named form XObject. Later draws only reference the form, so repeated
+    images (e.g. speech bubble avatars) cost neither a decode nor a second embed.
+    The registry is shared by the dry run and the final pass of a build.
+    """
+    PLACEHOLDER_FILL = colors.HexColor('#EEEEEE')
+    PLACEHOLDER_STROKE = colors.HexColor('#808080')
+
+    def __init__(self, image_derivatives=None, placeholders: bool = False):
+        """
+        Args:
+            image_derivatives (ImageDerivativeService, optional): Resolves sources to
+                                                                  their downsampled derivatives.
+            placeholders (bool): If True (draft builds), images are drawn as placeholder
+                                 boxes of the same size and never decoded.
+        """
+        self.image_derivatives = image_derivatives
+        self.placeholders = placeholders
+        self.image_metadata = ImageMetadataService.get_instance()
+        self._readers = {}  # image path -> ImageReader (decoded at most once)
+        self._forms = weakref.WeakKeyDictionary()  # canvas -> {image path: form name}
+        self._layout_canvases = weakref.WeakSet()  # dry run canvases: nothing is drawn on them
+        self.decode_count = 0
+
+    def add_layout_canvas(self, canvas):
+        """Marks a canvas as layout only (dry run): images drawn on it are skipped, never decoded."""
+        self._layout_canvases.add(canvas)
+
+    def record_placement(self, image_path: str, width_points: float, height_points: float):
+        """Forwards the placed size of an image to the derivative service, if any."""
+        if self.image_derivatives:
+            self.image_derivatives.record_placement(image_path, width_points, height_points)
+
+    def resolve(self, image_path: str) -> str:
+        """Returns the file that should actually be drawn for a source image."""
+        return self.image_derivatives.resolve(image_path) if self.image_derivatives else image_path
+
+    def get_reader(self, image_path: str) -> ImageReader:
+        """Returns the shared ImageReader of a file, creating it on first use."""
+        reader = self._readers.get(image_path)
+        if reader is None:
+            reader = ImageReader(image_path)
+            self._readers[image_path] = reader
+            self.decode_count += 1
+            logger.debug(f"Image registry: loaded {image_path}")
+        return reader
+
+    def draw_image(self, canvas, image_path: str, x: float, y: float, width: float, height: float,
+                   preserve_aspect_ratio: bool = False, anchor: str = 'c'):
+        """
+        Draws an image into the given box, embedding it into the canvas' document on first use.
+        """
+        if canvas in self._layout_canvases:
+            return
+
+        draw_path = self.resolve(image_path)
+
+        if preserve_aspect_ratio:
+            image_size = self.image_metadata.get_size(draw_path)
+            if image_size:
+                x, y, width, height, _ = aspectRatioFix(True, anchor, x, y, width, height, *image_size)
+
+        if self.placeholders:
+            self._draw_placeholder(canvas, x, y, width, height)
+            return
+
+        form_name = self._get_form_name(canvas, draw_path)
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.scale(width, height)
+        canvas.doForm(form_name)
+        canvas.restoreState()
+
+    def _draw_placeholder(self, canvas, x: float, y: float, width: float, height: float):
+        """Draws a crossed box in place of an image."""
+        canvas.saveState()
+        canvas.setFillColor(self.PLACEHOLDER_FILL)
+        canvas.setStrokeColor(self.PLACEHOLDER_STROKE)
+        canvas.setLineWidth(0.5)
+        canvas.rect(x, y, width, height, stroke=1, fill=1)
+        canvas.line(x, y, x + width, y + height)
+        canvas.line(x, y + height, x + width, y)
+        canvas.restoreState()
+
+    def clear(self):
+        """Drops all decoded images and form references."""
+        self._readers = {}
+        self._forms = weakref.WeakKeyDictionary()
+
+    def _get_form_name(self, canvas, image_path: str) -> str:
+        """Returns the form XObject name of an image, embedding it as a unit-square form if needed."""
+        canvas_forms = self._forms.setdefault(canvas, {})
+        form_name = canvas_forms.get(image_path)
+        if form_name:
+            return form_name
+
+        content_hash = self.image_metadata.get_hash(image_path)
+        if not content_hash:
+            content_hash = hashlib.sha256(image_path.encode('utf-8')).hexdigest()
+        form_name = f"img_{content_hash[:24]}"
+
+        # Identical files under different paths share one form
+        if form_name not in canvas_forms.values():
+            canvas.beginForm(form_name)
+            canvas.drawImage(self.get_reader(image_path), 0, 0, width=1, height=1)
+            canvas.endForm()
+
+        canvas_forms[image_path] = form_name
+        return form_name
@@ -0,0 +1,51 @@
+import hashlib
+import json
+from src.logger import logger
+
+class LayoutCacheService:
+    """
+    Per-build cache of measured layouts (wrapped flowables and their heights).
+    Entries are keyed by a content hash of the item and the width it is laid out in,
+    so the estimate and the draw of an item, in the dry run and in the final pass,
+    all share a single measurement.
+    """
+
+    def __init__(self):
+        self._layouts = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(kind: str, data, width: float) -> str:
+        """Returns the content hash of an item laid out in the given width."""
+        payload = json.dumps([kind, data, round(width, 3)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_or_create(self, kind: str, data, width: float, factory):
+        """
+        Returns the cached layout of an item, creating it with factory() on first use.
+
+        Args:
+            kind (str): The type of the item (e.g. 'textbox'), part of the key.
+            data: The JSON data of the item.
+            width (float): The width the item is laid out in.
+            factory (callable): Measures the item and returns its layout.
+        """
+        key = self.make_key(kind, data, width)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = factory()
+            self._layouts[key] = layout
+            self.misses += 1
+        else:
+            self.hits += 1
+        return layout
+
+    def log_stats(self):
+        logger.info(f"Layout cache: {self.misses} layouts measured, {self.hits} reused")
+
+    def clear(self):
+        """Drops all cached layouts."""
+        self._layouts = {}
+        self.hits = 0
+        self.misses = 0
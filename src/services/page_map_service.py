@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+from src.logger import logger
+from src.services.image_metadata_service import ImageMetadataService
+
+class PageMapService:
+    """
+    Service that persists the pagination of a build as a JSON sidecar next to the PDF:
+    the page count and content hash of every section, the registered page ranges and
+    anchors, and the placed image sizes. When the next build has the same settings and
+    content hashes, its pagination is reused and the dry run is skipped.
+    """
+    VERSION = 1
+    IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+    SOURCE_EXTENSIONS = ('.csv', '.tsv')
+
+    def __init__(self, pagemap_path: str, resources_dir: str, build_settings: dict):
+        """
+        Args:
+            pagemap_path (str): The path of the sidecar file.
+            resources_dir (str): The resources directory, for the files referenced by the content.
+            build_settings (dict): Everything besides the content that affects pagination
+                                   (flags, styles, paddings); part of every hash.
+        """
+        self.pagemap_path = pagemap_path
+        self.resources_dir = resources_dir
+        self.build_hash = self._hash(['build', self.VERSION, build_settings])
+        self.image_metadata = ImageMetadataService.get_instance()
+
+    def hash_section(self, data) -> str:
+        """
+        Returns the content hash of a section: its data and the sizes of the images
+        and table sources it references.
+        """
+        return self._hash([self.build_hash, data, self._get_file_fingerprints(data)])
+
+    def load_page_counts(self, section_hashes: dict) -> tuple[dict, dict] | None:
+        """
+        Returns the (page counts, image placements) of the previous build if it had the same
+        settings and exactly the same sections and content hashes, otherwise None.
+        """
+        pagemap = self._load()
+        if not pagemap or pagemap.get('build_hash') != self.build_hash:
+            return None
+
+        sections = pagemap.get('page_counts', {})
+        if list(sections) != list(section_hashes):
+            return None
+        for key, section_hash in section_hashes.items():
+            if sections[key].get('hash') != section_hash:
+                logger.info(f"Page map: '{key}' changed since the last build")
+                return None
+
+        page_counts = {key: section['pages'] for key, section in sections.items()}
+        placements = {path: tuple(size) for path, size in pagemap.get('placements', {}).items()}
+        return page_counts, placements
+
+    def save(self, page_registry, page_counts: dict, section_hashes: dict, placements: dict):
+        """Writes the sidecar file with the pagination of the finished build."""
+        pagemap = {
+            'version': self.VERSION,
+            'build_hash': self.build_hash,
+            'toc_position': page_registry.toc_position,
+            'toc_pages': page_registry.toc_pages,
+            'page_counts': {
+                key: {'pages': page_counts.get(key, 0), 'hash': section_hash}
+                for key, section_hash in section_hashes.items()
+            },
+            'sections': [
+                {
+                    'name': section['name'],
+                    'title': section['title'],
+                    'start_page': section['start_page'],
+                    'end_page': section['end_page'],
+                    'anchor': section['anchor'],
+                    'hash': section_hashes.get(section['name'])
+                }
+                for section in page_registry.sections
+            ],
+            'placements': {path: list(size) for path, size in placements.items()}
+        }
+        try:
+            tmp_path = f"{self.pagemap_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(pagemap, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.pagemap_path)
+            logger.info(f"Saved page map with {len(pagemap['sections'])} sections to {self.pagemap_path}")
+        except OSError as e:
+            logger.warning(f"Could not save page map: {e}")
+
+    def _load(self) -> dict | None:
+        """Loads the sidecar file, ignoring a missing, corrupt or outdated one."""
+        if not os.path.exists(self.pagemap_path):
+            return None
+        try:
+            with open(self.pagemap_path, 'r', encoding='utf-8') as f:
+                pagemap = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable page map: {e}")
+            return None
+        return pagemap if pagemap.get('version') == self.VERSION else None
+
+    def _get_file_fingerprints(self, data) -> list:
+        """Walks the section data and fingerprints every referenced image (pixel size) and table source (size and mtime)."""
+        fingerprints = []
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple)):  # Content nodes too
+                stack.extend(value)
+            elif isinstance(value, str):
+                extension = os.path.splitext(value)[1].lower()
+                if extension in self.IMAGE_EXTENSIONS:
+                    size = self.image_metadata.get_size(os.path.join(self.resources_dir, "images", value))
+                    fingerprints.append([value, list(size) if size else None])
+                elif extension in self.SOURCE_EXTENSIONS:
+                    fingerprints.append([value, self._stat(os.path.join(self.resources_dir, value))])
+        return sorted(fingerprints, key=lambda fingerprint: fingerprint[0])
+
+    @staticmethod
+    def _stat(path: str) -> list | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def _hash(payload) -> str:
+        data = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
@@ -1,20 +1,33 @@
+from bisect import bisect_left, bisect_right
 from src.logger import logger
 
 class PageRegistryService:
     """
     Service that tracks page numbers for dynamic TOC generation.
-    UPDATED for Fixed TOC Position approach.
+    UPDATED for Fixed TOC Position approach, with the TOC size computed from its entries.
+    Sections are kept sorted by start page (with a parallel array of start pages), so
+    page -> section and anchor -> page lookups and shifting later sections are cheap.
     """
+    NON_TOC_SECTIONS = ('cover', 'title', 'copyright', 'toc')
 
     def __init__(self):
-        self.sections = []  # List of {'name', 'title', 'start_page', 'end_page', 'anchor'}
-        self.toc_position = 5  # Fixed TOC position
-        self.toc_pages = 2     # Fixed TOC size
+        self.sections = []  # List of {'name', 'title', 'start_page', 'end_page', 'anchor'}, sorted by start page
+        self._start_pages = []  # start_page of each section, for bisection
+        self._by_name = {}  # name -> section
+        self._anchors = {}  # anchor -> section
+        self._toc_entries = None  # Cached until the sections change
+        self.toc_position = 5  # First page of the TOC, set when the sections are registered
+        self.toc_pages = 1     # Pages reserved for the TOC, sized by resolve_toc_pages()
 
     def register_section(self, name: str, title: str, start_page: int, end_page: int, anchor: str = None):
         """
         Register a section with its page information.
+        The first registration of a name wins, later ones (e.g. from the final pass) are ignored.
         """
+        if name in self._by_name:
+            logger.debug(f"Skipping duplicate section: {name}")
+            return
+
         section = {
             'name': name,
             'title': title,
@@ -23,59 +36,108 @@ class PageRegistryService:
             'anchor': anchor or name,
             'pages_count': end_page - start_page + 1
         }
-        self.sections.append(section)
+        # Sections starting on the same page keep their registration order
+        index = bisect_right(self._start_pages, start_page)
+        self._start_pages.insert(index, start_page)
+        self.sections.insert(index, section)
+        self._by_name[name] = section
+        self._anchors.setdefault(section['anchor'], section)
+        self._toc_entries = None
         logger.debug(f"Registered section: {name} -> {title} (pages {start_page}-{end_page})")
 
+    def get_section(self, name: str) -> dict | None:
+        """Returns a registered section by name."""
+        return self._by_name.get(name)
+
+    def get_section_at(self, page: int) -> dict | None:
+        """Returns the section that contains a page, or None if the page belongs to no section."""
+        index = bisect_right(self._start_pages, page) - 1
+        # Empty sections (end before start) share a start page with the next one
+        while index >= 0 and self.sections[index]['end_page'] < page:
+            if self.sections[index]['end_page'] >= self.sections[index]['start_page']:
+                return None
+            index -= 1
+        return self.sections[index] if index >= 0 else None
+
+    def get_page_for_anchor(self, anchor: str) -> int | None:
+        """Returns the start page of the section with the given anchor."""
+        section = self._anchors.get(anchor)
+        return section['start_page'] if section else None
+
     def get_toc_entries(self) -> list:
         """
         Get entries for TOC generation.
-        In Fixed TOC approach, these are pre-calculated.
+        In Fixed TOC approach, these are pre-calculated. Sections are already unique and
+        sorted by page, and the entries are cached until a section is registered or shifted.
         """
-        toc_entries = []
-        seen_sections = set()  # Track seen section names to avoid duplicates
-
-        for section in self.sections:
-            # Skip sections that shouldn't appear in TOC
-            if section['name'] in ['cover', 'title', 'copyright', 'toc']:
-                continue
-
-            # Skip duplicates
-            if section['name'] in seen_sections:
-                logger.debug(f"Skipping duplicate section: {section['name']}")
-                continue
-
-            seen_sections.add(section['name'])
+        if self._toc_entries is None:
+            self._toc_entries = [
+                {
+                    'title': section['title'],
+                    'page': section['start_page'],
+                    'anchor': section['anchor'],
+                    'is_chapter': section['name'].startswith('chapter_'),
+                    'is_main_chapter': section['name'].startswith('chapters.')
+                }
+                for section in self.sections if section['name'] not in self.NON_TOC_SECTIONS
+            ]
+            logger.info(f"Generated {len(self._toc_entries)} TOC entries")
+        return list(self._toc_entries)
+
+    def resolve_toc_pages(self, count_pages) -> int:
+        """
+        Sizes the TOC reservation to a fixed point. The TOC is laid out with the current
+        page numbers; if it needs more pages than reserved, every section after it is
+        shifted and the TOC is laid out again (longer page numbers can only make it grow,
+        so this converges). Chapter contents are never laid out again.
 
-            entry = {
-                'title': section['title'],
-                'page': section['start_page'],
-                'anchor': section['anchor'],
-                'is_chapter': section['name'].startswith('chapter_'),
-                'is_main_chapter': section['name'].startswith('chapters.')
-            }
-            toc_entries.append(entry)
+        Args:
+            count_pages (callable): Returns the number of pages the TOC needs for a list of entries.
 
-        # Sort by page number to ensure correct order
-        toc_entries.sort(key=lambda x: x['page'])
+        Returns:
+            int: The number of pages reserved for the TOC.
+        """
+        iterations = 0
+        while True:
+            iterations += 1
+            needed_pages = count_pages(self.get_toc_entries())
+            if needed_pages <= self.toc_pages:
+                break
+            self.shift_sections(self.toc_position + self.toc_pages, needed_pages - self.toc_pages)
+            self.toc_pages = needed_pages
+
+        logger.info(f"TOC reserved {self.toc_pages} pages after {iterations} layout(s)")
+        return self.toc_pages
 
-        logger.info(f"Generated {len(toc_entries)} TOC entries (duplicates removed)")
-        return toc_entries
+    def shift_sections(self, from_page: int, offset: int):
+        """
+        Moves every section starting at or after from_page by offset pages.
+        The offset must not move them before the preceding sections.
+        """
+        index = bisect_left(self._start_pages, from_page)
+        for section in self.sections[index:]:
+            section['start_page'] += offset
+            section['end_page'] += offset
+        self._start_pages[index:] = [start_page + offset for start_page in self._start_pages[index:]]
+        if index < len(self.sections):
+            self._toc_entries = None
 
     def get_sections_summary(self) -> str:
         """Get a summary of all registered sections for debugging."""
         summary = "REGISTERED SECTIONS (Fixed TOC approach):\n"
         summary += f"TOC Position: Page {self.toc_position} (reserved {self.toc_pages} pages)\n"
 
-        # Sort sections by start page
-        sorted_sections = sorted(self.sections, key=lambda x: x['start_page'])
-
-        for section in sorted_sections:
+        for section in self.sections:
             summary += f"  {section['name']}: '{section['title']}' (pages {section['start_page']}-{section['end_page']})\n"
         return summary
 
     def clear(self):
         """Clear all registered sections (for testing)."""
         self.sections = []
+        self._start_pages = []
+        self._by_name = {}
+        self._anchors = {}
+        self._toc_entries = None
 
     # Legacy methods for compatibility (not used in Fixed approach)
     def set_toc_insert_position(self, after_page: int):
@@ -87,5 +149,5 @@ class PageRegistryService:
         return self.sections
 
     def estimate_toc_pages(self, entries_per_page: int = 25) -> int:
-        """Returns the fixed TOC size."""
+        """Returns the reserved TOC size."""
         return self.toc_pages
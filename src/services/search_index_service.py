@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from src.logger import logger
+from src.services.content_ir_service import ListNode, ParagraphNode, TableNode, TextBoxNode, TextNode
+from src.services.table_source_service import TableSourceService
+from src.utils.anchor_utils import fold_accents
+from src.utils.markup_utils import to_text
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+def tokenize(text: str) -> list:
+    """Splits plain text into search terms, folded like anchor names ('Igeidők' -> 'igeidok')."""
+    return TOKEN_PATTERN.findall(fold_accents(text))
+
+class SearchIndexService:
+    """
+    Service that builds an inverted index of the text of a book for client-side search.
+    Sections are tokenised in reading order as the builders write them out; every term is
+    mapped to the sections it occurs in and its word positions there. The index is written
+    as a small manifest ('index.json') and one shard per term prefix, so a search loads
+    only the shard of its terms:
+
+        index.json: {"version": 1, "prefix_length": 2, "shards": ["ab", ...],
+                     "sections": [{"anchor": ..., "title": ..., "pages": [[href, first position], ...]}]}
+        ab.json:    {"about": [[section, first position, delta, delta, ...], ...], ...}
+    """
+    VERSION = 1
+
+    def __init__(self, config, resources_dir: str):
+        """
+        Args:
+            config (ConfigService): The application's configuration service.
+            resources_dir (str): The resources directory, for table sources.
+        """
+        self.enabled = bool(config.get("search.enabled", fallback=True))
+        self.prefix_length = config.get("search.prefix_length", fallback=2)
+        self.resources_dir = resources_dir
+        self.sections = []  # {'anchor', 'title', 'pages'}
+        self.postings = {}  # term -> {section index: [positions]}
+
+    def add_section(self, anchor: str, title: str, pages: list):
+        """
+        Tokenises a section. Positions run on across its pages, so a hit can be located
+        on the page whose first position precedes it.
+
+        Args:
+            anchor (str): The anchor of the section
+            title (str): The title of the section, indexed before its content
+            pages (list): (href, content nodes) tuples of the section in reading order
+        """
+        if not self.enabled:
+            return
+        section_index = len(self.sections)
+        section_pages = []
+        position = 0
+        for page_index, (href, items) in enumerate(pages):
+            section_pages.append([href, position])
+            texts = self._iter_texts(items)
+            if page_index == 0 and title:
+                texts = [title, *texts]
+            for text in texts:
+                for term in tokenize(to_text(text)):
+                    self.postings.setdefault(term, {}).setdefault(section_index, []).append(position)
+                    position += 1
+        self.sections.append({'anchor': anchor, 'title': to_text(title), 'pages': section_pages})
+
+    def write(self, index_dir: str):
+        """Writes the manifest and the shards, removing the shards of earlier builds that are gone."""
+        if not self.enabled:
+            return
+        shards = {}
+        for term in sorted(self.postings):
+            shards.setdefault(term[:self.prefix_length], {})[term] = [
+                [section_index, *self._delta_encode(positions)]
+                for section_index, positions in self.postings[term].items()
+            ]
+
+        os.makedirs(index_dir, exist_ok=True)
+        for prefix, shard in shards.items():
+            self._write_json(os.path.join(index_dir, f"{prefix}.json"), shard)
+        self._write_json(os.path.join(index_dir, "index.json"), {
+            'version': self.VERSION,
+            'prefix_length': self.prefix_length,
+            'shards': sorted(shards),
+            'sections': self.sections,
+        })
+
+        current = {f"{prefix}.json" for prefix in shards} | {"index.json"}
+        for file_name in os.listdir(index_dir):
+            if file_name.endswith('.json') and file_name not in current:
+                os.remove(os.path.join(index_dir, file_name))
+        logger.info(f"Search index: {len(self.postings)} terms in {len(shards)} shards, written to {index_dir}")
+
+    def _iter_texts(self, items: tuple):
+        """Yields the markup of every paragraph, list item, text box element and table cell."""
+        for item in items:
+            if isinstance(item, ParagraphNode):
+                yield item.text
+            elif isinstance(item, ListNode):
+                stack = list(reversed(item.items))
+                while stack:
+                    list_item = stack.pop()
+                    yield list_item.text
+                    stack.extend(reversed(list_item.sub_items))
+            elif isinstance(item, TextBoxNode):
+                for element in item.content:
+                    if isinstance(element, TextNode):
+                        yield element.text
+            elif isinstance(item, TableNode):
+                yield from self._iter_table_texts(item)
+
+    def _iter_table_texts(self, item: TableNode):
+        if item.caption:
+            yield item.caption
+        if item.source:
+            tables = TableSourceService.get_instance()
+            source_path = tables.resolve_source(self.resources_dir, item.source)
+            profile = tables.get_profile(source_path) if source_path else None
+            if profile:
+                yield from profile['columns']
+                for chunk in tables.iter_row_chunks(source_path):
+                    for row in chunk:
+                        yield from row
+        else:
+            for block in item.data:
+                for row in block:
+                    yield from (str(cell) for cell in row)
+
+    @staticmethod
+    def _delta_encode(positions: list) -> list:
+        """[3, 10, 12] -> [3, 7, 2]; small numbers keep the shards compact."""
+        return [position - previous for previous, position in zip([0, *positions], positions)]
+
+    @staticmethod
+    def _write_json(path: str, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
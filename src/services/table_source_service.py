@@ -0,0 +1,204 @@
+import csv
+import json
+import os
+from src.logger import logger
+from src.services.config_service import ConfigService
+
+class TableSourceService:
+    """
+    Singleton service for tables stored in external CSV/TSV files.
+    Rows are streamed in fixed-size chunks, so a table never has to be held in memory.
+    The column profile (names and types) is inferred in one pass per file version, kept
+    in memory and persisted to a JSON file in the cache directory, together with the
+    column widths the layout solved for the file, so an unchanged file is not measured again.
+    """
+    _instance = None
+    CACHE_FILE = "table_sources.json"
+    CHUNK_ROWS = 500
+    DELIMITERS = {'.csv': ',', '.tsv': '\t'}
+
+    def __init__(self, cache_dir: str = None):
+        """
+        Args:
+            cache_dir (str, optional): Directory of the persistent cache file.
+                                       If None, profiles are only kept in memory.
+        """
+        self.cache_dir = cache_dir
+        self._profiles = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the singleton instance, creating it from the configured cache directory.
+        """
+        if cls._instance is None:
+            cls._instance = cls(ConfigService.get_instance().get("paths.cache_dir"))
+        return cls._instance
+
+    @staticmethod
+    def resolve_source(resources_dir: str, source: str) -> str | None:
+        """
+        Returns the path of a source given relative to the resources directory, or None
+        if it leads outside of it (e.g. '../private.csv', an absolute path or a symlink).
+        """
+        resources_dir = os.path.realpath(resources_dir)
+        source_path = os.path.realpath(os.path.join(resources_dir, source))
+        if os.path.commonpath([resources_dir, source_path]) != resources_dir:
+            logger.error(f"Table source outside the resources directory: {source}")
+            return None
+        return source_path
+
+    def get_profile(self, source_path: str) -> dict | None:
+        """
+        Returns the column profile of a source, scanning the file only if it is new or has changed.
+
+        Returns:
+            dict: {'columns', 'types', 'rows', 'column_widths', 'mtime', 'size'} or None
+                  if the file is missing, empty or not a supported format.
+        """
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            logger.error(f"Table source not found: {source_path}")
+            return None
+
+        key = os.path.abspath(source_path)
+        profile = self._profiles.get(key)
+        if profile and profile['mtime'] == stat.st_mtime_ns and profile['size'] == stat.st_size:
+            return profile
+
+        profile = self._scan(source_path, stat)
+        if profile:
+            self._profiles[key] = profile
+            self._dirty = True
+        return profile
+
+    def get_column_widths(self, source_path: str, layout_key: str) -> list | None:
+        """Returns the column widths stored for the current version of a source and a layout, if any."""
+        profile = self.get_profile(source_path)
+        return profile.get('column_widths', {}).get(layout_key) if profile else None
+
+    def set_column_widths(self, source_path: str, layout_key: str, widths: list):
+        """
+        Stores the column widths solved for a layout (e.g. the available width and fonts)
+        in the profile, so they are dropped with it when the file changes.
+        """
+        profile = self.get_profile(source_path)
+        if profile:
+            profile.setdefault('column_widths', {})[layout_key] = widths
+            self._dirty = True
+
+    def iter_row_chunks(self, source_path: str, chunk_rows: int = None):
+        """
+        Yields the data rows (without the header row) in lists of at most chunk_rows
+        (default CHUNK_ROWS) rows. Rows are padded or truncated to the number of header columns.
+        """
+        profile = self.get_profile(source_path)
+        if not profile:
+            return
+        column_count = len(profile['columns'])
+        chunk_rows = chunk_rows or self.CHUNK_ROWS
+
+        chunk = []
+        with open(source_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f, delimiter=self._get_delimiter(source_path))
+            next(reader, None)
+            for row in reader:
+                if not row:
+                    continue
+                chunk.append((row + [''] * column_count)[:column_count])
+                if len(chunk) >= chunk_rows:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def save(self):
+        """Persists the in-memory profiles to the cache file if anything changed."""
+        if not self.cache_dir or not self._dirty:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, self.CACHE_FILE), 'w', encoding='utf-8') as f:
+                json.dump(self._profiles, f)
+            self._dirty = False
+            logger.debug(f"Saved profiles of {len(self._profiles)} table sources to cache")
+        except OSError as e:
+            logger.warning(f"Could not save table source cache: {e}")
+
+    def clear(self):
+        """Clear all cached profiles (for testing)."""
+        self._profiles = {}
+        self._dirty = False
+
+    def _load(self):
+        """Loads previously persisted profiles, ignoring a missing or corrupt cache file."""
+        if not self.cache_dir:
+            return
+        cache_file = os.path.join(self.cache_dir, self.CACHE_FILE)
+        if not os.path.exists(cache_file):
+            return
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                self._profiles = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable table source cache: {e}")
+            self._profiles = {}
+
+    def _scan(self, source_path: str, stat: os.stat_result) -> dict | None:
+        """Infers column names and types in a single streaming pass over the file."""
+        delimiter = self._get_delimiter(source_path)
+        if not delimiter:
+            logger.error(f"Unsupported table source format: {source_path}")
+            return None
+
+        try:
+            with open(source_path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f, delimiter=delimiter)
+                columns = next(reader, None)
+                if not columns:
+                    logger.error(f"Table source has no header row: {source_path}")
+                    return None
+
+                types = ['int'] * len(columns)
+                row_count = 0
+                for row in reader:
+                    if not row:
+                        continue
+                    row_count += 1
+                    for c, value in enumerate(row[:len(columns)]):
+                        if value and types[c] != 'text':
+                            types[c] = self._widen_type(types[c], value)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            logger.error(f"Could not read table source {source_path}: {e}")
+            return None
+
+        logger.debug(f"Profiled table source {source_path}: {len(columns)} columns, {row_count} rows")
+        return {
+            'columns': columns,
+            'types': types,
+            'rows': row_count,
+            'column_widths': {},  # layout key -> column widths in points
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size
+        }
+
+    @staticmethod
+    def _widen_type(current_type: str, value: str) -> str:
+        """Returns the narrowest of int < float < text that holds both the current type and value."""
+        if current_type == 'int':
+            try:
+                int(value)
+                return 'int'
+            except ValueError:
+                pass
+        try:
+            float(value)
+            return 'float'
+        except ValueError:
+            return 'text'
+
+    def _get_delimiter(self, source_path: str) -> str | None:
+        return self.DELIMITERS.get(os.path.splitext(source_path)[1].lower())
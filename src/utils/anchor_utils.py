@@ -2,6 +2,19 @@
 Utility functions for generating consistent anchor names across the application.
 """
 import re
+import unicodedata
+
+def fold_accents(text: str) -> str:
+    """
+    Lowercase a text and strip the accents of its letters, so that anchors and search
+    terms match however a word is accented.
+
+    Example:
+        "Két igeidő" -> "ket igeido"
+    """
+    # Decomposition separates the accents (e.g. 'ő' -> 'o' + double acute) from the letters
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
 
 def generate_anchor_name(title: str) -> str:
     """
@@ -19,15 +32,8 @@ def generate_anchor_name(title: str) -> str:
     if not title:
         return 'chapter'
 
-    anchor = title.lower()
-
-    # Replace Hungarian characters
-    hungarian_chars = {
-        'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
-        'ű': 'u', 'ö': 'o', 'ü': 'u'
-    }
-    for hun_char, eng_char in hungarian_chars.items():
-        anchor = anchor.replace(hun_char, eng_char)
+    # Accented characters (e.g. Hungarian 'ő', 'ű') become their base letters
+    anchor = fold_accents(title)
 
     # Replace all non-alphanumeric characters with underscore
     anchor = re.sub(r'[^a-z0-9]', '_', anchor)
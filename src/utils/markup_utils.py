@@ -0,0 +1,130 @@
+"""
+Utility functions for converting the inline markup of the book (the reportlab paragraph
+mini-language) into well-formed XHTML for the EPUB and web outputs.
+"""
+from html import escape
+from html.parser import HTMLParser
+
+# reportlab tag -> XHTML tag
+TAG_MAP = {
+    'b': 'b', 'strong': 'strong', 'i': 'i', 'em': 'em', 'u': 'u',
+    'strike': 's', 's': 's', 'super': 'sup', 'sup': 'sup', 'sub': 'sub',
+    'font': 'span', 'span': 'span', 'a': 'a', 'br': 'br', 'para': 'span',
+}
+VOID_TAGS = {'br'}
+
+# reportlab attribute -> CSS property
+STYLE_ATTRIBUTES = {
+    'color': 'color', 'fg': 'color', 'textcolor': 'color',
+    'backcolor': 'background-color', 'bgcolor': 'background-color',
+    'face': 'font-family', 'fontname': 'font-family',
+}
+
+
+class _XhtmlConverter(HTMLParser):
+    """Re-emits parsed markup as XHTML, closing unclosed tags and dropping unknown ones."""
+
+    def __init__(self, color_map: dict):
+        super().__init__(convert_charrefs=True)
+        self.color_map = color_map
+        self.parts = []
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        xhtml_tag = TAG_MAP.get(tag)
+        if not xhtml_tag:
+            return
+        attributes = self._convert_attributes(tag, attrs)
+        if xhtml_tag in VOID_TAGS:
+            self.parts.append(f'<{xhtml_tag}{attributes}/>')
+            return
+        self.parts.append(f'<{xhtml_tag}{attributes}>')
+        self.open_tags.append(xhtml_tag)
+
+    def handle_startendtag(self, tag, attrs):
+        xhtml_tag = TAG_MAP.get(tag)
+        if xhtml_tag:
+            self.parts.append(f'<{xhtml_tag}{self._convert_attributes(tag, attrs)}/>')
+
+    def handle_endtag(self, tag):
+        xhtml_tag = TAG_MAP.get(tag)
+        if not xhtml_tag or xhtml_tag not in self.open_tags:
+            return
+        # Close everything opened inside the tag as well
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.parts.append(f'</{open_tag}>')
+            if open_tag == xhtml_tag:
+                break
+
+    def handle_data(self, data):
+        self.parts.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.parts.append(f'</{self.open_tags.pop()}>')
+
+    def _convert_attributes(self, tag: str, attrs: list) -> str:
+        styles = []
+        attributes = []
+        for name, value in attrs:
+            name = name.lower()
+            value = value or ''
+            if name in STYLE_ATTRIBUTES:
+                value = self.color_map.get(value.lower(), value) if 'color' in STYLE_ATTRIBUTES[name] else value
+                styles.append(f'{STYLE_ATTRIBUTES[name]}: {value}')
+            elif name == 'size' and tag == 'font':
+                styles.append(f'font-size: {value}pt')
+            elif name == 'name' and tag == 'a':
+                attributes.append(('id', value))
+            elif name == 'href' and tag == 'a':
+                attributes.append(('href', value))
+        if styles:
+            attributes.append(('style', '; '.join(styles)))
+        return ''.join(f' {name}="{escape(value)}"' for name, value in attributes)
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the text of inline markup; line breaks separate words."""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag.lower() == 'br':
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+
+def to_xhtml(markup: str, color_map: dict = None) -> str:
+    """
+    Converts inline paragraph markup into well-formed XHTML.
+
+    Args:
+        markup: The markup, e.g. '<font color="red">Hello</font><br/>world'
+        color_map: Color names (lowercase) mapped to their hex codes
+
+    Returns:
+        XHTML markup, e.g. '<span style="color: #FF0000">Hello</span><br/>world'
+    """
+    converter = _XhtmlConverter(color_map or {})
+    converter.feed(str(markup))
+    converter.close()
+    return ''.join(converter.parts)
+
+
+def to_text(markup: str) -> str:
+    """
+    Extracts the plain text of inline paragraph markup, e.g. for the search index.
+
+    Example:
+        'Hello <b>wor</b>ld<br/>again&nbsp;!' -> 'Hello world again\xa0!'
+    """
+    extractor = _TextExtractor()
+    extractor.feed(str(markup))
+    extractor.close()
+    return ''.join(extractor.parts)
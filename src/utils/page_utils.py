@@ -2,10 +2,9 @@ import os
 from reportlab.lib.pagesizes import letter, portrait
 from reportlab.pdfgen import canvas as cnv
 
-def make_page(title, subtitle, path, paper_book, black_and_white, font_color, short=False):
+def get_book_name(title, subtitle, path, paper_book, black_and_white, short=False, draft=False):
     """
-    Creates and configures a PDF canvas object with a dynamically generated filename.
-    This is the only function that should remain in this utility file.
+    Returns the path of a book's output files, without extension.
     """
     book_name = '{}_{}'.format(title.replace(' ', '_'), subtitle.replace(' ', '_'))
     book_file = f'{path}/{book_name}'
@@ -16,6 +15,19 @@ def make_page(title, subtitle, path, paper_book, black_and_white, font_color, sh
         book_file += '_blackandwhite'
     if short:
         book_file += '_short'
+    if draft:
+        book_file += '_draft'
+    return book_file
+
+def make_page(title, subtitle, path, paper_book, black_and_white, font_color, short=False, draft=False,
+              sections=None):
+    """
+    Creates and configures a PDF canvas object with a dynamically generated filename.
+    Builds of selected sections get the section keys appended to the name.
+    """
+    book_file = get_book_name(title, subtitle, path, paper_book, black_and_white, short, draft)
+    if sections:
+        book_file += '_' + '-'.join(section.replace('.', '_') for section in sections)
     book_file += '.pdf'
 
     os.makedirs(os.path.dirname(book_file), exist_ok=True)
@@ -1,4 +1,7 @@
 import re
+from functools import lru_cache
+from html import unescape
+from reportlab.pdfbase import pdfmetrics
 
 
 def strip_html_tags(text):
@@ -35,3 +38,25 @@ def fix_html_tags(first_html, second_html):
             second_html = f'<{tag}>' + second_html
 
     return first_html, second_html
+
+
+@lru_cache(maxsize=65536)
+def string_width(text, font_name, font_size):
+    """pdfmetrics.stringWidth with the result cached per (text, font, size)"""
+    return pdfmetrics.stringWidth(text, font_name, font_size)
+
+
+def measure_text_widths(markup, font_name, font_size):
+    """
+    Return the (minimum, preferred) width of inline markup: the widest word and
+    the widest line if nothing is wrapped
+    """
+    min_width = preferred_width = 0
+    space_width = string_width(' ', font_name, font_size)
+    for line in re.split(r'<br\s*/?>', markup):
+        word_widths = [string_width(word, font_name, font_size)
+                       for word in unescape(strip_html_tags(line)).split()]
+        if word_widths:
+            min_width = max(min_width, max(word_widths))
+            preferred_width = max(preferred_width, sum(word_widths) + space_width * (len(word_widths) - 1))
+    return min_width, preferred_width
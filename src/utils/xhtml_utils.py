@@ -0,0 +1,292 @@
+"""
+Utility functions for rendering the compiled content nodes of a chapter as XHTML (EPUB and web outputs).
+The functions are pure, so chapters can be rendered in worker processes.
+"""
+from html import escape
+from src.services.content_ir_service import (ImageNode, ListNode, ParagraphNode, SpeechBubbleNode, TableNode,
+                                             TextBoxNode)
+from src.services.table_source_service import TableSourceService
+from src.utils.markup_utils import to_xhtml
+
+STYLESHEET = """body { font-family: serif; line-height: 1.4; margin: 0 5%; }
+h1 { font-size: 1.6em; margin: 1.5em 0 1em; }
+p { margin: 0 0 0.6em; text-align: justify; text-indent: 1.2em; }
+p.empty { height: 0.6em; }
+figure { margin: 1em 0; text-align: center; }
+figure.left { text-align: left; }
+figure.right { text-align: right; }
+figure img { max-width: 100%; height: auto; }
+figcaption { font-size: 0.9em; font-style: italic; }
+table { border-collapse: collapse; margin: 1em auto; }
+th, td { border: 0.5px solid #808080; padding: 0.2em 0.4em; vertical-align: top; }
+th { font-weight: bold; text-align: center; }
+td.numeric { text-align: right; }
+ul { margin: 0 0 0.6em; }
+li { margin-bottom: 0.2em; }
+.textbox { margin: 0.8em 0; padding: 0.5em; }
+.textbox p { text-indent: 0; }
+.speech-bubble { display: flex; align-items: center; gap: 1em; margin: 0.8em 0; }
+.speech-bubble.right { flex-direction: row-reverse; }
+.speech-bubble img { width: 4em; height: 4em; border-radius: 50%; }
+.speech-bubble p { flex: 1; border-radius: 0.8em; padding: 0.8em; text-indent: 0; margin: 0; }
+.title-page { text-align: center; margin-top: 30%; }
+.copyright p { text-indent: 0; }
+"""
+
+# Additions of the web output: a readable column and the page navigation
+WEB_STYLESHEET = STYLESHEET + """body { max-width: 40em; margin: 0 auto; padding: 0 1em; }
+nav.pages { display: flex; justify-content: space-between; margin: 2em 0; font-family: sans-serif; }
+nav.toc ol { list-style: none; padding: 0; }
+nav.toc li { margin: 0.4em 0; }
+"""
+
+
+def make_html_document(title: str, body: str, language: str, stylesheet: str = 'style.css') -> str:
+    """Wraps a rendered body into a complete HTML5 page (web output)."""
+    return (
+        '<!DOCTYPE html>\n'
+        f'<html lang="{language}">\n'
+        f'<head><meta charset="utf-8"/><meta name="viewport" content="width=device-width, initial-scale=1"/>'
+        f'<title>{escape(title)}</title><link rel="stylesheet" href="{stylesheet}"/></head>\n'
+        f'<body>\n{body}\n</body>\n</html>\n'
+    )
+
+
+def make_document(title: str, body: str, language: str, stylesheet: str = 'style.css') -> str:
+    """Wraps a rendered body into a complete XHTML (EPUB 3) document."""
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<!DOCTYPE html>\n'
+        f'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+        f'lang="{language}" xml:lang="{language}">\n'
+        f'<head><meta charset="utf-8"/><title>{escape(title)}</title>'
+        f'<link rel="stylesheet" type="text/css" href="{stylesheet}"/></head>\n'
+        f'<body>\n{body}\n</body>\n</html>\n'
+    )
+
+
+def render_content(items: tuple, color_map: dict, resources_dir: str, image_urls: dict = None) -> tuple[str, list]:
+    """
+    Renders the content nodes of a chapter.
+
+    Args:
+        items: The compiled 'content' of a chapter
+        color_map: Color names (lowercase) mapped to their hex codes
+        resources_dir: The resources directory, for table sources
+        image_urls: Image sources mapped to their URLs relative to the document (e.g. of a
+                    derivative) or to all their img attributes; images missing from it were
+                    not published and are left out. If None, every image is 'images/<src>'.
+
+    Returns:
+        (XHTML body, the image sources referenced, in order of appearance)
+    """
+    parts = []
+    images = []
+    for item in items:
+        if isinstance(item, ParagraphNode):
+            text = item.text
+            parts.append(f'<p>{to_xhtml(text, color_map)}</p>' if text.strip() else '<p class="empty"></p>')
+        elif isinstance(item, ImageNode):
+            if _is_published(item.src, image_urls):
+                parts.append(_render_image(item, color_map, image_urls))
+                images.append(item.src)
+        elif isinstance(item, TableNode):
+            parts.append(_render_table(item, color_map, resources_dir))
+        elif isinstance(item, ListNode):
+            parts.append(_render_list(item.items, color_map))
+        elif isinstance(item, TextBoxNode):
+            parts.append(_render_textbox(item, color_map, image_urls, images))
+        elif isinstance(item, SpeechBubbleNode):
+            parts.append(_render_speech_bubble(item, color_map, image_urls))
+            if item.avatar_src and _is_published(item.avatar_src, image_urls):
+                images.append(item.avatar_src)
+    return '\n'.join(parts), [src for src in images if src]
+
+
+def _is_published(src: str, image_urls: dict) -> bool:
+    return image_urls is None or src in image_urls
+
+
+def _image_attributes(src: str, image_urls: dict) -> str:
+    """The src attribute of an image, or every attribute given for it (e.g. srcset, loading)."""
+    image = (image_urls or {}).get(src, f'images/{src}')
+    if isinstance(image, str):
+        image = {'src': image}
+    return ''.join(f' {name}="{escape(str(value))}"' for name, value in image.items())
+
+
+def _css_color(color_spec, color_map: dict) -> str:
+    if not isinstance(color_spec, str):
+        return ''
+    return color_map.get(color_spec.lower(), color_spec)
+
+
+def _css_size(size) -> str:
+    """Percentages are kept, pixel sizes of the book data become CSS pixels."""
+    if isinstance(size, (int, float)):
+        return f'{size}px'
+    if isinstance(size, str) and size.endswith('%'):
+        return size
+    return ''
+
+
+def _render_image(item: ImageNode, color_map: dict, image_urls: dict) -> str:
+    caption = item.caption or ''
+    width = _css_size(item.width)
+    style = f' style="width: {escape(width)}"' if width else ''
+    figcaption = f'<figcaption>{to_xhtml(caption, color_map)}</figcaption>' if caption.strip() else ''
+    return (f'<figure class="{escape(item.alignment)}">'
+            f'<img{_image_attributes(item.src, image_urls)} alt="{escape(caption)}"{style}/>'
+            f'{figcaption}</figure>')
+
+
+def _render_list(items: tuple, color_map: dict) -> str:
+    """Renders nested lists iteratively, so nesting depth is unlimited."""
+    parts = ['<ul>']
+    stack = [iter(items)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            parts.append('</ul></li>' if stack else '</ul>')
+            continue
+        parts.append(f'<li>{to_xhtml(item.text, color_map)}')
+        if item.sub_items:
+            parts.append('<ul>')
+            stack.append(iter(item.sub_items))
+        else:
+            parts.append('</li>')
+    return ''.join(parts)
+
+
+def _render_textbox(item: TextBoxNode, color_map: dict, image_urls: dict, images: list) -> str:
+    styles = []
+    if item.background_color:
+        styles.append(f'background-color: {_css_color(item.background_color, color_map)}')
+    if item.border_width:
+        styles.append(f'border: {item.border_width}px solid {_css_color(item.border_color, color_map)}')
+    if item.border_radius:
+        styles.append(f'border-radius: {item.border_radius}px')
+    width = _css_size(item.width)
+    if width and width != '100%':
+        styles.append(f'width: {width}')
+
+    parts = []
+    for element in item.content:
+        if isinstance(element, ImageNode):
+            if _is_published(element.src, image_urls):
+                parts.append(_render_image(element, color_map, image_urls))
+                images.append(element.src)
+            continue
+        text_styles = []
+        if element.text_align:
+            text_styles.append(f'text-align: {element.text_align}')
+        if element.text_color:
+            text_styles.append(f'color: {_css_color(element.text_color, color_map)}')
+        if element.font_size:
+            text_styles.append(f'font-size: {element.font_size}pt')
+        font_weight = element.font_weight or 'Regular'
+        if 'Bold' in font_weight:
+            text_styles.append('font-weight: bold')
+        if 'Italic' in font_weight:
+            text_styles.append('font-style: italic')
+        style = f' style="{escape("; ".join(text_styles))}"' if text_styles else ''
+        parts.append(f'<p{style}>{to_xhtml(element.text, color_map)}</p>')
+
+    style = f' style="{escape("; ".join(styles))}"' if styles else ''
+    return f'<div class="textbox"{style}>{"".join(parts)}</div>'
+
+
+def _render_speech_bubble(item: SpeechBubbleNode, color_map: dict, image_urls: dict) -> str:
+    bubble_type = 'right' if item.bubble_type == 'right' else 'left'
+    avatar = (f'<img{_image_attributes(item.avatar_src, image_urls)} alt=""/>'
+              if item.avatar_src and _is_published(item.avatar_src, image_urls) else '')
+    styles = []
+    if item.background_color:
+        styles.append(f'background-color: {_css_color(item.background_color, color_map)}')
+    if item.text_color:
+        styles.append(f'color: {_css_color(item.text_color, color_map)}')
+    if item.border_color:
+        styles.append(f'border: 1px solid {_css_color(item.border_color, color_map)}')
+    style = f' style="{escape("; ".join(styles))}"' if styles else ''
+    return (f'<div class="speech-bubble {bubble_type}">{avatar}'
+            f'<p{style}>{to_xhtml(item.text, color_map)}</p></div>')
+
+
+def _render_table(item: TableNode, color_map: dict, resources_dir: str) -> str:
+    """The first block becomes the table head; cell colors and spans come from the style commands."""
+    parts = ['<table>']
+    if item.caption:
+        parts.append(f'<caption>{to_xhtml(item.caption, color_map)}</caption>')
+
+    source = item.source
+    if source:
+        tables = TableSourceService.get_instance()
+        source_path = tables.resolve_source(resources_dir, source)
+        profile = tables.get_profile(source_path) if source_path else None
+        if profile:
+            parts.append('<thead>' + _render_row(profile['columns'], 'th', color_map, {}, None, 0, set()) + '</thead><tbody>')
+            numeric = {c for c, column_type in enumerate(profile['types']) if column_type != 'text'}
+            for chunk in tables.iter_row_chunks(source_path):
+                parts.extend(_render_row(row, 'td', color_map, {}, None, 0, numeric) for row in chunk)
+            parts.append('</tbody>')
+    else:
+        data = item.data
+        styles = item.style
+        for i, block in enumerate(data):
+            cell_styles, spans = _rasterise_style(styles[i] if i < len(styles) else [], block, color_map)
+            is_head = i == 0 and len(data) > 1
+            rows = ''.join(_render_row(row, 'th' if is_head else 'td', color_map, cell_styles, spans, r, set())
+                           for r, row in enumerate(block))
+            parts.append(f'<thead>{rows}</thead>' if is_head else f'<tbody>{rows}</tbody>')
+
+    parts.append('</table>')
+    return ''.join(parts)
+
+
+def _render_row(row: list, cell_tag: str, color_map: dict, cell_styles: dict, spans: dict | None, r: int,
+                numeric: set) -> str:
+    cells = []
+    for c, cell in enumerate(row):
+        span = spans.get((c, r)) if spans is not None else (1, 1)
+        if span is None:  # Covered by a span
+            continue
+        attributes = ''
+        if span != (1, 1):
+            attributes += (f' colspan="{span[0]}"' if span[0] > 1 else '') + (f' rowspan="{span[1]}"' if span[1] > 1 else '')
+        if c in numeric:
+            attributes += ' class="numeric"'
+        if (c, r) in cell_styles:
+            attributes += f' style="{escape("; ".join(cell_styles[(c, r)]))}"'
+        cells.append(f'<{cell_tag}{attributes}>{to_xhtml(cell, color_map)}</{cell_tag}>')
+    return f'<tr>{"".join(cells)}</tr>'
+
+
+def _rasterise_style(style: list, block: list, color_map: dict) -> tuple[dict, dict]:
+    """
+    Returns the CSS declarations of every styled cell and the (colspan, rowspan) of every
+    visible cell, keyed by (column, row); cells covered by a span are missing from the spans.
+    """
+    row_count = len(block)
+    column_count = len(block[0]) if block else 0
+    spans = {(c, r): (1, 1) for r in range(row_count) for c in range(column_count)}
+    cell_styles = {}
+    for command in style:
+        if len(command) < 3:
+            continue
+        name = str(command[0]).upper()
+        (c0, r0), (c1, r1) = command[1], command[2]
+        c0, c1 = sorted((c0 % column_count if column_count else 0, c1 % column_count if column_count else 0))
+        r0, r1 = sorted((r0 % row_count if row_count else 0, r1 % row_count if row_count else 0))
+        if name == 'SPAN':
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    spans.pop((c, r), None)
+            spans[(c0, r0)] = (c1 - c0 + 1, r1 - r0 + 1)
+        elif name in ('BACKGROUND', 'TEXTCOLOR') and len(command) > 3:
+            declaration = 'background-color' if name == 'BACKGROUND' else 'color'
+            value = _css_color(command[3], color_map)
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    cell_styles.setdefault((c, r), []).append(f'{declaration}: {value}')
+    return cell_styles, spans
@@ -0,0 +1,82 @@
+import xml.etree.ElementTree as ET
+
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+from src.builders.epub_builder import EpubBuilder, render_chapter
+from src.services.content_ir_service import (ImageNode, ListItemNode, ListNode, ParagraphNode, SpeechBubbleNode,
+                                             TableNode, TextBoxNode, TextNode)
+
+XHTML = '{http://www.w3.org/1999/xhtml}'
+
+def test_chapter_renders_every_content_type(tmp_path):
+    content = (
+        ParagraphNode("Hello <i>world"),
+        ParagraphNode(""),
+        ImageNode("ch1.png", caption="A <b>caption</b>", width="50%"),
+        ListNode((ListItemNode("one", (ListItemNode("a"), ListItemNode("b", (ListItemNode("c"),)))), ListItemNode("two"))),
+        TextBoxNode((TextNode("Boxed", font_weight="Italic"),), background_color="ltgrey"),
+        SpeechBubbleNode("Hi!", avatar_src="av1.png", bubble_type="right"),
+        TableNode(data=((("H1", "H2"),), (("a", "b"), ("c", "d"))),
+                  style=((), (("SPAN", (0, 0), (1, 0)), ("BACKGROUND", (0, 1), (-1, 1), "pink")))),
+    )
+
+    xhtml, images = render_chapter("1. Beyond the Rules", "beyond_the_rules", content,
+                                   {'ltgrey': '#EEEEEE', 'pink': '#FFC0CB'}, str(tmp_path), 'en')
+
+    root = ET.fromstring(xhtml.encode('utf-8'))
+    body = root.find(f'{XHTML}body')
+    assert body.find(f'{XHTML}h1').get('id') == 'beyond_the_rules'
+    assert images == ['ch1.png', 'av1.png']
+    assert len(list(body.iter(f'{XHTML}li'))) == 5
+    rows = list(body.iter(f'{XHTML}tr'))
+    assert [cell.get('colspan') for cell in rows[1]] == ['2']
+    assert rows[2][0].get('style') == 'background-color: #FFC0CB'
+
+def test_images_that_were_not_published_are_left_out(tmp_path):
+    content = (
+        ImageNode("missing.png", caption="Gone"),
+        ImageNode("ch1.png"),
+        SpeechBubbleNode("Hi!", avatar_src="missing.png"),
+    )
+
+    xhtml, images = render_chapter("", "ch_1", content, {}, str(tmp_path), 'en', {"ch1.png": "images/ch1.jpg"})
+
+    body = ET.fromstring(xhtml.encode('utf-8')).find(f'{XHTML}body')
+    assert [img.get('src') for img in body.iter(f'{XHTML}img')] == ['images/ch1.jpg']
+    assert images == ['ch1.png']
+
+def test_chapters_are_yielded_in_order_with_a_bounded_window(mocker):
+    submitted = []
+
+    def submit(function, *args):
+        future = Future()
+        future.set_result(args[0])
+        submitted.append(args[0])
+        return future
+
+    pool = mocker.patch('src.builders.epub_builder.ProcessPoolExecutor').return_value.__enter__.return_value
+    pool.submit.side_effect = submit
+    builder = EpubBuilder.__new__(EpubBuilder)  # Without fonts, styles and book data
+    builder.workers, builder.resources_dir, builder.language = 2, 'resources', 'en'
+    builder.style_manager = MagicMock()
+    chapters = [MagicMock(title=f"Chapter {index}", data={}) for index in range(10)]
+
+    rendered = []
+    for title in builder._render_chapters(chapters, {}):
+        rendered.append(title)
+        assert len(submitted) - len(rendered) < 4  # At most two chapters per worker in flight
+
+    assert rendered == [f"Chapter {index}" for index in range(10)]
+
+def test_images_of_the_same_name_get_their_own_files(mocker):
+    builder = EpubBuilder.__new__(EpubBuilder)  # Without fonts, styles and book data
+    builder.images_dir = 'images'
+    builder.image_derivatives = MagicMock()
+    # The TIFF is converted into a JPEG
+    builder.image_derivatives.resolve.side_effect = lambda path: path.replace('.tiff', '.jpg')
+    mocker.patch('src.builders.epub_builder.EpubPackageService.can_package', return_value=True)
+
+    image_urls = builder._prepare_images(["a.png", "a.jpg", "a.tiff"])
+
+    assert image_urls == {"a.png": "images/a.png", "a.jpg": "images/a.jpg", "a.tiff": "images/a.tiff.jpg"}
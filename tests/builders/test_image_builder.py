@@ -0,0 +1,26 @@
+import pytest
+from PIL import Image
+
+from src.builders.content.image_builder import ImageBuilder
+from src.services.image_registry_service import ImageRegistryService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+@pytest.fixture
+def config_values(config_values, tmp_path):
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (400, 200), "blue").save(tmp_path / "images" / "picture.png")
+    return {**config_values, "paths.resources": str(tmp_path)}
+
+def test_dry_run_positions_without_decoding(make_builder, mocker):
+    dry_builder = make_builder(ImageBuilder, image_registry=ImageRegistryService(), dry_run=True)
+    final_builder = make_builder(ImageBuilder, image_registry=ImageRegistryService(), dry_run=False)
+    begin_form_spy = mocker.spy(dry_builder.canvas, "beginForm")
+
+    dry_pos = dry_builder.add_image("picture.png", 100, width=400)
+    final_pos = final_builder.add_image("picture.png", 100, width=400)
+
+    assert dry_pos == final_pos == 100 + 150 + 15
+    assert dry_builder.image_registry.decode_count == 0
+    assert begin_form_spy.call_count == 0
+    assert final_builder.image_registry.decode_count == 1
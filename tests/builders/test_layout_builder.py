@@ -0,0 +1,23 @@
+import io
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from src.builders.content.layout_builder import LayoutBuilder
+
+def test_headers_and_footers_are_compiled_once_per_chapter(make_builder, mocker):
+    canvas = pdf_canvas.Canvas(io.BytesIO(), pagesize=letter)
+    builder = make_builder(LayoutBuilder, canvas)
+    begin_form_spy = mocker.spy(canvas, "beginForm")
+    draw_string_spy = mocker.spy(canvas, "drawString")
+
+    for page_num in range(10, 20):
+        builder.add_header("<span>Chapter 1</span>", page_num)
+        builder.add_footer("Chapter 1", page_num)
+        canvas.showPage()
+    builder.add_header("<span>Chapter 2</span>", 20)
+    builder.add_footer("Chapter 2", 20)
+
+    # One header and one footer form per chapter (page numbers 10-19 have the same width)
+    assert begin_form_spy.call_count == 4
+    assert [call.args[2] for call in draw_string_spy.call_args_list] == [str(n) for n in range(10, 21)]
+    canvas.save()
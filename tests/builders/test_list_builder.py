@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock
+
+from src.builders.content.list_builder import ListBuilder
+from src.services.content_ir_service import ListItemNode
+from src.services.layout_cache_service import LayoutCacheService
+
+def test_deeply_nested_items_are_flattened_in_drawing_order(make_builder):
+    builder = make_builder(ListBuilder)
+    node = ListItemNode("level 29")
+    for level in range(28, -1, -1):
+        node = ListItemNode(f"level {level}", (node,))
+    items = (node,)
+
+    entries = builder.layout_list(items)
+
+    assert [(paragraph.text, level) for paragraph, _, _, level in entries] == [(f"level {level}", level) for level in range(30)]
+    assert entries[-1][0].style.leftIndent == ListBuilder.BASE_INDENT * (ListBuilder.MAX_INDENT_LEVEL + 1)
+
+def test_long_list_breaks_pages_between_items(make_builder):
+    builder = make_builder(ListBuilder)
+    items = tuple(ListItemNode(f"Item {n}") for n in range(100))
+    pages = []
+
+    def on_page_break():
+        pages.append(len(pages) + 1)
+        return 50
+
+    end_pos = builder.add_list(items, 50, on_page_break=on_page_break)
+
+    # 20pt per item and 677pt per page: 33 + 33 + 33 + 1 items
+    assert len(pages) == 3
+    assert end_pos == 50 + 20
+
+def test_page_break_never_separates_an_item_from_its_sub_items(make_builder, mocker):
+    builder = make_builder(ListBuilder)
+    draw_spy = mocker.spy(builder, "_draw_entries")
+    # 32 items of 20pt fill 640 of the 677pt; the parent (24pt) would still fit, its sub-items would not
+    items = tuple(ListItemNode(f"Item {n}") for n in range(32))
+    items += (ListItemNode("Parent", (ListItemNode("Child 1"), ListItemNode("Child 2", (ListItemNode("Grandchild"),)))),
+              ListItemNode("Last"))
+
+    builder.add_list(items, 50, on_page_break=MagicMock(return_value=50))
+
+    pages = [[paragraph.text for paragraph, _, _, _ in call.args[0]] for call in draw_spy.call_args_list]
+    assert pages[0] == [f"Item {n}" for n in range(32)]
+    assert pages[1] == ["Parent", "Child 1", "Child 2", "Grandchild", "Last"]
+
+def test_list_is_measured_once_across_estimate_and_passes(make_builder, mocker):
+    layout_cache = LayoutCacheService()
+    dry_builder = make_builder(ListBuilder, layout_cache=layout_cache)
+    final_builder = make_builder(ListBuilder, layout_cache=layout_cache)
+    flatten_spy = mocker.spy(ListBuilder, "_flatten")
+    items = (ListItemNode("First", (ListItemNode("Nested"),)), ListItemNode("Second"))
+
+    dry_pos = dry_builder.add_list(items, 100)
+    final_pos = final_builder.add_list(items, 100, on_page_break=MagicMock())
+
+    assert flatten_spy.call_count == 1
+    assert dry_pos == final_pos == 100 + 3 * 20 + ListBuilder.ITEM_SPACING
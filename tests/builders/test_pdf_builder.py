@@ -0,0 +1,113 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+
+from src.builders.base_builder import BaseBuilder
+from src.builders.pdf_builder import PdfBuilder
+from src.services.content_ir_service import ContentIRService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+BOOK = {
+    'title': {'title': 'Title', 'subtitle': 'Sub'},
+    'copyright': {'author': 'Me'},
+    'preface': {'title': 'Preface', 'content': [{'type': 'paragraph', 'text': 'Hi'}]},
+    'chapters': {
+        'ch_1': {'title': 'One', 'content': [{'type': 'image', 'src': 'one.png'}]},
+        'ch_2': {'title': 'Two', 'content': [{'type': 'image', 'src': 'two.png'}]},
+    },
+}
+# cover 1, title 2, copyright 3, TOC 4, preface 5-6, ch_1 7-9, ch_2 10-13
+PAGE_COUNTS = {'cover': 1, 'title': 1, 'copyright': 1, 'preface': 2, 'chapters.ch_1': 3, 'chapters.ch_2': 4}
+
+@pytest.fixture
+def make_builder(mocker, tmp_path):
+    """Returns a factory of PdfBuilders on the test book, registered with PAGE_COUNTS, without fonts or styles."""
+    config_values = {"paths.resources": str(tmp_path), "paths.cache_dir": str(tmp_path / "cache")}
+    config = MagicMock()
+    config.get.side_effect = lambda key, fallback=None: config_values.get(key, fallback)
+    style_manager = MagicMock()
+    style_manager.get_color_map.return_value = {}
+    style_manager.normalize_markup.side_effect = lambda text: text
+    data_manager = MagicMock()
+    data_manager.get_data.return_value = BOOK
+
+    def base_init(self, json_file, **kwargs):
+        self.config, self.style_manager, self.data_manager = config, style_manager, data_manager
+        self.paper_book, self.black_and_white = kwargs['paper_book'], kwargs['black_and_white']
+        self.short, self.language, self.valid = kwargs['short'], kwargs['language'], True
+
+    mocker.patch.object(BaseBuilder, '__init__', base_init)
+
+    def make(sections, page_counts=PAGE_COUNTS):
+        builder = PdfBuilder('book.json', False, False, False, 'en', sections=sections)
+        builder.book = ContentIRService().compile(data_manager, 'en', style_manager, str(tmp_path / "images"))
+        builder._register_sections_with_real_page_numbers(builder.book.get_data(), page_counts)
+        return builder
+    return make
+
+def _build(builder, mocker):
+    """Runs the final pass with recording page builders and returns the (section, start page) built."""
+    built = []
+    content_builder = MagicMock(page_num=1)
+    record = lambda key: built.append((key, content_builder.page_num))
+    mocker.patch('src.builders.pdf_builder.CoverBuilder').return_value.build.side_effect = lambda: record('cover')
+    mocker.patch.object(builder, '_build_toc', side_effect=lambda *args: record('toc'))
+    mocker.patch.object(builder, '_build_section', side_effect=lambda *args, source_path=None, **options:
+                        record(source_path))
+    toc_builder = MagicMock(linked_anchors=None)
+
+    start_pages = {key: builder._get_start_page(key) for key in builder.sections}
+    builder._build_final_document(content_builder, builder.book.get_data(), toc_builder, start_pages)
+    return built, toc_builder
+
+def test_selected_sections_are_built_in_book_order_from_their_full_book_pages(make_builder, mocker):
+    builder = make_builder(['chapters.ch_2', 'toc', 'preface'])
+
+    built, _ = _build(builder, mocker)
+
+    assert built == [('toc', 4), ('preface', 5), ('chapters.ch_2', 10)]
+
+def test_full_build_builds_and_links_every_section(make_builder, mocker):
+    builder = make_builder([])
+
+    built, toc_builder = _build(builder, mocker)
+
+    assert [key for key, _ in built] == ['cover', 'title', 'copyright', 'toc', 'preface', 'chapters.ch_1',
+                                         'chapters.ch_2']
+    assert toc_builder.linked_anchors is None
+
+def test_toc_links_only_to_rendered_sections(make_builder, mocker):
+    builder = make_builder(['toc', 'chapters.ch_1'])
+
+    _, toc_builder = _build(builder, mocker)
+
+    # 'preface' and 'two' are pages of the full book, but not of this document
+    assert toc_builder.linked_anchors == {'one'}
+
+def test_section_without_pages_has_no_start_page(make_builder):
+    builder = make_builder(['cover'], page_counts={**PAGE_COUNTS, 'cover': 0})
+
+    assert builder._get_start_page('title') == 1
+    with pytest.raises(ValueError, match="'cover'"):
+        builder._get_start_page('cover')
+
+def test_derivatives_are_limited_to_the_images_of_the_selected_sections(make_builder, tmp_path):
+    builder = make_builder(['cover', 'chapters.ch_2'])
+    images_dir = str(tmp_path / "images")
+
+    assert builder._get_image_paths(builder.sections) == {os.path.join(images_dir, "cover.en.png"),
+                                                          os.path.join(images_dir, "two.png")}
+
+def test_builder_on_invalid_book_data_is_invalid(mocker, tmp_path):
+    config = MagicMock()
+    config.get.side_effect = lambda key, fallback=None: {"paths.cache_dir": str(tmp_path)}.get(key, fallback)
+    mocker.patch('src.builders.base_builder.ConfigService.get_instance', return_value=config)
+    mocker.patch('src.builders.base_builder.FontManager').return_value.register_all_fonts.return_value = True
+    mocker.patch('src.builders.base_builder.StyleManager').return_value.register_styles.return_value = True
+    mocker.patch('src.builders.base_builder.DataManager').return_value.load_book_data.return_value = False
+
+    builder = PdfBuilder('invalid.json', True, True, False, 'en')
+
+    assert builder.valid is False
+    assert builder.output_profile == 'print'
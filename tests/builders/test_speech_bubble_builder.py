@@ -0,0 +1,35 @@
+import io
+import pytest
+from PIL import Image
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from src.builders.content.speech_bubble_builder import SpeechBubbleBuilder
+from src.services.content_ir_service import SpeechBubbleNode
+from src.services.image_registry_service import ImageRegistryService
+from src.services.layout_cache_service import LayoutCacheService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+@pytest.fixture
+def config_values(config_values, tmp_path):
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (10, 10), "red").save(tmp_path / "images" / "avatar.png")
+    return {**config_values, "paths.resources": str(tmp_path)}
+
+def test_bubble_layout_is_built_once_and_drawn_in_both_passes(make_builder, mocker):
+    registry, layout_cache = ImageRegistryService(), LayoutCacheService()
+    dry_canvas = pdf_canvas.Canvas(io.BytesIO(), pagesize=letter)
+    final_canvas = pdf_canvas.Canvas(io.BytesIO(), pagesize=letter)
+    registry.add_layout_canvas(dry_canvas)
+    builders = [make_builder(SpeechBubbleBuilder, canvas, image_registry=registry, layout_cache=layout_cache)
+                for canvas in (dry_canvas, final_canvas)]
+    create_table_spy = mocker.spy(SpeechBubbleBuilder, "_create_layout_table")
+    bubble = SpeechBubbleNode("Hello!", avatar_src="avatar.png", width="60%", text_weight="Bold")
+
+    for builder in builders:
+        builder.estimate_speech_bubble_height(bubble)
+        builder.add_speech_bubble(bubble, 100)
+        assert registry.decode_count == (0 if builder.canvas is dry_canvas else 1)
+
+    assert create_table_spy.call_count == 1
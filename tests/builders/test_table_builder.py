@@ -0,0 +1,167 @@
+import pytest
+from unittest.mock import MagicMock
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.enums import TA_RIGHT
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Table
+
+from src.builders.content.table_builder import TableBuilder
+from src.services.table_source_service import TableSourceService
+
+B, E = TableBuilder.BODY_CELL, TableBuilder.EMPHASIZED_CELL
+
+@pytest.fixture
+def table_builder():
+    mock_config = MagicMock()
+    mock_config.get.return_value = 50
+    return TableBuilder(MagicMock(), letter, MagicMock(), mock_config)
+
+def test_first_block_is_all_header_cells(table_builder):
+    grid = table_builder._build_cell_grid(0, [], [["a", "b"]])
+    assert grid == [[E, E]]
+
+def test_background_ranges_are_rasterised(table_builder):
+    data = [["", "", "", ""], ["", "", "", ""]]
+    style = [
+        ["BACKGROUND", [0, 0], [0, 1], "lightblue"],
+        ["BACKGROUND", [2, 1], [-1, -1], "pink"],
+        ["BACKGROUND", [1, 0], [3, 0], "ltgrey"],
+        ["GRID", [0, 0], [-1, -1], 0.5, "grey"],
+    ]
+
+    grid = table_builder._build_cell_grid(1, style, data)
+
+    assert grid == [[E, B, B, B],
+                    [E, B, E, E]]
+
+def test_cell_styles_are_created_once_per_kind(table_builder):
+    first = table_builder._get_cell_style(E)
+    second = table_builder._get_cell_style(E)
+    table_builder._get_cell_style(B)
+
+    assert first is second
+    assert table_builder.style_manager.prepare_style.call_count == 2
+
+def test_fit_rows_respects_available_height_and_spans():
+    row_heights = [10, 10, 10, 10]
+
+    assert TableBuilder._fit_rows(row_heights, 0, 35, set()) == 3
+    assert TableBuilder._fit_rows(row_heights, 0, 35, {3}) == 2
+    assert TableBuilder._fit_rows(row_heights, 1, 5, set()) == 1
+
+def test_slice_style_cmds_renumbers_rows(table_builder):
+    cmds = [("GRID", (0, 0), (-1, -1), 0.5, "grey"), ("SPAN", (0, 1), (0, 2)), ("BACKGROUND", (0, 5), (0, 6), "pink")]
+
+    sliced = table_builder._slice_style_cmds(cmds, 2, 4, 8)
+
+    assert sliced == [("GRID", (0, 0), (-1, 1), 0.5, "grey"), ("SPAN", (0, 0), (0, 0))]
+    assert table_builder._get_blocked_breaks(cmds, 8) == {2}
+
+def test_long_table_is_split_across_pages_with_repeated_header(mocker):
+    mock_config = MagicMock()
+    mock_config.get.return_value = 50
+    style_manager = MagicMock()
+    style_manager.prepare_style.return_value = ParagraphStyle("cell", fontSize=9, leading=11)
+    style_manager.normalize_markup.side_effect = str
+    builder = TableBuilder(MagicMock(), letter, style_manager, mock_config)
+    place_spy = mocker.spy(builder, "_place_table")
+    on_page_break = MagicMock(return_value=60)
+
+    data = [[["Header"]], [[f"Row {i}"] for i in range(100)]]
+    end_pos = builder.add_table(data, [[], []], current_pos=600, block_column_widths=[["100%"], ["100%"]],
+                                on_page_break=on_page_break)
+
+    placed_tables = [call.args[0] for call in place_spy.call_args_list]
+    header_draws = [table for table in placed_tables if table is placed_tables[0]]
+    body_rows = sum(len(table._cellvalues) for table in placed_tables if table is not placed_tables[0])
+    assert on_page_break.call_count >= 3
+    assert len(header_draws) == on_page_break.call_count + 1
+    assert body_rows == 100
+    assert end_pos < letter[1]
+
+def test_split_table_measures_every_row_once(mocker):
+    mock_config = MagicMock()
+    mock_config.get.return_value = 50
+    style_manager = MagicMock()
+    style_manager.prepare_style.return_value = ParagraphStyle("cell", fontSize=9, leading=11)
+    style_manager.normalize_markup.side_effect = str
+    builder = TableBuilder(MagicMock(), letter, style_manager, mock_config)
+    wrap_spy = mocker.spy(Table, "wrapOn")
+
+    data = [[["Header"]], [[f"Row {i}"] for i in range(100)]]
+    builder.add_table(data, [[], []], current_pos=600, block_column_widths=[["100%"], ["100%"]],
+                      on_page_break=MagicMock(return_value=60))
+
+    measured = [call.args[0] for call in wrap_spy.call_args_list if call.args[3] == float('inf')]
+    assert sum(len(table._cellvalues) for table in measured) == 100
+    assert max(len(table._cellvalues) for table in measured) <= TableBuilder.MEASURE_ROWS
+
+def test_source_table_streams_chunks_under_one_header(tmp_path, mocker):
+    (tmp_path / "numbers.csv").write_text("Name,Value\n" + "".join(f"n{i},{i}\n" for i in range(30)))
+    mocker.patch.object(TableSourceService, "_instance", TableSourceService())
+    mocker.patch.object(TableSourceService, "CHUNK_ROWS", 12)
+    mock_config = MagicMock()
+    mock_config.get.side_effect = lambda key, fallback=None: str(tmp_path) if key == "paths.resources" else 50
+    style_manager = MagicMock()
+    style_manager.prepare_style.side_effect = lambda name, **kwargs: ParagraphStyle(name, **kwargs)
+    style_manager.normalize_markup.side_effect = str
+    builder = TableBuilder(MagicMock(), letter, style_manager, mock_config)
+    place_spy = mocker.spy(builder, "_place_table")
+
+    builder.add_table(None, source="numbers.csv", current_pos=100, on_page_break=MagicMock(return_value=60))
+
+    row_counts = [len(call.args[0]._cellvalues) for call in place_spy.call_args_list]
+    assert row_counts == [1, 12, 12, 6]
+    assert builder._cell_styles[TableBuilder.NUMERIC_CELL].alignment == TA_RIGHT
+
+def test_source_table_columns_use_the_width_solver(tmp_path, mocker):
+    (tmp_path / "verbs.csv").write_text("Verb,Example\n" + "".join(f"go{i},a much longer example sentence {i}\n" for i in range(5)))
+    mocker.patch.object(TableSourceService, "_instance", TableSourceService(str(tmp_path / "cache")))
+    mock_config = MagicMock()
+    mock_config.get.side_effect = lambda key, fallback=None: str(tmp_path) if key == "paths.resources" else 50
+    style_manager = MagicMock()
+    style_manager.prepare_style.side_effect = lambda name, **kwargs: ParagraphStyle(name, **kwargs)
+    builder = TableBuilder(MagicMock(), letter, style_manager, mock_config)
+    solver_spy = mocker.spy(TableBuilder, "_solve_column_widths")
+    table_sources = TableSourceService.get_instance()
+    source_path = str(tmp_path / "verbs.csv")
+    profile = table_sources.get_profile(source_path)
+
+    widths = builder._get_source_column_widths(table_sources, source_path, profile, [])
+    table_sources.save()
+    # A new process reads the widths of the unchanged file from the persisted profile
+    reloaded = TableSourceService(str(tmp_path / "cache"))
+    again = builder._get_source_column_widths(reloaded, source_path, reloaded.get_profile(source_path), [])
+
+    assert sum(widths) == pytest.approx(letter[0] - 100)
+    assert widths[1] > widths[0]
+    assert again == widths
+    assert solver_spy.call_count == 1
+
+@pytest.mark.parametrize("min_widths, preferred_widths, expected", [
+    ([10, 10], [20, 60], [50, 150]),     # everything fits: stretched in proportion
+    ([40, 80], [100, 200], [200 / 3, 400 / 3]), # between minimum and preferred
+    ([100, 300], [200, 400], [50, 150]), # minimum too wide: scaled down
+])
+def test_solve_column_widths(min_widths, preferred_widths, expected):
+    assert TableBuilder._solve_column_widths(min_widths, preferred_widths, 200) == pytest.approx(expected)
+
+def test_auto_column_widths_are_cached_and_shared_by_blocks(mocker):
+    mock_config = MagicMock()
+    mock_config.get.return_value = 50
+    style_manager = MagicMock()
+    style_manager.prepare_style.side_effect = lambda name, **kwargs: ParagraphStyle(name, **kwargs)
+    builder = TableBuilder(MagicMock(), letter, style_manager, mock_config)
+    mocker.patch.object(TableBuilder, "_column_width_cache", {})
+    measure_spy = mocker.patch("src.builders.content.table_builder.measure_text_widths",
+                               side_effect=lambda text, font, size: (len(text), 5 * len(text)))
+    data = [[["Word", "A much longer text"]], [["x", "y"], ["<b>bold</b>", "z"]]]
+
+    widths = builder._get_auto_column_widths(data, [[], []])
+    again = TableBuilder(MagicMock(), letter, style_manager, mock_config)._get_auto_column_widths(data, [[], []])
+
+    assert widths[0] == widths[1]
+    assert sum(widths[0]) == pytest.approx(letter[0] - 100)
+    assert widths[0][1] > widths[0][0]
+    assert again == widths
+    assert measure_spy.call_count == 6
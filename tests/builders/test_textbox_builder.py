@@ -0,0 +1,21 @@
+from unittest.mock import MagicMock
+
+from src.builders.content.textbox_builder import TextBoxBuilder
+from src.services.content_ir_service import TextBoxNode, TextNode
+from src.services.layout_cache_service import LayoutCacheService
+
+def test_textbox_is_measured_once_across_estimate_draw_and_passes(make_builder, mocker):
+    layout_cache = LayoutCacheService()
+    dry_builder = make_builder(TextBoxBuilder, image_registry=MagicMock(), layout_cache=layout_cache)
+    final_builder = make_builder(TextBoxBuilder, image_registry=MagicMock(), layout_cache=layout_cache)
+    layout_spy = mocker.spy(TextBoxBuilder, "_layout_textbox")
+    textbox = TextBoxNode((TextNode("First paragraph", font_weight="Bold"), TextNode("• A bullet item", font_weight="Bold")),
+                          width="80%")
+
+    estimate = dry_builder.estimate_textbox_height(textbox)
+    dry_pos = dry_builder.add_textbox(textbox, 100)
+    final_builder.estimate_textbox_height(textbox)
+    final_pos = final_builder.add_textbox(textbox, 100)
+
+    assert layout_spy.call_count == 1
+    assert dry_pos == final_pos == 100 + estimate
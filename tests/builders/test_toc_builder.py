@@ -0,0 +1,88 @@
+import io
+import pytest
+from unittest.mock import MagicMock
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from src.builders.page_builders.toc_builder import TOCBuilder
+
+@pytest.fixture
+def content_builder():
+    content = MagicMock()
+    content.canvas = pdf_canvas.Canvas(io.BytesIO(), pagesize=letter)
+    content.page_size = letter
+    content.page_num = 5
+    content.current_pos = 0.0
+    content.text_builder.get_paragraph_height.return_value = 0
+    content.style_manager.get_style.return_value = ParagraphStyle(
+        "paragraph_default", fontName="Helvetica", fontSize=12, leading=16)
+
+    def start_from(pos):
+        content.current_pos = pos
+
+    def add_spacing(spacing):
+        content.current_pos += spacing
+
+    def new_page():
+        content.page_num += 1
+        content.current_pos = 0.0
+
+    content.start_from.side_effect = start_from
+    content.add_spacing.side_effect = add_spacing
+    content.new_page.side_effect = new_page
+    return content
+
+def make_entries(count):
+    return [{"title": f"Section {n} with a reasonably long descriptive title", "page": n + 7,
+             "anchor": f"section_{n}", "is_main_chapter": n % 10 == 0}
+            for n in range(count)]
+
+def test_large_toc_paginates_within_the_margins(content_builder, mock_config, mocker):
+    page_registry = MagicMock()
+    page_registry.get_toc_entries.return_value = make_entries(500)
+    builder = TOCBuilder(content_builder, MagicMock(), "en", mock_config, page_registry)
+    bottom_limit = letter[1] - 50
+    positions = []
+    draw_entry = builder._draw_entry
+
+    def record_position(*args):
+        positions.append(letter[1] - args[-1])
+        draw_entry(*args)
+
+    builder._draw_entry = record_position
+    layout_spy = mocker.spy(builder, "_layout_entries")
+    wrap_spy = mocker.spy(TOCBuilder, "_wrap_title")
+    builder.build(toc_data={"title": "Contents"})
+
+    assert len(positions) == 500
+    assert all(pos + 16 <= bottom_limit for pos in positions)
+    # 19pt per entry: 35 entries on the first page (below the title), then 36 per page
+    assert content_builder.page_num - 5 == 14
+    page_registry.register_section.assert_called_once_with("toc", "Contents", 5, 18, "toc")
+    assert builder.count_pages(make_entries(500), "Contents") == 14
+    # Every title is wrapped once, and counting the pages again reuses the layout
+    assert layout_spy.call_count == 1
+    assert wrap_spy.call_count == 500
+    content_builder.add_paragraph.assert_called_once()  # Only the TOC title is a Paragraph
+
+def test_long_titles_wrap_before_the_page_number_column(content_builder, mock_config):
+    builder = TOCBuilder(content_builder, MagicMock(), "en", mock_config, MagicMock())
+    title = "A very long chapter title " * 8
+
+    (_, lines, height), = builder._layout_entries([{"title": title, "page": 1, "anchor": "a"}], 500)
+
+    assert len(lines) > 1
+    assert height == 16 * len(lines)
+    assert " ".join(lines) == title.strip()
+
+def test_entries_of_sections_outside_the_document_are_not_linked(content_builder, mock_config):
+    builder = TOCBuilder(content_builder, MagicMock(), "en", mock_config, MagicMock())
+    builder.linked_anchors = {"one"}
+    canvas = MagicMock()
+    canvas.stringWidth.return_value = 10
+
+    for anchor in ("one", "two"):
+        builder._draw_entry(canvas, {"title": anchor, "page": 7, "anchor": anchor}, [anchor], 50, 500, 700)
+
+    assert [call.args[1] for call in canvas.linkRect.call_args_list] == ["one"]
@@ -0,0 +1,51 @@
+import os
+from unittest.mock import MagicMock
+
+from src.builders.web_builder import WebBuilder, render_web_chapter
+from src.services.content_ir_service import ImageNode, ParagraphNode
+
+def test_chapter_is_split_into_pages_under_the_size_budget(tmp_path):
+    content = tuple(ParagraphNode(f"Paragraph {index} " + "x" * 80) for index in range(10))
+
+    pages = render_web_chapter("1. Beyond the Rules", "beyond_the_rules", content, {}, str(tmp_path), {}, 300)
+
+    assert [item_count for _, item_count in pages] == [2, 3, 3, 2]
+    assert pages[0][0].startswith('<h1 id="beyond_the_rules">')
+    assert all(len(body.encode('utf-8')) <= 300 for body, _ in pages)
+
+def test_images_get_their_responsive_attributes(tmp_path):
+    content = (ParagraphNode("x" * 500), ImageNode("ch1.png"))
+    image_urls = {"ch1.png": {"src": "images/ch1-1280w.jpg", "srcset": "images/ch1-640w.jpg 640w, images/ch1-1280w.jpg 1280w",
+                              "loading": "lazy"}}
+
+    pages = render_web_chapter("", "ch_1", content, {}, str(tmp_path), image_urls, 100)
+
+    assert len(pages) == 2
+    assert pages[1][0].startswith('<figure class="center"><img src="images/ch1-1280w.jpg" '
+                               'srcset="images/ch1-640w.jpg 640w, images/ch1-1280w.jpg 1280w" loading="lazy" alt=""')
+
+def test_files_of_earlier_builds_are_removed(tmp_path):
+    for name in ("ch_1.html", "ch_1-2.html", "index.html", "style.css"):
+        (tmp_path / name).touch()
+
+    WebBuilder._remove_stale_files(str(tmp_path), {"ch_1.html", "index.html"}, suffix='.html')
+
+    assert sorted(os.listdir(tmp_path)) == ["ch_1.html", "index.html", "style.css"]
+
+def test_images_of_the_same_name_get_their_own_files(mocker, tmp_path):
+    builder = WebBuilder.__new__(WebBuilder)  # Without fonts, styles and book data
+    builder.images_dir = 'images'
+    builder.image_derivatives = [MagicMock()]
+    # The TIFF is converted into a JPEG
+    builder.image_derivatives[0].resolve.side_effect = lambda path: path.replace('.tiff', '.jpg')
+    image_metadata = mocker.patch('src.builders.web_builder.ImageMetadataService.get_instance').return_value
+    image_metadata.get_size.return_value = (640, 480)
+    mocker.patch.object(WebBuilder, '_copy_file')
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "old-640w.png").touch()
+
+    image_urls = builder._prepare_images(["a.png", "a.jpg", "a.tiff"], str(tmp_path))
+
+    assert [urls['src'] for urls in image_urls.values()] == ["images/a-640w.png", "images/a-640w.jpg",
+                                                              "images/a.tiff-640w.jpg"]
+    assert os.listdir(tmp_path / "images") == []  # Copying is mocked, so only the old image was there
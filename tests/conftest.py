@@ -0,0 +1,58 @@
+import io
+import pytest
+from unittest.mock import MagicMock
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from src.services.image_metadata_service import ImageMetadataService
+
+@pytest.fixture
+def metadata_service(mocker):
+    """
+    Uses an in-memory ImageMetadataService, so a test neither reads nor writes the on-disk cache.
+    Modules whose code under test looks up image sizes apply it to every test with pytestmark.
+    """
+    service = ImageMetadataService()
+    mocker.patch.object(ImageMetadataService, "_instance", service)
+    return service
+
+@pytest.fixture
+def config_values():
+    """
+    The configuration of the builder tests. A module that needs other values overrides
+    this fixture, extending the defaults (e.g. with 'paths.resources' under tmp_path).
+    """
+    return {
+        "common.padding.horizontal": 50,
+        "common.padding.vertical": 50,
+        "paths.resources": "/resources",
+        "fonts.main": "Helvetica",
+    }
+
+@pytest.fixture
+def mock_config(config_values):
+    mock_instance = MagicMock()
+    mock_instance.get.side_effect = lambda key, fallback=None: config_values.get(key, fallback)
+    return mock_instance
+
+@pytest.fixture
+def style_manager():
+    mock_instance = MagicMock()
+    mock_instance.get_style.return_value = ParagraphStyle("paragraph_default", fontName="Helvetica",
+                                                          fontSize=12, leading=16)
+    mock_instance.prepare_style.side_effect = lambda name, **kwargs: ParagraphStyle(name, **kwargs)
+    mock_instance._parse_color.return_value = colors.black
+    return mock_instance
+
+@pytest.fixture
+def make_builder(style_manager, mock_config):
+    """
+    Returns a factory of content builders on a letter page, drawing on the given canvas
+    or a new in-memory one. Keyword arguments are passed on to the builder.
+    """
+    def make(builder_class, canvas=None, **kwargs):
+        canvas = canvas or pdf_canvas.Canvas(io.BytesIO(), pagesize=letter)
+        return builder_class(canvas, letter, style_manager, mock_config, **kwargs)
+    return make
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib import colors
 
 from src.services.config_service import ConfigService
 from src.managers.style_manager import StyleManager
@@ -117,4 +118,42 @@ def test_register_styles_handles_main_exception(mock_logger_error, mock_config_s
 
     assert result is False
     mock_logger_error.assert_called_once()
-    assert "Style registration failed" in mock_logger_error.call_args[0][0]
\ No newline at end of file
+    assert "Style registration failed" in mock_logger_error.call_args[0][0]
+
+def test_black_and_white_maps_color_map_to_gray(mock_config_service):
+    style_manager = StyleManager(black_and_white=True)
+    assert style_manager.get_color_map()['white'] == '#FFFFFF'
+    assert style_manager.get_color_map()['black'] == '#000000'
+    assert style_manager.get_color_map()['red'] == '#4C4C4C'
+
+def test_black_and_white_parse_color_returns_gray(mock_config_service):
+    style_manager = StyleManager(black_and_white=True)
+    for color_spec in ['lightgreen', '#3366CC', 'orange']:
+        color = style_manager._parse_color(color_spec)
+        assert color.red == color.green == color.blue
+
+def test_color_mode_keeps_colors(mock_config_service):
+    style_manager = StyleManager()
+    assert style_manager._parse_color('red') == colors.HexColor('#FF0000')
+    assert style_manager._parse_color(None) is None
+
+def test_normalize_markup_replaces_color_attributes(mock_config_service):
+    style_manager = StyleManager()
+    text = """<font color='red'>a</font> <font backColor="lightyellow">b</font> <backColor='ltgrey'>c"""
+
+    assert style_manager.normalize_markup(text) == (
+        """<font color='#FF0000'>a</font> <font backColor="#FFFFE0">b</font> <backColor='#EEEEEE'>c""")
+
+def test_normalize_markup_keeps_unknown_names_and_text(mock_config_service):
+    style_manager = StyleManager()
+    text = "<font color='orange'>red</font> lightblue"
+
+    assert style_manager.normalize_markup(text) == text
+
+def test_normalize_markup_is_cached_and_gray_in_black_and_white(mock_config_service, mocker):
+    style_manager = StyleManager(black_and_white=True)
+    sub_spy = mocker.spy(style_manager, "_replace_color_attribute")
+
+    assert style_manager.normalize_markup("<font color='red'>x</font>") == "<font color='#4C4C4C'>x</font>"
+    style_manager.normalize_markup("<font color='red'>x</font>")
+    assert sub_spy.call_count == 1
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.services.content_ir_service import (ContentIRService, ImageNode, ListItemNode, ListNode, ParagraphNode,
+                                             TableNode, TextBoxNode, TextNode)
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+BOOK = {
+    'title': {'title': 'Title', 'subtitle': 'Sub'},
+    'copyright': {'author': 'Me'},
+    'dedicate': None,
+    'preface': {'title': 'Előszó', 'content': [{'type': 'paragraph', 'text': '<font color="red">Hi</font>'}]},
+    'chapters': {
+        'ch_10': {'title': 'Ten', 'content': []},
+        'ch_2': {'title': 'Túl a szabályokon', 'content': [
+            {'type': 'list', 'items': [{'text': 'a', 'sub_items': ['<font color="red">b</font>']}]},
+            {'type': 'table', 'data': [[['<font color="red">x</font>']]], 'style': [[]]},
+            {'type': 'textbox', 'content': ['<font color="red">y</font>', {'type': 'text', 'text': 'z'}]},
+            {'type': 'image', 'src': 'missing.png'},
+        ]},
+    },
+}
+
+@pytest.fixture
+def service():
+    return ContentIRService()
+
+@pytest.fixture
+def style_manager():
+    style_manager = MagicMock()
+    style_manager.get_color_map.return_value = {'red': '#FF0000'}
+    style_manager.normalize_markup.side_effect = lambda text: text.replace('"red"', '"#FF0000"')
+    return style_manager
+
+def _data_manager(book):
+    data_manager = MagicMock()
+    data_manager.get_data.return_value = book
+    return data_manager
+
+def test_sections_are_compiled_in_build_order_with_anchors(service, style_manager, tmp_path):
+    book = service.compile(_data_manager(BOOK), 'hu', style_manager, str(tmp_path))
+
+    assert [section.key for section in book.sections] == ['title', 'copyright', 'preface',
+                                                          'chapters.ch_2', 'chapters.ch_10']
+    assert book.get_section('chapters.ch_2').anchor == 'tul_a_szabalyokon'
+    assert book.get_data('hu', 'chapters.ch_2')['anchor'] == 'tul_a_szabalyokon'
+    assert book.get_data('hu', 'title.subtitle') == 'Sub'
+    assert book.get_data('hu', 'toc') == {}
+    assert book.images == ['missing.png']
+
+def test_markup_is_normalised_and_the_source_is_untouched(service, style_manager, tmp_path):
+    book = service.compile(_data_manager(BOOK), 'hu', style_manager, str(tmp_path))
+
+    assert book.get_data('hu', 'preface')['content'] == (ParagraphNode('<font color="#FF0000">Hi</font>'),)
+    list_node, table, textbox, image = book.get_data('hu', 'chapters.ch_2')['content']
+    assert list_node == ListNode((ListItemNode('a', (ListItemNode('<font color="#FF0000">b</font>'),)),))
+    assert table == TableNode(data=((('<font color="#FF0000">x</font>',),),), style=((),))
+    assert textbox == TextBoxNode((TextNode('<font color="#FF0000">y</font>'), TextNode('z')))
+    assert image == ImageNode('missing.png')
+    assert BOOK['preface']['content'][0]['text'] == '<font color="red">Hi</font>'
+
+def test_same_content_is_compiled_once(service, style_manager, tmp_path):
+    first = service.compile(_data_manager(BOOK), 'hu', style_manager, str(tmp_path))
+    second = service.compile(_data_manager(BOOK), 'hu', style_manager, str(tmp_path))
+
+    assert first is second
+    assert style_manager.normalize_markup.call_count == 6
+
+    style_manager.get_color_map.return_value = {'red': '#777777'}
+    assert service.compile(_data_manager(BOOK), 'hu', style_manager, str(tmp_path)) is not first
+
+def test_text_box_elements_inherit_the_text_styles_of_the_box(service, style_manager, tmp_path):
+    book = {'chapters': {'ch_1': {'title': 'One', 'content': [
+        {'type': 'textbox', 'font_size': 12, 'text_color': 'blue',
+         'content': ['a', {'text': 'b', 'text_color': 'green'}]},
+        {'type': 'video', 'src': 'clip.mp4'},
+    ]}}}
+
+    compiled = service.compile(_data_manager(book), 'hu', style_manager, str(tmp_path))
+
+    # The unknown 'video' is skipped
+    assert compiled.get_data('hu', 'chapters.ch_1')['content'] == (TextBoxNode((TextNode('a', font_size=12, text_color='blue'),
+                                    TextNode('b', font_size=12, text_color='green'))),)
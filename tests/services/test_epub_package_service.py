@@ -0,0 +1,52 @@
+import zipfile
+import xml.etree.ElementTree as ET
+from PIL import Image
+
+from src.services.epub_package_service import EpubPackageService
+
+def _write_package(tmp_path, image_path):
+    package = EpubPackageService(str(tmp_path / "book.epub"))
+    package.open()
+    package.add_stylesheet('style.css', 'body {}')
+    package.add_document('ch-1', 'ch_1.xhtml', '<html xmlns="http://www.w3.org/1999/xhtml"><body/></html>')
+    assert package.add_image(str(image_path), 'images/a.png')
+    assert package.add_image(str(image_path), 'images/a.png')
+    assert not package.add_image(str(tmp_path / "missing.png"), 'images/missing.png')
+    package.close({'identifier': 'ISBN 1', 'title': 'Book & Co', 'author': 'Me'}, [('Chapter 1', 'ch_1.xhtml')], 'en')
+    return tmp_path / "book.epub"
+
+def test_mimetype_is_the_first_uncompressed_entry(tmp_path):
+    image_path = tmp_path / "a.png"
+    Image.new('RGB', (4, 4)).save(image_path)
+
+    with zipfile.ZipFile(_write_package(tmp_path, image_path)) as zf:
+        first = zf.infolist()[0]
+        assert first.filename == 'mimetype'
+        assert first.compress_type == zipfile.ZIP_STORED
+        assert zf.read('mimetype') == b'application/epub+zip'
+
+def test_images_are_stored_once_and_listed_in_the_manifest(tmp_path):
+    image_path = tmp_path / "a.png"
+    Image.new('RGB', (4, 4)).save(image_path)
+
+    with zipfile.ZipFile(_write_package(tmp_path, image_path)) as zf:
+        names = zf.namelist()
+        assert names.count('OEBPS/images/a.png') == 1
+        assert zf.getinfo('OEBPS/images/a.png').compress_type == zipfile.ZIP_STORED
+
+        package = ET.fromstring(zf.read('OEBPS/content.opf'))
+        ns = {'opf': 'http://www.idpf.org/2007/opf'}
+        hrefs = [item.get('href') for item in package.iterfind('opf:manifest/opf:item', ns)]
+        spine = [item.get('idref') for item in package.iterfind('opf:spine/opf:itemref', ns)]
+        assert hrefs == ['style.css', 'ch_1.xhtml', 'images/a.png', 'nav.xhtml']
+        assert spine == ['ch-1']
+        ET.fromstring(zf.read('OEBPS/nav.xhtml'))
+
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_abort_leaves_no_file(tmp_path):
+    package = EpubPackageService(str(tmp_path / "book.epub"))
+    package.open()
+    package.abort()
+
+    assert list(tmp_path.iterdir()) == []
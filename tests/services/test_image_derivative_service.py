@@ -0,0 +1,145 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from PIL import Image
+
+from src.services.image_derivative_service import ImageDerivativeService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+@pytest.fixture
+def mock_config(tmp_path):
+    config_values = {
+        "paths.cache_dir": str(tmp_path / "cache"),
+        "images.workers": 1,
+        "images.profiles.screen.dpi": 72,
+    }
+    mock_instance = MagicMock()
+    mock_instance.get.side_effect = lambda key, fallback=None: config_values.get(key, fallback)
+    return mock_instance
+
+@pytest.fixture
+def large_image(tmp_path):
+    path = tmp_path / "large.png"
+    Image.new("RGB", (400, 200), "green").save(path)
+    return str(path)
+
+def test_record_placement_keeps_largest_size(mock_config, large_image):
+    service = ImageDerivativeService(mock_config, "screen")
+    service.record_placement(large_image, 100, 50)
+    service.record_placement(large_image, 80, 60)
+
+    assert service.placements[large_image] == (100, 60)
+
+def test_prepare_downsamples_to_profile_dpi(mock_config, large_image):
+    service = ImageDerivativeService(mock_config, "screen")
+    service.record_placement(large_image, 100, 50)
+    service.prepare()
+
+    derivative = service.resolve(large_image)
+    assert derivative != large_image
+    with Image.open(derivative) as img:
+        assert img.size == (100, 50)
+
+def test_prepare_can_be_limited_to_some_images(mock_config, large_image, tmp_path):
+    other_image = str(tmp_path / "other.png")
+    Image.new("RGB", (400, 200), "red").save(other_image)
+    service = ImageDerivativeService(mock_config, "screen")
+    service.record_placement(large_image, 100, 50)
+    service.record_placement(other_image, 100, 50)
+    service.prepare({other_image})
+
+    assert service.resolve(large_image) == large_image
+    assert service.resolve(other_image) != other_image
+
+def test_small_sources_are_not_upsampled(mock_config, large_image):
+    service = ImageDerivativeService(mock_config, "screen")
+    service.record_placement(large_image, 500, 250)
+    service.prepare()
+
+    assert service.resolve(large_image) == large_image
+
+def test_existing_derivatives_are_reused(mock_config, large_image, mocker):
+    first = ImageDerivativeService(mock_config, "screen")
+    first.record_placement(large_image, 100, 50)
+    first.prepare()
+
+    second = ImageDerivativeService(mock_config, "screen")
+    run_jobs_spy = mocker.spy(second, "_run_jobs")
+    second.record_placement(large_image, 100, 50)
+    second.prepare()
+
+    assert second.resolve(large_image) == first.resolve(large_image)
+    run_jobs_spy.assert_called_once_with([])
+
+def test_failed_resampling_falls_back_to_source(mock_config, large_image, mocker):
+    mocker.patch("src.services.image_derivative_service.resample_image", side_effect=OSError("disk full"))
+    service = ImageDerivativeService(mock_config, "screen")
+    service.record_placement(large_image, 100, 50)
+    service.prepare()
+
+    assert service.resolve(large_image) == large_image
+
+def test_profile_without_dpi_is_disabled(mock_config, large_image):
+    service = ImageDerivativeService(mock_config, "print")
+    service.record_placement(large_image, 100, 50)
+    service.prepare()
+
+    assert not service.enabled
+    assert not os.path.exists(service.derivatives_dir)
+
+def test_grayscale_derivatives_are_single_channel(mock_config, large_image):
+    service = ImageDerivativeService(mock_config, "print", grayscale=True)
+    service.record_placement(large_image, 500, 250)
+    service.prepare()
+
+    derivative = service.resolve(large_image)
+    assert derivative.endswith("_gray.png")
+    with Image.open(derivative) as img:
+        assert img.mode == "L"
+        assert img.size == (400, 200)
+
+@pytest.fixture
+def epub_config(tmp_path):
+    config_values = {
+        "paths.cache_dir": str(tmp_path / "cache"),
+        "images.workers": 1,
+        "images.profiles.kindle.max_width": 100,
+        "images.profiles.kindle.max_height": 100,
+        "images.profiles.kindle.format": "auto",
+        "images.profiles.kindle.quality": 70,
+        "images.profiles.kindle.grayscale": True,
+        "images.profiles.epub.format": "auto",
+    }
+    mock_instance = MagicMock()
+    mock_instance.get.side_effect = lambda key, fallback=None: config_values.get(key, fallback)
+    return mock_instance
+
+def test_size_limited_profile_converts_opaque_images_to_jpeg(epub_config, large_image):
+    service = ImageDerivativeService(epub_config, "kindle")
+    service.request(large_image)
+    service.prepare()
+
+    derivative = service.resolve(large_image)
+    assert derivative.endswith("_100x50_gray_q70.jpg")
+    with Image.open(derivative) as img:
+        assert (img.format, img.mode, img.size) == ("JPEG", "L", (100, 50))
+
+def test_transparent_images_stay_png(epub_config, tmp_path):
+    path = str(tmp_path / "alpha.png")
+    Image.new("RGBA", (400, 200), (255, 0, 0, 128)).save(path)
+    service = ImageDerivativeService(epub_config, "kindle")
+    service.request(path)
+    service.prepare()
+
+    with Image.open(service.resolve(path)) as img:
+        assert (img.format, img.mode, img.size) == ("PNG", "LA", (100, 50))
+
+def test_conversion_that_is_not_smaller_keeps_the_source(epub_config, tmp_path):
+    path = str(tmp_path / "flat.png")
+    Image.new("RGB", (40, 20), "white").save(path)
+    service = ImageDerivativeService(epub_config, "epub")
+    service.request(path)
+    service.prepare()
+
+    assert service.resolve(path) == path
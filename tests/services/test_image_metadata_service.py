@@ -0,0 +1,88 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from PIL import Image
+
+from src.services.config_service import ConfigService
+from src.services.image_metadata_service import ImageMetadataService
+
+@pytest.fixture(autouse=True)
+def cleanup_singleton():
+    """
+    Resets the ImageMetadataService singleton so tests do not share cached entries.
+    """
+    yield
+    ImageMetadataService._instance = None
+
+@pytest.fixture
+def image_file(tmp_path):
+    """Creates a small 40x20 RGB PNG with a DPI entry."""
+    path = tmp_path / "image.png"
+    Image.new("RGB", (40, 20), "red").save(path, dpi=(150, 150))
+    return str(path)
+
+def test_get_metadata_reads_header_values(image_file):
+    service = ImageMetadataService()
+    metadata = service.get_metadata(image_file)
+
+    assert metadata['width'] == 40
+    assert metadata['height'] == 20
+    assert metadata['mode'] == "RGB"
+    assert round(metadata['dpi'][0]) == 150
+    assert len(metadata['hash']) == 64
+
+def test_get_aspect_ratio_and_fallback(image_file, tmp_path):
+    service = ImageMetadataService()
+
+    assert service.get_aspect_ratio(image_file) == 0.5
+    assert service.get_aspect_ratio(str(tmp_path / "missing.png"), fallback=0.75) == 0.75
+    assert service.get_size(str(tmp_path / "missing.png")) is None
+
+def test_metadata_is_probed_only_once(image_file, mocker):
+    service = ImageMetadataService()
+    probe_spy = mocker.spy(service, "_probe")
+
+    service.get_metadata(image_file)
+    service.get_metadata(image_file)
+
+    assert probe_spy.call_count == 1
+
+def test_changed_file_is_probed_again(image_file):
+    service = ImageMetadataService()
+    assert service.get_size(image_file) == (40, 20)
+
+    Image.new("RGB", (30, 30), "blue").save(image_file)
+    stat = os.stat(image_file)
+    os.utime(image_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert service.get_size(image_file) == (30, 30)
+
+def test_save_and_reload_from_cache_dir(image_file, tmp_path, mocker):
+    cache_dir = str(tmp_path / "cache")
+    service = ImageMetadataService(cache_dir)
+    service.get_metadata(image_file)
+    service.save()
+
+    assert os.path.exists(os.path.join(cache_dir, ImageMetadataService.CACHE_FILE))
+
+    reloaded = ImageMetadataService(cache_dir)
+    probe_spy = mocker.spy(reloaded, "_probe")
+    assert reloaded.get_size(image_file) == (40, 20)
+    assert probe_spy.call_count == 0
+
+def test_corrupt_cache_file_is_ignored(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / ImageMetadataService.CACHE_FILE).write_text("not json")
+
+    service = ImageMetadataService(str(cache_dir))
+    assert service._entries == {}
+
+def test_get_instance_uses_configured_cache_dir(mocker, tmp_path):
+    mock_config = MagicMock()
+    mock_config.get.side_effect = lambda key, fallback=None: {"paths.cache_dir": str(tmp_path)}.get(key, fallback)
+    mocker.patch.object(ConfigService, "_instance", mock_config)
+
+    instance = ImageMetadataService.get_instance()
+    assert instance.cache_dir == str(tmp_path)
+    assert ImageMetadataService.get_instance() is instance
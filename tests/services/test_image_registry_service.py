@@ -0,0 +1,91 @@
+import io
+import pytest
+from PIL import Image
+from reportlab.pdfgen import canvas as pdf_canvas
+
+from src.services.image_registry_service import ImageRegistryService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+@pytest.fixture
+def avatar(tmp_path):
+    path = tmp_path / "avatar.png"
+    Image.new("RGB", (10, 10), "red").save(path)
+    return str(path)
+
+def make_canvas():
+    return pdf_canvas.Canvas(io.BytesIO())
+
+def test_repeated_draws_decode_and_embed_once(avatar, mocker):
+    registry = ImageRegistryService()
+    canvas = make_canvas()
+    begin_form_spy = mocker.spy(canvas, "beginForm")
+
+    for i in range(5):
+        registry.draw_image(canvas, avatar, 10 * i, 10, 20, 20)
+
+    assert registry.decode_count == 1
+    assert begin_form_spy.call_count == 1
+    canvas.save()
+
+def test_each_canvas_gets_its_own_form_but_shares_the_decode(avatar, mocker):
+    registry = ImageRegistryService()
+    first, second = make_canvas(), make_canvas()
+    second_begin_form_spy = mocker.spy(second, "beginForm")
+
+    registry.draw_image(first, avatar, 0, 0, 20, 20)
+    registry.draw_image(second, avatar, 0, 0, 20, 20)
+
+    assert registry.decode_count == 1
+    assert second_begin_form_spy.call_count == 1
+    first.save()
+    second.save()
+
+def test_identical_files_share_a_form(avatar, tmp_path, mocker):
+    copy_path = tmp_path / "copy.png"
+    copy_path.write_bytes(open(avatar, 'rb').read())
+    registry = ImageRegistryService()
+    canvas = make_canvas()
+    begin_form_spy = mocker.spy(canvas, "beginForm")
+
+    registry.draw_image(canvas, avatar, 0, 0, 20, 20)
+    registry.draw_image(canvas, str(copy_path), 0, 0, 20, 20)
+
+    assert begin_form_spy.call_count == 1
+    canvas.save()
+
+def test_resolve_and_placement_use_derivative_service(avatar, mocker):
+    derivatives = mocker.MagicMock()
+    derivatives.resolve.return_value = "/cache/avatar_small.png"
+    registry = ImageRegistryService(derivatives)
+
+    registry.record_placement(avatar, 20, 20)
+
+    derivatives.record_placement.assert_called_once_with(avatar, 20, 20)
+    assert registry.resolve(avatar) == "/cache/avatar_small.png"
+
+def test_layout_canvases_are_skipped(avatar, mocker):
+    registry = ImageRegistryService()
+    canvas = make_canvas()
+    registry.add_layout_canvas(canvas)
+    do_form_spy = mocker.spy(canvas, "doForm")
+
+    registry.draw_image(canvas, avatar, 0, 0, 20, 20)
+
+    assert registry.decode_count == 0
+    assert do_form_spy.call_count == 0
+
+def test_placeholders_are_drawn_without_decoding(avatar, mocker):
+    registry = ImageRegistryService(placeholders=True)
+    canvas = make_canvas()
+    rect_spy = mocker.spy(canvas, "rect")
+    begin_form_spy = mocker.spy(canvas, "beginForm")
+
+    registry.draw_image(canvas, avatar, 10, 20, 40, 20, preserve_aspect_ratio=True)
+
+    assert registry.decode_count == 0
+    begin_form_spy.assert_not_called()
+    # The 10x10 image keeps its aspect ratio, centered in the 40x20 box
+    rect_spy.assert_called_once()
+    assert rect_spy.call_args.args == pytest.approx((20, 20, 20, 20))
+    canvas.save()
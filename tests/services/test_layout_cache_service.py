@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock
+
+from src.services.layout_cache_service import LayoutCacheService
+
+def test_layout_is_created_once_per_content_and_width():
+    cache = LayoutCacheService()
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = cache.get_or_create("textbox", {"content": ["a"], "width": "50%"}, 200, factory)
+    second = cache.get_or_create("textbox", {"width": "50%", "content": ["a"]}, 200, factory)
+
+    assert first is second
+    assert factory.call_count == 1
+    assert (cache.misses, cache.hits) == (1, 1)
+
+def test_different_width_or_kind_is_measured_again():
+    cache = LayoutCacheService()
+    factory = MagicMock(side_effect=lambda: object())
+    data = {"content": ["a"]}
+
+    cache.get_or_create("textbox", data, 200, factory)
+    cache.get_or_create("textbox", data, 300, factory)
+    cache.get_or_create("speech_bubble", data, 200, factory)
+
+    assert factory.call_count == 3
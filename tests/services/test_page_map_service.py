@@ -0,0 +1,58 @@
+import pytest
+from PIL import Image
+
+from src.services.page_map_service import PageMapService
+from src.services.page_registry_service import PageRegistryService
+
+pytestmark = pytest.mark.usefixtures("metadata_service")
+
+@pytest.fixture
+def resources_dir(tmp_path):
+    (tmp_path / "images").mkdir()
+    Image.new("RGB", (400, 200), "green").save(tmp_path / "images" / "figure.png")
+    return tmp_path
+
+SECTIONS = {
+    "preface": {"title": "Preface", "content": [{"type": "paragraph", "text": "Hello"}]},
+    "chapters.ch1": {"title": "Chapter 1", "content": [{"type": "image", "src": "figure.png"}]},
+}
+
+def make_page_map(tmp_path, resources_dir, settings=None):
+    return PageMapService(str(tmp_path / "book.pagemap.json"), str(resources_dir), settings or {"short": False})
+
+def save_build(page_map):
+    registry = PageRegistryService()
+    registry.register_section("preface", "Preface", 6, 7)
+    registry.register_section("chapters.ch1", "Chapter 1", 8, 10)
+    section_hashes = {key: page_map.hash_section(data) for key, data in SECTIONS.items()}
+    page_map.save(registry, {"preface": 2, "chapters.ch1": 3}, section_hashes, {"/images/figure.png": (100, 50)})
+    return section_hashes
+
+def test_unchanged_build_reuses_the_page_counts(tmp_path, resources_dir):
+    section_hashes = save_build(make_page_map(tmp_path, resources_dir))
+
+    page_counts, placements = make_page_map(tmp_path, resources_dir).load_page_counts(section_hashes)
+
+    assert page_counts == {"preface": 2, "chapters.ch1": 3}
+    assert placements == {"/images/figure.png": (100, 50)}
+
+def test_changed_content_settings_or_image_size_invalidate_the_page_map(tmp_path, resources_dir):
+    save_build(make_page_map(tmp_path, resources_dir))
+    page_map = make_page_map(tmp_path, resources_dir)
+
+    edited = dict(SECTIONS, preface={"title": "Preface", "content": []})
+    assert page_map.load_page_counts({key: page_map.hash_section(data) for key, data in edited.items()}) is None
+
+    other_settings = make_page_map(tmp_path, resources_dir, {"short": True})
+    assert other_settings.load_page_counts(
+        {key: other_settings.hash_section(data) for key, data in SECTIONS.items()}) is None
+
+    Image.new("RGB", (400, 300), "green").save(resources_dir / "images" / "figure.png")
+    assert page_map.load_page_counts({key: page_map.hash_section(data) for key, data in SECTIONS.items()}) is None
+
+def test_missing_or_corrupt_page_map_is_ignored(tmp_path, resources_dir):
+    page_map = make_page_map(tmp_path, resources_dir)
+    assert page_map.load_page_counts({}) is None
+
+    (tmp_path / "book.pagemap.json").write_text("{not json")
+    assert page_map.load_page_counts({}) is None
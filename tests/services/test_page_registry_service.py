@@ -0,0 +1,67 @@
+from src.services.page_registry_service import PageRegistryService
+
+def make_registry():
+    registry = PageRegistryService()
+    registry.register_section('dedicate', 'Dedication', 4, 4)
+    registry.toc_position = 5
+    for n in range(32):
+        start = 6 + 3 * n
+        registry.register_section(f'chapters.ch{n}', f'Chapter {n}', start, start + 2)
+    return registry
+
+def test_toc_reservation_grows_to_a_fixed_point():
+    registry = make_registry()
+    layouts = []
+
+    def count_pages(entries):
+        # 10 entries per page, and three digit page numbers need an extra page
+        layouts.append([entry['page'] for entry in entries])
+        return -(-len(entries) // 10) + (1 if entries[-1]['page'] >= 100 else 0)
+
+    assert registry.resolve_toc_pages(count_pages) == 5
+    assert len(layouts) == 3
+    entries = registry.get_toc_entries()
+    assert entries[0]['page'] == 4
+    assert entries[1]['page'] == 6 + 4
+    assert entries[-1]['page'] == 99 + 4
+
+def test_toc_reservation_is_kept_when_the_toc_fits():
+    registry = make_registry()
+
+    assert registry.resolve_toc_pages(lambda entries: 1) == 1
+    assert registry.get_toc_entries()[1]['page'] == 6
+
+def test_page_and_anchor_lookups():
+    registry = make_registry()
+    registry.register_section('chapters.empty', 'Empty', 102, 101)
+    registry.register_section('cover', 'Cover', 1, 1)
+
+    assert registry.get_section_at(1)['name'] == 'cover'
+    assert registry.get_section_at(4)['name'] == 'dedicate'
+    assert registry.get_section_at(5) is None
+    assert registry.get_section_at(8)['name'] == 'chapters.ch0'
+    assert registry.get_section_at(101)['name'] == 'chapters.ch31'
+    assert registry.get_section_at(102) is None
+    assert registry.get_page_for_anchor('chapters.ch10') == 36
+    assert registry.get_page_for_anchor('missing') is None
+
+def test_shift_moves_later_sections_and_refreshes_entries():
+    registry = make_registry()
+    before = registry.get_toc_entries()
+
+    registry.shift_sections(36, 2)
+
+    assert registry.get_page_for_anchor('chapters.ch9') == 33
+    assert registry.get_page_for_anchor('chapters.ch10') == 38
+    assert registry.get_section_at(37) is None
+    assert registry.get_section_at(38)['name'] == 'chapters.ch10'
+    assert [entry['page'] for entry in registry.get_toc_entries()][10:12] == [33, 38]
+    assert before[11]['page'] == 36
+
+def test_first_registration_of_a_section_wins():
+    registry = make_registry()
+    registry.register_section('chapters.ch0', 'Chapter 0 again', 50, 52)
+
+    assert registry.get_section_at(6)['title'] == 'Chapter 0'
+    assert registry.get_section('chapters.ch0')['start_page'] == 6
+    assert len(registry.get_toc_entries()) == 33
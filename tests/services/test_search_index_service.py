@@ -0,0 +1,53 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from src.services.content_ir_service import (ImageNode, ListItemNode, ListNode, ParagraphNode, TableNode, TextBoxNode,
+                                             TextNode)
+from src.services.search_index_service import SearchIndexService, tokenize
+from src.utils.anchor_utils import generate_anchor_name
+
+@pytest.fixture
+def service(tmp_path):
+    config = MagicMock()
+    values = {"search.prefix_length": 2}
+    config.get.side_effect = lambda key, fallback=None: values.get(key, fallback)
+    return SearchIndexService(config, str(tmp_path))
+
+def test_terms_are_folded_like_anchor_names():
+    assert tokenize("Két igeidő, ŰBER_x") == ['ket', 'igeido', 'uber', 'x']
+    assert generate_anchor_name("Két igeidő") == '_'.join(tokenize("Két igeidő"))
+
+def test_every_text_is_indexed_with_its_positions(service, tmp_path):
+    service.add_section('ch_1', 'Two tenses', [
+        ('ch_1.html', (
+            ParagraphNode('The <b>past</b> tense'),
+            ListNode((ListItemNode('past', (ListItemNode('tense'),)),)),
+        )),
+        ('ch_1-2.html', (
+            TextBoxNode((TextNode('Past'), TextNode('simple'))),
+            TableNode(data=((('past', 'perfect'),),)),
+            ImageNode('past.png'),
+        )),
+    ])
+    service.add_section('ch_2', '', [('ch_2.html', (ParagraphNode('Past again'),))])
+
+    service.write(str(tmp_path / 'search'))
+
+    manifest = json.loads((tmp_path / 'search' / 'index.json').read_text())
+    assert manifest['shards'] == ['ag', 'pa', 'pe', 'si', 'te', 'th', 'tw']
+    assert manifest['sections'][0] == {'anchor': 'ch_1', 'title': 'Two tenses',
+                                       'pages': [['ch_1.html', 0], ['ch_1-2.html', 7]]}
+    shard = json.loads((tmp_path / 'search' / 'pa.json').read_text())
+    # Positions 3, 5, 7, 9 of the first section (delta encoded) and 0 of the second
+    assert shard == {'past': [[0, 3, 2, 2, 2], [1, 0]]}
+
+def test_shards_of_earlier_builds_are_removed(service, tmp_path):
+    index_dir = tmp_path / 'search'
+    index_dir.mkdir()
+    (index_dir / 'zz.json').write_text('{}')
+    service.add_section('ch_1', 'Title', [('ch_1.xhtml', [])])
+
+    service.write(str(index_dir))
+
+    assert sorted(path.name for path in index_dir.iterdir()) == ['index.json', 'ti.json']
@@ -0,0 +1,65 @@
+import os
+import pytest
+
+from src.services.table_source_service import TableSourceService
+
+@pytest.fixture(autouse=True)
+def cleanup_singleton():
+    """
+    Resets the TableSourceService singleton so tests do not share cached profiles.
+    """
+    yield
+    TableSourceService._instance = None
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "verbs.csv"
+    lines = ["Verb,Count,Ratio"] + [f"verb{i},{i},{i / 2}" for i in range(25)] + ["", "irregular,n/a,0.5"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_profile_infers_columns_and_types(csv_file):
+    service = TableSourceService()
+    profile = service.get_profile(csv_file)
+
+    assert profile['columns'] == ["Verb", "Count", "Ratio"]
+    assert profile['types'] == ["text", "text", "float"]
+    assert profile['rows'] == 26
+
+def test_rows_are_streamed_in_chunks(csv_file):
+    service = TableSourceService()
+    chunks = list(service.iter_row_chunks(csv_file, chunk_rows=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 6]
+    assert chunks[0][0] == ["verb0", "0", "0.0"]
+
+def test_profile_is_cached_and_persisted(csv_file, tmp_path, mocker):
+    cache_dir = str(tmp_path / "cache")
+    service = TableSourceService(cache_dir)
+    service.get_profile(csv_file)
+    service.save()
+    assert os.path.exists(os.path.join(cache_dir, TableSourceService.CACHE_FILE))
+
+    reloaded = TableSourceService(cache_dir)
+    scan_spy = mocker.spy(reloaded, "_scan")
+    assert reloaded.get_profile(csv_file)['rows'] == 26
+    assert scan_spy.call_count == 0
+
+def test_missing_and_unsupported_sources(tmp_path):
+    service = TableSourceService()
+    unsupported = tmp_path / "verbs.xlsx"
+    unsupported.write_text("x")
+
+    assert service.get_profile(str(tmp_path / "missing.csv")) is None
+    assert service.get_profile(str(unsupported)) is None
+    assert list(service.iter_row_chunks(str(unsupported))) == []
+
+def test_sources_outside_the_resources_directory_are_rejected(tmp_path):
+    resources_dir = tmp_path / "resources"
+    (resources_dir / "tables").mkdir(parents=True)
+    (tmp_path / "private.csv").write_text("a,b\n1,2\n")
+
+    assert TableSourceService.resolve_source(str(resources_dir), "tables/verbs.csv") == \
+        os.path.realpath(resources_dir / "tables" / "verbs.csv")
+    assert TableSourceService.resolve_source(str(resources_dir), "tables/../../private.csv") is None
+    assert TableSourceService.resolve_source(str(resources_dir), str(tmp_path / "private.csv")) is None
@@ -14,6 +14,7 @@ def mock_services(mocker):
 
     mock_pdf_builder = mocker.patch('src.consumer.PdfBuilder')
     mock_epub_builder = mocker.patch('src.consumer.EpubBuilder')
+    mock_web_builder = mocker.patch('src.consumer.WebBuilder')
 
     mock_pdf_instance = MagicMock()
     mock_pdf_instance.valid = True
@@ -23,6 +24,10 @@ def mock_services(mocker):
     mock_epub_instance.valid = True
     mock_epub_builder.return_value = mock_epub_instance
 
+    mock_web_instance = MagicMock()
+    mock_web_instance.valid = True
+    mock_web_builder.return_value = mock_web_instance
+
 @pytest.mark.parametrize(
     "pb_arg, bw_arg, s_arg, expected_paper_book, expected_bw, expected_short",
     [
@@ -48,10 +53,36 @@ def test_pdf_builder_called_with_various_args(mocker, pb_arg, bw_arg, s_arg, exp
         paper_book=expected_paper_book,
         black_and_white=expected_bw,
         short=expected_short,
-        language='hu'
+        language='hu',
+        draft=False,
+        sections=None
     )
     consumer.PdfBuilder.return_value.run.assert_called_once()
 
+def test_pdf_builder_called_with_draft_profile(mocker):
+    """
+    Tests if '--profile draft' builds a draft preview.
+    """
+    test_args = [
+        'consumer.py', '--format', 'pdf', '--data', 'data.json', '--config', 'config.yml',
+        '--pb', '1', '--bw', '0', '--s', '0', '--l', 'en', '--profile', 'draft'
+    ]
+    mocker.patch('sys.argv', test_args)
+    consumer.main()
+    assert consumer.PdfBuilder.call_args.kwargs['draft'] is True
+
+def test_pdf_builder_called_with_selected_sections(mocker):
+    """
+    Tests if '--sections' is split into section keys.
+    """
+    test_args = [
+        'consumer.py', '--format', 'pdf', '--data', 'data.json', '--config', 'config.yml',
+        '--pb', '0', '--bw', '0', '--s', '0', '--l', 'en', '--sections', 'chapters.ch_2, preface'
+    ]
+    mocker.patch('sys.argv', test_args)
+    consumer.main()
+    assert consumer.PdfBuilder.call_args.kwargs['sections'] == ['chapters.ch_2', 'preface']
+
 @pytest.mark.parametrize("missing_arg", ["--pb", "--bw", "--s", "--l"])
 def test_missing_pdf_args_raises_error(mocker, missing_arg):
     """
@@ -68,7 +99,7 @@ def test_missing_pdf_args_raises_error(mocker, missing_arg):
     with pytest.raises(SystemExit):
         consumer.main()
 
-@pytest.mark.parametrize("epub_type", ["kindle", "epub", "web"])
+@pytest.mark.parametrize("epub_type", ["kindle", "epub"])
 def test_epub_builder_called_with_correct_args(mocker, epub_type):
     """
     Tests if the main function correctly calls the EpubBuilder for various epub types.
@@ -80,10 +111,24 @@ def test_epub_builder_called_with_correct_args(mocker, epub_type):
     mocker.patch('sys.argv', test_args)
     consumer.main()
     consumer.EpubBuilder.assert_called_with(
-        json_file='data.json', epub_type=epub_type
+        json_file='data.json', epub_type=epub_type, language=None
     )
     consumer.EpubBuilder.return_value.run.assert_called_once()
 
+def test_web_builder_called_for_web_type(mocker):
+    """
+    Tests if the web type builds a static website instead of an EPUB.
+    """
+    test_args = [
+        'consumer.py', '--format', 'epub', '--data', 'data.json',
+        '--config', 'config.yml', '--et', 'web', '--l', 'hu'
+    ]
+    mocker.patch('sys.argv', test_args)
+    consumer.main()
+    consumer.WebBuilder.assert_called_with(json_file='data.json', epub_type='web', language='hu')
+    consumer.WebBuilder.return_value.run.assert_called_once()
+    consumer.EpubBuilder.assert_not_called()
+
 def test_missing_epub_args_raises_error(mocker):
     """
     Tests if the script exits with an error if the required EPUB argument is missing.
@@ -109,3 +154,22 @@ def test_startup_exception_is_caught(mocker):
     mocker.patch('src.consumer.ConfigService.initialize', side_effect=Exception("Failed to load"))
     consumer.main()
     consumer.PdfBuilder.assert_not_called()
+
+def test_pdf_and_epub_built_in_one_run(mocker):
+    """
+    Tests if '--format pdf,epub' runs both builders.
+    """
+    test_args = [
+        'consumer.py', '--format', 'pdf,epub', '--data', 'data.json', '--config', 'config.yml',
+        '--pb', '0', '--bw', '0', '--s', '0', '--l', 'en', '--et', 'epub'
+    ]
+    mocker.patch('sys.argv', test_args)
+    consumer.main()
+    consumer.PdfBuilder.return_value.run.assert_called_once()
+    consumer.EpubBuilder.assert_called_with(json_file='data.json', epub_type='epub', language='en')
+    consumer.EpubBuilder.return_value.run.assert_called_once()
+
+def test_unknown_format_raises_error(mocker):
+    mocker.patch('sys.argv', ['consumer.py', '--format', 'pdf,mobi', '--data', 'data.json', '--config', 'config.yml'])
+    with pytest.raises(SystemExit):
+        consumer.main()
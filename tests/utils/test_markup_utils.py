@@ -0,0 +1,11 @@
+import xml.etree.ElementTree as ET
+
+from src.utils.markup_utils import to_xhtml
+
+def test_inline_markup_becomes_well_formed_xhtml():
+    markup = '<b>bold <i>both</b> & <font color="red">red</font><br/><a name="x"></a>&nbsp;<unknown>'
+
+    xhtml = to_xhtml(markup, {'red': '#FF0000'})
+
+    assert xhtml == '<b>bold <i>both</i></b> &amp; <span style="color: #FF0000">red</span><br/><a id="x"></a>\xa0'
+    ET.fromstring(f'<p>{xhtml}</p>')
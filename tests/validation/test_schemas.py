@@ -1,6 +1,6 @@
 import pytest
 from pydantic import ValidationError
-from src.schemas import BookData
+from src.schemas import BookData, ListContent, TableContent
 from tests.mocked_data.mocked_data import valid_json_data
 
 
@@ -32,3 +32,23 @@ def test_book_data_with_missing_required_field(valid_book_data, field_to_remove,
 
     assert field_to_remove in str(excinfo.value)
     assert expected_error in str(excinfo.value)
+
+def test_table_content_accepts_external_source():
+    table = TableContent(type="table", source="tables/verbs.csv")
+    assert table.data is None
+
+@pytest.mark.parametrize("table_fields, expected_error", [
+    ({"source": "verbs.csv", "data": [[["a"]]]}, "not both"),
+    ({"source": "verbs.xlsx"}, "CSV and TSV"),
+    ({"block_column_widths": [["100%"]]}, "needs 'data'"),
+])
+def test_table_content_rejects_invalid_sources(table_fields, expected_error):
+    with pytest.raises(ValidationError) as excinfo:
+        TableContent(type="table", **table_fields)
+    assert expected_error in str(excinfo.value)
+
+def test_list_items_can_be_nested_to_any_depth():
+    content = ListContent(type="list", items=[
+        {"text": "a", "sub_items": ["b", {"text": "c", "sub_items": [{"text": "d"}]}]}
+    ])
+    assert content.items[0].sub_items[1].sub_items[0].text == "d"